@@ -1,11 +1,16 @@
 from data_etl.data_files import DataCuration
-from data_etl.checks import Checks
+from data_etl.checks import Checks, CheckPlan
 from data_etl.connections import Connections
+from data_etl.check_specs import func_compile_check_spec
+from data_etl.issue_log import IssueLog, IssueSink
+from data_etl.file_cache import FileCache
+from data_etl.converters import func_by_unique
 from data_etl.general_functions import func_check_for_issues, \
     func_initialise_logging, import_attr
 
 __all__ = [
-    DataCuration, Checks, Connections, func_check_for_issues,
-    func_initialise_logging, import_attr
+    DataCuration, Checks, CheckPlan, Connections, IssueLog, IssueSink,
+    func_check_for_issues, func_initialise_logging, import_attr,
+    func_compile_check_spec, FileCache, func_by_unique
 ]
 __version__ = '0.1.0dev'
\ No newline at end of file
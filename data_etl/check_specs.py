@@ -0,0 +1,207 @@
+# Here we are defining the declarative checks, where a check can be given as a
+# type and its values rather than as functions
+import logging
+import re
+
+import pandas as pd
+import numpy as np
+
+module_logger = logging.getLogger(__name__)
+
+dict_check_spec_keys = {
+    'not_null': [],
+    'range': ['min', 'max', 'inclusive', 'allow_null'],
+    'isin': ['values', 'allow_null'],
+    'regex': ['pattern', 'allow_null'],
+    'unique': [],
+    'mapping': ['mapping']
+}
+list_check_keys = [
+    'columns', 'check_condition', 'count_condition', 'index_position',
+    'relevant_columns', 'long_description', 'idx_flag', 'category', 'batch',
+    'row_wise'
+]
+
+
+def _func_range(s, var_min, var_max, var_inclusive):
+    s_condition = pd.Series(False, index=s.index)
+    if var_min is not None:
+        s_condition = s_condition | (
+            (s < var_min) if var_inclusive else (s <= var_min))
+    if var_max is not None:
+        s_condition = s_condition | (
+            (s > var_max) if var_inclusive else (s >= var_max))
+    return s_condition
+
+
+def _func_regex(s, reg_ex):
+    s_str = s.astype(str)
+    s_str.loc[s.isnull()] = np.nan
+    return ~s_str.str.match(reg_ex, na=False).astype(bool)
+
+
+def _func_by_column(df, col, function):
+    if type(col).__name__ == 'list':
+        return pd.DataFrame(
+            {item: function(df[item]) for item in col}, index=df.index,
+            columns=col)
+    return function(df[col])
+
+
+def func_compile_check_spec(check_key, dict_spec):
+    """
+    Turn a declarative check, a dictionary with a `type` key, into a check
+    with a `calc_condition` function. The types are:
+        not_null - the values in `columns` should not be null
+        range - the values should be between `min` and `max`, either can be
+            left out, with `inclusive` True by default
+        isin - the values should be in the list `values`
+        regex - the values should fully match the regular expression `pattern`
+        unique - the values should not be repeated within the column
+        mapping - `columns` is a pair of columns and `mapping` a dictionary of
+            the values of the first column to a list of the values allowed in
+            the second column
+
+    For range, isin and regex null values are not issues unless `allow_null`
+    is set to False. Any of the usual check keys, such as `category` or
+    `long_description`, can also be given.
+
+    The conditions are vectorised, and all but mapping are done in batch across
+    the columns unless `batch` is given. The spec only holds values, so it can
+    be pickled and sent to a worker process as it is.
+    """
+    module_logger.info(f"Starting `func_compile_check_spec` for `{check_key}`")
+    var_type = dict_spec['type']
+    if var_type not in dict_check_spec_keys:
+        var_msg = (f"The check `{check_key}` has an unknown type `{var_type}`, "
+                   f"the types are: {', '.join(dict_check_spec_keys.keys())}")
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+    if 'calc_condition' in dict_spec:
+        var_msg = (f"The check `{check_key}` has a `type` so should not also "
+                   f"have a `calc_condition`")
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+    list_unknown = [
+        key for key in dict_spec.keys() if
+        key not in ['type'] + dict_check_spec_keys[var_type] + list_check_keys]
+    if len(list_unknown) > 0:
+        var_msg = (f"The check `{check_key}` has keys that are not used for "
+                   f"type `{var_type}`: {', '.join(list_unknown)}")
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+    list_columns = dict_spec.get('columns')
+    if type(list_columns).__name__ == 'str':
+        list_columns = [list_columns]
+    if (type(list_columns).__name__ != 'list') or (len(list_columns) == 0):
+        var_msg = (f"The check `{check_key}` of type `{var_type}` needs "
+                   f"`columns` to be set")
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+    var_allow_null = dict_spec.get('allow_null', True)
+    dict_check = {
+        key: dict_spec[key] for key in list_check_keys if key in dict_spec}
+    dict_check['columns'] = list_columns
+
+    if var_type == 'not_null':
+        def calc_condition(df, col, **kwargs):
+            return _func_by_column(df, col, lambda s: s.isnull())
+    elif var_type == 'range':
+        var_min = dict_spec.get('min')
+        var_max = dict_spec.get('max')
+        var_inclusive = dict_spec.get('inclusive', True)
+        if (var_min is None) & (var_max is None):
+            var_msg = (f"The check `{check_key}` of type `range` needs at "
+                       f"least one of `min` or `max`")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+
+        def calc_condition(df, col, **kwargs):
+            return _func_by_column(
+                df, col,
+                lambda s: _func_range(s, var_min, var_max, var_inclusive) |
+                (s.isnull() & (not var_allow_null)))
+    elif var_type == 'isin':
+        if 'values' not in dict_spec:
+            var_msg = (f"The check `{check_key}` of type `isin` needs "
+                       f"`values`")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        list_values = list(dict_spec['values'])
+
+        def calc_condition(df, col, **kwargs):
+            return _func_by_column(
+                df, col,
+                lambda s: ~s.isin(list_values) & (
+                    s.notnull() | (not var_allow_null)))
+
+        if 'long_description' not in dict_check:
+            def long_description(df, col, condition, **kwargs):
+                return (f"The invalid values are: "
+                        f"{df.loc[condition, col].unique().tolist()}")
+            dict_check['long_description'] = long_description
+    elif var_type == 'regex':
+        if 'pattern' not in dict_spec:
+            var_msg = (f"The check `{check_key}` of type `regex` needs "
+                       f"`pattern`")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        reg_ex = re.compile(f"(?:{dict_spec['pattern']})\\Z")
+
+        def calc_condition(df, col, **kwargs):
+            return _func_by_column(
+                df, col,
+                lambda s: _func_regex(s, reg_ex) & (
+                    s.notnull() | (not var_allow_null)))
+    elif var_type == 'unique':
+        def calc_condition(df, col, **kwargs):
+            return _func_by_column(
+                df, col, lambda s: s.duplicated(keep=False))
+
+        # The rows are compared with each other
+        dict_check['row_wise'] = False
+    else:
+        if len(list_columns) != 2:
+            var_msg = (f"The check `{check_key}` of type `mapping` needs "
+                       f"`columns` to be a pair of columns")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if type(dict_spec.get('mapping')).__name__ != 'dict':
+            var_msg = (f"The check `{check_key}` of type `mapping` needs "
+                       f"`mapping` to be a dictionary")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        var_col_from, var_col_to = list_columns
+        df_pairs = pd.DataFrame(
+            [
+                (key, value) for key in dict_spec['mapping'].keys() for
+                value in dict_spec['mapping'][key]
+            ],
+            columns=[var_col_from, var_col_to]
+        ).drop_duplicates()
+        df_pairs['_mapped'] = True
+        dict_check['columns'] = [np.nan]
+
+        def calc_condition(df, col, **kwargs):
+            df_mapped = pd.merge(
+                df[[var_col_from, var_col_to]], df_pairs,
+                on=[var_col_from, var_col_to], how='left')
+            return pd.Series(
+                df_mapped['_mapped'].isnull().values, index=df.index)
+
+        if 'relevant_columns' not in dict_check:
+            def relevant_columns(df, col, condition, **kwargs):
+                return f"{var_col_from}, {var_col_to}"
+            dict_check['relevant_columns'] = relevant_columns
+        if 'long_description' not in dict_check:
+            def long_description(df, col, condition, **kwargs):
+                return (f"The values that have no mapping are: "
+                        f"{df.loc[condition, var_col_from].unique().tolist()}")
+            dict_check['long_description'] = long_description
+
+    dict_check['calc_condition'] = calc_condition
+    if ('batch' not in dict_check) and (var_type != 'mapping'):
+        dict_check['batch'] = True
+    module_logger.info(
+        f"Completed `func_compile_check_spec` for `{check_key}`")
+    return dict_check
@@ -1,27 +1,551 @@
 # Here we are defining a class that will deal with checking data sets
 import logging
-from inspect import getfullargspec
+import os
+import sys
+import importlib.util
+import pickle
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from inspect import signature, Parameter
 from copy import deepcopy
 from inspect import getsourcelines
 
 import pandas as pd
 import numpy as np
+try:
+    import cloudpickle
+except ImportError:
+    cloudpickle = None
 
 from data_etl.general_functions import import_attr
+from data_etl.check_specs import func_compile_check_spec, \
+    dict_check_spec_keys
+from data_etl.issue_log import IssueLog, func_issue_idx
 
 module_logger = logging.getLogger(__name__)
 
+
+def _func_mark_default(key, function):
+    """
+    Mark a default function of the checks with its key, unlike its identity
+    the mark is kept when the function is sent to a worker process with
+    `cloudpickle`.
+    """
+    function._check_default = key
+    return function
+
+
+def _func_is_default(key, function):
+    return getattr(function, '_check_default', None) == key
+
+
 dict_checks_defaults = {
     'columns': [np.nan],
-    'check_condition':
-        lambda df, col, condition, **kwargs: condition.sum() > 0,
-    'count_condition': lambda df, col, condition, **kwargs: condition.sum(),
-    'index_position': lambda df, col, condition, **kwargs: condition,
-    'relevant_columns': lambda df, col, condition, **kwargs: col,
-    'long_description': lambda df, col, condition, **kwargs: "",
+    'check_condition': _func_mark_default(
+        'check_condition',
+        lambda df, col, condition, **kwargs: condition.sum() > 0),
+    'count_condition': _func_mark_default(
+        'count_condition',
+        lambda df, col, condition, **kwargs: condition.sum()),
+    'index_position': _func_mark_default(
+        'index_position', lambda df, col, condition, **kwargs: condition),
+    'relevant_columns': _func_mark_default(
+        'relevant_columns', lambda df, col, condition, **kwargs: col),
+    'long_description': _func_mark_default(
+        'long_description', lambda df, col, condition, **kwargs: ""),
     'idx_flag': True,
-    'category': np.nan
+    'category': np.nan,
+    'batch': False,
+    'row_wise': True
 }
+list_profile_columns = [
+    "key_1", "key_2", "key_3", "file", "sub_file", "step_number", "check",
+    "column", "rows", "calc_time", "side_time", "rows_per_sec",
+    "peak_memory", "grouping"
+]
+
+
+def _validate_check_function(function, label, list_args):
+    """
+    Check the function takes the arguments of `list_args`, by those names and
+    in that order, followed by keyword arguments. The keyword arguments can
+    have any name, such as `**kw`, and any further arguments need defaults,
+    so a `partial` or a function with extra settings can be used. Where the
+    signature can not be read, as for some built in functions, only that it
+    can be called is checked.
+    """
+    if not callable(function):
+        var_msg = f'The passed value for `{label}` is not a function'
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+    try:
+        list_params = list(signature(function).parameters.values())
+    except (ValueError, TypeError):
+        return
+    list_positional = [
+        param for param in list_params if param.kind in [
+            Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD]]
+    var_required = len([
+        param for param in list_positional if
+        param.default is Parameter.empty])
+    var_varargs = any(
+        [param.kind == Parameter.VAR_POSITIONAL for param in list_params])
+    list_names = [param.name for param in list_positional]
+    if (
+        (list_names[:len(list_args)] != list_args[:len(list_names)]) or
+        (var_required > len(list_args)) or
+        ((len(list_positional) < len(list_args)) and not var_varargs)
+    ):
+        var_msg = (
+            f'The arguments passed in for the function `{label}` does not '
+            f'match with the required args: {", ".join(list_args)}')
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+    if not any(
+            [param.kind == Parameter.VAR_KEYWORD for param in list_params]):
+        var_msg = (f'The **kwargs argument has not been provided for '
+                   f'`{label}` and is required')
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+
+
+def _split_table_key(table_key, key_separator):
+    if pd.isnull(table_key):
+        return np.nan, np.nan
+    var_file = table_key.split(key_separator)[0]
+    var_subfile = (table_key.split(key_separator)[1] if
+                   key_separator in table_key else np.nan)
+    return var_file, var_subfile
+
+
+def _run_check(df, dict_check, check_key, table_key, key_separator, debug,
+               profile=None, **kwargs):
+    """
+    Evaluate a single check, with the defaults already filled in, against a
+    single table. The issues found are returned in the order of the arguments
+    of `Checks.error_handling` rather than logged, so this can be run away
+    from the `Checks` object. Each issue is paired with the position of its
+    column in the `columns` of the check.
+
+    With `profile` as 'time' or 'memory' a row of timings for each column is
+    also returned, see `Checks.set_profile`, otherwise the list is empty.
+    """
+    module_logger.info(f"Starting check `{check_key}`")
+    list_columns = dict_check['columns']
+    list_profile = list()
+    var_tracing = False
+    if profile == 'memory':
+        var_tracing = not tracemalloc.is_tracing()
+        if var_tracing:
+            tracemalloc.start()
+    try:
+        if dict_check['batch'] is True:
+            dict_profile = _func_profile_start(profile)
+            list_issues = _evaluate_check_batch(
+                df, list_columns, dict_check, check_key, table_key,
+                key_separator, debug, dict_profile, **kwargs)
+            if profile is not None:
+                # The condition is found for all the columns at once, so the
+                # time and memory are shared evenly between the columns
+                _func_profile_end(dict_profile)
+                for col in list_columns:
+                    list_profile.append(_func_profile_row(
+                        df, col, check_key, table_key, key_separator,
+                        dict_profile, len(list_columns)))
+        else:
+            list_issues = list()
+            for i, col in enumerate(list_columns):
+                dict_profile = _func_profile_start(profile)
+                list_issue = _evaluate_check(
+                    df, col, dict_check, check_key, table_key, key_separator,
+                    debug, dict_profile, **kwargs)
+                if list_issue is not None:
+                    list_issues.append((i, list_issue))
+                if profile is not None:
+                    _func_profile_end(dict_profile)
+                    list_profile.append(_func_profile_row(
+                        df, col, check_key, table_key, key_separator,
+                        dict_profile, 1))
+    finally:
+        if var_tracing:
+            tracemalloc.stop()
+    module_logger.info(f"Completed check `{check_key}`")
+    return list_issues, list_profile
+
+
+def _func_profile_start(profile):
+    if profile is None:
+        return None
+    dict_profile = {'calc_time': 0.0, 'side_time': 0.0, 'peak_memory': np.nan}
+    if profile == 'memory':
+        tracemalloc.reset_peak()
+        dict_profile['memory_start'] = tracemalloc.get_traced_memory()[0]
+    return dict_profile
+
+
+def _func_profile_end(dict_profile):
+    if 'memory_start' in dict_profile:
+        dict_profile['peak_memory'] = (
+            tracemalloc.get_traced_memory()[1] - dict_profile['memory_start'])
+
+
+def _func_profile_row(df, col, check_key, table_key, key_separator,
+                      dict_profile, var_share):
+    var_file, var_subfile = _split_table_key(table_key, key_separator)
+    var_calc_time = dict_profile['calc_time'] / var_share
+    var_side_time = dict_profile['side_time'] / var_share
+    var_time = var_calc_time + var_side_time
+    return [
+        var_file, var_subfile, check_key, col, df.shape[0], var_calc_time,
+        var_side_time, (df.shape[0] / var_time if var_time > 0 else np.nan),
+        dict_profile['peak_memory'] / var_share
+    ]
+
+
+def _run_check_payload(payload):
+    """
+    Used by the process pool, the arguments of `_run_check` are passed
+    serialised with `cloudpickle` so the lambdas of the checks can be sent.
+    """
+    args, kwargs = cloudpickle.loads(payload)
+    return _run_check(*args, **kwargs)
+
+
+def _run_check_spec(df, dict_spec, dict_defaults, check_key, table_key,
+                    key_separator, debug, profile=None, **kwargs):
+    """
+    Used by the process pool for declarative checks, the check is compiled in
+    the worker from the spec so only values need to be pickled.
+    """
+    dict_check = CheckPlan(
+        {check_key: dict_spec}, dict(dict_checks_defaults, **dict_defaults)
+    ).get_check(check_key)
+    return _run_check(
+        df, dict_check, check_key, table_key, key_separator, debug, profile,
+        **kwargs)
+
+
+def _evaluate_check(df, col, dict_check, check_key, table_key, key_separator,
+                    debug, dict_profile=None, **kwargs):
+    """
+    Only the `calc_condition` and `check_condition` functions are run unless
+    the check finds an issue, then the other functions are run to describe it.
+
+    With `debug` True all the functions are run and the values they return are
+    validated, with a warning logged for any of the wrong type.
+
+    If `dict_profile` is given the time taken by `calc_condition` and by the
+    other functions are added to it.
+    """
+    module_logger.info(
+        f"Starting evaluating check `{check_key}` for column {col}")
+    var_idx_flag = dict_check['idx_flag']
+    var_category = dict_check['category']
+    var_start = time.perf_counter()
+    s_calc_condition = dict_check['calc_condition'](df, col, **kwargs)
+    var_calc_end = time.perf_counter()
+    if dict_profile is not None:
+        dict_profile['calc_time'] += var_calc_end - var_start
+    try:
+        return _evaluate_check_side(
+            df, col, dict_check, check_key, table_key, key_separator, debug,
+            s_calc_condition, var_idx_flag, var_category, **kwargs)
+    finally:
+        if dict_profile is not None:
+            dict_profile['side_time'] += time.perf_counter() - var_calc_end
+        module_logger.info(
+            f"Completed evaluating check `{check_key}` for column {col}")
+
+
+def _evaluate_check_side(df, col, dict_check, check_key, table_key,
+                         key_separator, debug, s_calc_condition, var_idx_flag,
+                         var_category, **kwargs):
+    var_check_condition = dict_check['check_condition'](
+        df, col, s_calc_condition, **kwargs)
+    if (not var_check_condition) and (not debug):
+        return None
+    var_count_condition = dict_check['count_condition'](
+        df, col, s_calc_condition, **kwargs)
+    s_index_conditions = dict_check['index_position'](
+        df, col, s_calc_condition, **kwargs)
+    if var_idx_flag is False:
+        s_index_conditions = s_index_conditions.map(
+            {True: False, False: True})
+    var_relevant_columns = dict_check['relevant_columns'](
+        df, col, s_calc_condition, **kwargs)
+    var_long_description = dict_check['long_description'](
+        df, col, s_calc_condition, **kwargs)
+    if debug:
+        _validate_check_values(
+            s_calc_condition, var_count_condition, s_index_conditions,
+            var_relevant_columns, var_long_description, var_category)
+    list_issue = None
+    if var_check_condition:
+        var_file, var_subfile = _split_table_key(table_key, key_separator)
+        list_issue = [
+            var_file, var_subfile, check_key, var_long_description,
+            var_relevant_columns, var_count_condition,
+            func_issue_idx(s_index_conditions), var_category
+        ]
+    return list_issue
+
+
+def _validate_check_values(
+        s_calc_condition, var_count_condition, s_index_conditions,
+        var_relevant_columns, var_long_description, var_category):
+    if type(var_long_description).__name__ != "str":
+        var_msg = (
+            f"The variable `var_long_description` is not a string! It is a"
+            f" {type(var_long_description).__name__}")
+        module_logger.warning(var_msg)
+    if (
+        (type(var_relevant_columns).__name__ != "str") &
+        (pd.isnull(var_relevant_columns) is False)
+    ):
+        var_msg = (
+            f"The variable `var_relevant_columns` is not a string or null! "
+            f"It is a {type(var_relevant_columns).__name__}")
+        module_logger.warning(var_msg)
+    if "int" not in type(var_count_condition).__name__:
+        var_msg = (
+            f"The variable `var_count_condition` is not an integer! It is a"
+            f" {type(var_count_condition).__name__}")
+        module_logger.warning(var_msg)
+    if type(s_calc_condition).__name__ != "Series":
+        var_msg = (
+            f"The variable `s_calc_condition` is not a Series! It is a "
+            f"{type(s_calc_condition).__name__}")
+        module_logger.warning(var_msg)
+    if type(s_index_conditions).__name__ != "Series":
+        var_msg = (
+            f"The variable `s_index_conditions` is not a Series! It is a "
+            f"{type(s_index_conditions).__name__}")
+        module_logger.warning(var_msg)
+    if (
+        (type(var_category).__name__ != 'str') &
+        (pd.isnull(var_category) is False)
+    ):
+        var_msg = (f'The variable `category` is not a string or null! It '
+                   f'is a {type(var_category).__name__}')
+        module_logger.warning(var_msg)
+
+
+def _evaluate_check_batch(df, list_columns, dict_check, check_key, table_key,
+                          key_separator, debug, dict_profile=None, **kwargs):
+    """
+    For checks with `batch` set to True the `calc_condition` function is
+    passed the whole list of columns as `col` and returns a boolean
+    DataFrame with a column for each. The default check, count and index
+    functions are then done for all the columns at once, any functions
+    that are not the defaults are still given a Series per column.
+
+    With `debug` True each column is instead evaluated as `_evaluate_check`
+    does, so all the functions are run and the values they return are
+    validated.
+
+    If `dict_profile` is given the time taken by `calc_condition` and by the
+    rest are added to it.
+    """
+    module_logger.info(
+        f"Starting evaluating check `{check_key}` in batch for columns "
+        f"{list_columns}")
+    func_check_condition = dict_check['check_condition']
+    func_count_condition = dict_check['count_condition']
+    func_index_position = dict_check['index_position']
+    var_idx_flag = dict_check['idx_flag']
+    if len([col for col in list_columns if pd.isnull(col)]) > 0:
+        var_msg = (f"The check `{check_key}` has `batch` set to True so "
+                   f"it requires the `columns` to be set")
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+    var_start = time.perf_counter()
+    df_calc_condition = dict_check['calc_condition'](
+        df, list_columns, **kwargs)
+    var_calc_end = time.perf_counter()
+    if type(df_calc_condition).__name__ != "DataFrame":
+        var_msg = (
+            f"The variable `df_calc_condition` is not a DataFrame! It is a "
+            f"{type(df_calc_condition).__name__}")
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+    if df_calc_condition.columns.tolist() != list_columns:
+        df_calc_condition = df_calc_condition[list_columns]
+    arr_condition = np.asarray(df_calc_condition, dtype=bool)
+    arr_count = arr_condition.sum(axis=0)
+    list_issues = list()
+    arr_index = (
+        arr_condition if var_idx_flag is not False else ~arr_condition)
+    for i, col in enumerate(list_columns):
+        if debug:
+            list_issue = _evaluate_check_side(
+                df, col, dict_check, check_key, table_key, key_separator,
+                debug, df_calc_condition.iloc[:, i], var_idx_flag,
+                dict_check['category'], **kwargs)
+            if list_issue is not None:
+                list_issues.append((i, list_issue))
+            continue
+        s_calc_condition = None
+        if _func_is_default('check_condition', func_check_condition):
+            var_check_condition = arr_count[i] > 0
+        else:
+            s_calc_condition = df_calc_condition.iloc[:, i]
+            var_check_condition = func_check_condition(
+                df, col, s_calc_condition, **kwargs)
+        if not var_check_condition:
+            continue
+        if s_calc_condition is None:
+            s_calc_condition = df_calc_condition.iloc[:, i]
+        if _func_is_default('count_condition', func_count_condition):
+            var_count_condition = arr_count[i]
+        else:
+            var_count_condition = func_count_condition(
+                df, col, s_calc_condition, **kwargs)
+        if _func_is_default('index_position', func_index_position):
+            arr_issue_idx = np.asarray(
+                df_calc_condition.index[arr_index[:, i]])
+        else:
+            s_index_conditions = func_index_position(
+                df, col, s_calc_condition, **kwargs)
+            if var_idx_flag is False:
+                s_index_conditions = s_index_conditions.map(
+                    {True: False, False: True})
+            arr_issue_idx = func_issue_idx(s_index_conditions)
+        var_relevant_columns = dict_check['relevant_columns'](
+            df, col, s_calc_condition, **kwargs)
+        var_long_description = dict_check['long_description'](
+            df, col, s_calc_condition, **kwargs)
+        var_file, var_subfile = _split_table_key(table_key, key_separator)
+        list_issues.append((i, [
+            var_file, var_subfile, check_key, var_long_description,
+            var_relevant_columns, var_count_condition, arr_issue_idx,
+            dict_check['category']
+        ]))
+    if dict_profile is not None:
+        dict_profile['calc_time'] += var_calc_end - var_start
+        dict_profile['side_time'] += time.perf_counter() - var_calc_end
+    module_logger.info(
+        f"Completed evaluating check `{check_key}` in batch for columns "
+        f"{list_columns}")
+    return list_issues
+
+
+class CheckPlan:
+    __dict_checks = None
+    __dict_specs = None
+
+    def __init__(self, dict_checks, dict_defaults=None):
+        """
+        The checks with the values that have not been given filled in from the
+        defaults, and the functions validated, done once so the plan can be
+        used for any number of tables, steps and groupings with
+        `Checks.apply_checks(plan=...)`.
+
+        Usually formed with `Checks.compile_checks` so the defaults of that
+        `Checks` object are used.
+        """
+        module_logger.info("Initialising `CheckPlan` object")
+        if type(dict_checks).__name__ != "dict":
+            var_msg = "The `dict_checks` argument is not a dictionary"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if dict_defaults is None:
+            dict_defaults = dict_checks_defaults
+        self.__dict_checks = {
+            check_key: self.__resolve_check(
+                check_key, dict_checks[check_key], dict_defaults)
+            for check_key in dict_checks.keys()
+        }
+        # Declarative checks can be sent to worker processes as they are, as
+        # long as the defaults they rely on are not functions set by the user
+        self.__dict_specs = dict()
+        if len([
+            key for key in dict_defaults.keys() if
+            not _func_is_default(key, dict_defaults[key]) and
+            type(dict_defaults[key]).__name__ == 'function'
+        ]) == 0:
+            for check_key in dict_checks.keys():
+                dict_spec = dict_checks[check_key]
+                if 'type' not in dict_spec:
+                    continue
+                try:
+                    pickle.dumps(dict_spec)
+                except Exception:
+                    continue
+                self.__dict_specs[check_key] = (
+                    dict_spec,
+                    {
+                        key: dict_defaults[key] for key in
+                        dict_defaults.keys() if
+                        type(dict_defaults[key]).__name__ != 'function'
+                    }
+                )
+        module_logger.info("Initialising `CheckPlan` object complete")
+
+    def __len__(self):
+        return len(self.__dict_checks)
+
+    def keys(self):
+        return self.__dict_checks.keys()
+
+    def get_check(self, check_key):
+        return self.__dict_checks[check_key]
+
+    def get_spec(self, check_key):
+        """
+        For a declarative check the spec and the defaults, that can be pickled,
+        otherwise None.
+        """
+        return self.__dict_specs.get(check_key)
+
+    @staticmethod
+    def __resolve_check(check_key, dict_check_info, dict_defaults):
+        if type(dict_check_info).__name__ != "dict":
+            var_msg = f"The check `{check_key}` is not a dictionary"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if "type" in dict_check_info:
+            dict_check_info = func_compile_check_spec(
+                check_key, dict_check_info)
+        if "calc_condition" not in dict_check_info:
+            var_msg = "The check requires a value for key `calc_condition`"
+            module_logger.error(var_msg)
+            raise AttributeError(var_msg)
+        dict_check = {
+            key: (
+                dict_defaults[key] if key not in dict_check_info else
+                dict_check_info[key])
+            for key in dict_defaults.keys()
+        }
+        dict_check['calc_condition'] = dict_check_info['calc_condition']
+        _validate_check_function(
+            dict_check['calc_condition'], 'calc_condition', ['df', 'col'])
+        for key in [
+            'check_condition', 'count_condition', 'index_position',
+            'relevant_columns', 'long_description'
+        ]:
+            if key in dict_check_info:
+                _validate_check_function(
+                    dict_check[key], key, ['df', 'col', 'condition'])
+        if type(dict_check['columns']).__name__ == 'str':
+            dict_check['columns'] = [dict_check['columns']]
+        if type(dict_check['columns']).__name__ != 'list':
+            var_msg = (f'The `columns` value for the check `{check_key}` is '
+                       f'not a list or a string')
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if len(dict_check['columns']) == 0:
+            var_msg = ('The `list_columns` value somehow has length 0, needs '
+                       'to have at least one element, which can be `np.nan`')
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        for key in ['idx_flag', 'batch', 'row_wise']:
+            if dict_check[key] not in [True, False]:
+                var_msg = (f'The value of `{key}` for the check `{check_key}` '
+                           f'needs to be True or False')
+                module_logger.error(var_msg)
+                raise ValueError(var_msg)
+        return dict_check
 
 
 class Checks:
@@ -30,11 +554,16 @@ class Checks:
     __key_2 = None
     __key_3 = None
     __grouping = None
-    df_issues = None
+    __issue_log = None
     __key_separator = " -:- "
     __checks_defaults = None
+    __debug = False
+    __dict_plans = None
+    __profile = None
+    __list_profile = None
 
-    def __init__(self, grouping, key_1, key_2=None, key_3=None):
+    def __init__(self, grouping, key_1, key_2=None, key_3=None,
+                 issue_log=None, issue_sink=None):
         module_logger.info("Initialising `Checks` object")
         # Three keys, all good things come in threes
         self.__key_1 = str(key_1)
@@ -42,16 +571,12 @@ class Checks:
         self.__key_3 = str(key_3)
         self.__grouping = grouping
         self.__checks_defaults = dict(dict_checks_defaults)
+        self.__dict_plans = dict()
+        self.__list_profile = list()
         # Initialise the `df_issues` table
-        df_issues = pd.DataFrame(
-            columns=[
-                "key_1", "key_2", "key_3", "file", "sub_file", "step_number",
-                "category", "issue_short_desc", "issue_long_desc", "column",
-                "issue_count", "issue_idx", "grouping"
-            ]
-        )
-        df_issues["step_number"] = df_issues["step_number"].astype(int)
-        self.df_issues = df_issues
+        self.__set_issue_log(issue_log)
+        if issue_sink is not None:
+            self.set_issue_sink(issue_sink)
         module_logger.info("Initialising `Checks` object complete")
 
     def error_handling(self, file, subfile, issue_short_desc, issue_long_desc,
@@ -64,25 +589,61 @@ class Checks:
         # TODO work out how to add in `file` and `subfile` where data is a
         #  dictionary
         module_logger.info("Logging an error with `error_handling`")
-        df = self.df_issues.copy()
         list_vals = [
             self.__key_1, self.__key_2, self.__key_3, file, subfile,
             self.__step_no, category, issue_short_desc, issue_long_desc, column,
             issue_count, issue_idx, self.__grouping
         ]
-        try:
-            df.loc[df.shape[0]] = list_vals
-            self.df_issues = df.copy()
-        except:
-            var_msg = f"Logging the issue failed, values: {list_vals}"
+        self.__issue_log.append(list_vals)
+        module_logger.info(f"Error logged: {list_vals}")
+
+    def __set_issue_log(self, issue_log):
+        if issue_log is None:
+            issue_log = IssueLog()
+        elif type(issue_log).__name__ != "IssueLog":
+            var_msg = "The `issue_log` argument is not an `IssueLog` object"
             module_logger.error(var_msg)
             raise ValueError(var_msg)
-        module_logger.info(f"Error logged: {list_vals}")
+        self.__issue_log = issue_log
+
+    @property
+    def df_issues(self):
+        """
+        The issues logged so far, formed into a table when requested.
+        """
+        return self.__issue_log.get_table()
+
+    @df_issues.setter
+    def df_issues(self, df_issues):
+        self.__issue_log.set_table(df_issues)
+
+    def get_issue_log(self):
+        module_logger.info("Starting `get_issue_log`")
+        module_logger.info("Completed `get_issue_log`")
+        return self.__issue_log
+
+    def set_issue_sink(self, issue_sink):
+        """
+        Set an `IssueSink` so the issues are written to the table of a
+        `Connections` key in batches while the steps run.
+        """
+        module_logger.info("Starting `set_issue_sink`")
+        self.__issue_log.set_sink(issue_sink)
+        module_logger.info("Completed `set_issue_sink`")
+
+    def flush_issues(self):
+        """
+        Write any issues still held in memory to the `IssueSink`, this is done
+        at the end of each step that logs issues.
+        """
+        module_logger.info("Starting `flush_issues`")
+        self.__issue_log.flush()
+        module_logger.info("Completed `flush_issues`")
 
     def set_defaults(
             self, columns=None, check_condition=None, count_condition=None,
             index_position=None, relevant_columns=None, long_description=None,
-            idx_flag=None):
+            idx_flag=None, batch=None):
         module_logger.info("Starting `set_defaults`")
         if columns is not None:
             if type(columns).__name__ != 'list':
@@ -116,27 +677,19 @@ class Checks:
                 module_logger.error(var_msg)
                 raise ValueError(var_msg)
             self.__checks_defaults['idx_flag'] = idx_flag
+        if batch is not None:
+            if batch not in [True, False]:
+                var_msg = 'The value of `batch` need to be True or False'
+                module_logger.error(var_msg)
+                raise ValueError(var_msg)
+            self.__checks_defaults['batch'] = batch
+        self.__dict_plans = dict()
         module_logger.info("Completed `set_defaults`")
 
     @staticmethod
     def __set_defaults_check(function, label):
         module_logger.info("Starting `__set_defaults_check`")
-        if type(function).__name__ != 'function':
-            var_msg = f'The passed value for `{label}` is not a function'
-            module_logger.error(var_msg)
-            raise ValueError(var_msg)
-        arg_spec = getfullargspec(function)
-        if arg_spec.args != ['df', 'col', 'condition']:
-            var_msg = (
-                f'The arguments passed in for the function `{label}` does not '
-                f'match with the required args: df, col, condition')
-            module_logger.error(var_msg)
-            raise ValueError(var_msg)
-        if arg_spec.varkw != 'kwargs':
-            var_msg = (f'The **kwargs argument has not been provided for '
-                       f'`{label}` and is required')
-            module_logger.error(var_msg)
-            raise ValueError(var_msg)
+        _validate_check_function(function, label, ['df', 'col', 'condition'])
         module_logger.info("Completed `__set_defaults_check`")
 
     def set_key_separator(self, separator):
@@ -151,186 +704,344 @@ class Checks:
         module_logger.info(f"Completed `set_key_separator`, the key separator "
                            f"is: {self.__key_separator}")
 
-    def apply_checks(
-            self, tables, path=None, script_name=None,
-            object_name="dict_checks", dictionary=None, **kwargs):
-        module_logger.info("Starting `apply_checks`")
+    def compile_checks(self, path=None, script_name=None,
+                       object_name="dict_checks", dictionary=None):
+        """
+        Form a `CheckPlan` from the checks and the defaults of this object,
+        which can be passed to `apply_checks` as `plan` for each set of tables.
+
+        A plan from a script is kept until the script is changed, or the
+        defaults are, so the script is not executed again on every call.
+        """
+        module_logger.info("Starting `compile_checks`")
         if (script_name is not None) & (object_name is not None):
-            dict_checks = import_attr(path, script_name, object_name)
+            var_from_module = (path is None) | (path == '.')
+            if var_from_module:
+                # Imported as a module, so found where it would be imported
+                spec = importlib.util.find_spec(script_name)
+                var_script_path = None if spec is None else spec.origin
+            else:
+                var_script_path = os.path.join(path, f"{script_name}.py")
+            tuple_key = (
+                path, script_name, object_name,
+                (os.stat(var_script_path).st_mtime_ns if
+                 (var_script_path is not None) and
+                 os.path.exists(var_script_path) else None)
+            )
+            if tuple_key not in self.__dict_plans:
+                if var_from_module and (script_name in sys.modules):
+                    # The module is kept once imported so needs reloading to
+                    # pick up the changes
+                    importlib.reload(sys.modules[script_name])
+                dict_checks = import_attr(path, script_name, object_name)
+                self.__dict_plans[tuple_key] = CheckPlan(
+                    dict_checks, self.__checks_defaults)
+            plan = self.__dict_plans[tuple_key]
         elif dictionary is not None:
             if type(dictionary).__name__ != "dict":
                 var_msg = "The `dictionary` argument is not a dictionary"
                 module_logger.error(var_msg)
                 raise ValueError(var_msg)
-            dict_checks = dictionary
+            plan = CheckPlan(dictionary, self.__checks_defaults)
         else:
             var_msg = ("Either `dictionary` or both of `script_name` and "
                        "`path` need to be none null")
             module_logger.error(var_msg)
             raise ValueError(var_msg)
+        module_logger.info("Completed `compile_checks`")
+        return plan
 
-        if type(tables).__name__ == "dict":
-            for table_key in tables.keys():
-                for check_key in dict_checks.keys():
-                    self.__apply_the_check(
-                        tables[table_key], dict_checks[check_key], check_key,
-                        table_key, **kwargs)
-        elif type(tables).__name__ == "DataFrame":
-            for check_key in dict_checks.keys():
-                self.__apply_the_check(tables, dict_checks[check_key],
-                                       check_key, np.nan, **kwargs)
+    def set_profile(self, profile, memory=False):
+        """
+        With `profile` True each check records a row in `df_check_profile`
+        for each table and column it is run on, with the seconds taken by
+        `calc_condition` and by the other functions, the rows of the table and
+        the rows per second.
 
-        module_logger.info("Completed `apply_checks`")
+        With `memory` True the peak memory allocated in bytes while the check
+        runs is also recorded using `tracemalloc`, this slows the checks down.
+        As `tracemalloc` traces the whole process the memory can only be
+        profiled for checks run one after another, not with an `executor`.
+        """
+        module_logger.info("Starting `set_profile`")
+        for var_value, var_label in [(profile, 'profile'), (memory, 'memory')]:
+            if var_value not in [True, False]:
+                var_msg = f'The value of `{var_label}` need to be True or False'
+                module_logger.error(var_msg)
+                raise ValueError(var_msg)
+        self.__profile = (
+            None if profile is False else 'memory' if memory else 'time')
+        module_logger.info(
+            f"Completed `set_profile`, profiling is {self.__profile}")
 
-    def __apply_the_check(
-            self, df, dict_check_info, check_key, table_key, **kwargs):
-        module_logger.info(f"Starting check `{check_key}`")
-        if "calc_condition" not in dict_check_info:
-            var_msg = "The check requires a value for key `calc_condition`"
+    @property
+    def df_check_profile(self):
+        """
+        The profile of the checks run since `set_profile`, this can be written
+        out with `Connections.write_to_db` as for `df_issues`.
+        """
+        if len(self.__list_profile) == 0:
+            return pd.DataFrame(columns=list_profile_columns)
+        return pd.DataFrame(self.__list_profile, columns=list_profile_columns)
+
+    def reset_check_profile(self):
+        module_logger.info("Starting `reset_check_profile`")
+        self.__list_profile = list()
+        module_logger.info("Completed `reset_check_profile`")
+
+    def __log_profile(self, list_profile):
+        for list_row in list_profile:
+            self.__list_profile.append([
+                self.__key_1, self.__key_2, self.__key_3, list_row[0],
+                list_row[1], self.__step_no] + list_row[2:] + [self.__grouping]
+            )
+
+    def set_debug(self, debug):
+        """
+        With `debug` True every function of a check is run, even where the
+        check finds no issue, and the values returned are validated with a
+        warning logged for any of the wrong type. Otherwise only the
+        `calc_condition` and `check_condition` functions run until an issue is
+        found.
+        """
+        module_logger.info("Starting `set_debug`")
+        if debug not in [True, False]:
+            var_msg = 'The value of `debug` need to be True or False'
             module_logger.error(var_msg)
-            raise AttributeError(var_msg)
-        func_calc_condition = dict_check_info["calc_condition"]
-        func_long_description = (
-            self.__checks_defaults['long_description'] if
-            "long_description" not in dict_check_info else
-            dict_check_info["long_description"])
-        func_check_condition = (
-            self.__checks_defaults['check_condition'] if
-            "check_condition" not in dict_check_info else
-            dict_check_info["check_condition"])
-        list_columns = (
-            self.__checks_defaults['columns'] if
-            "columns" not in dict_check_info else
-            dict_check_info["columns"])
-        if type(list_columns).__name__ == 'str':
-            list_columns = [list_columns]
-        func_count_condition = (
-            self.__checks_defaults['count_condition'] if
-            "count_condition" not in dict_check_info else
-            dict_check_info["count_condition"])
-        func_index_position = (
-            self.__checks_defaults['index_position'] if
-            "index_position" not in dict_check_info else
-            dict_check_info["index_position"])
-        func_relevant_columns = (
-            self.__checks_defaults['relevant_columns'] if
-            "relevant_columns" not in dict_check_info else
-            dict_check_info["relevant_columns"])
-        var_idx_flag = (
-            self.__checks_defaults['idx_flag'] if
-            "idx_flag" not in dict_check_info else
-            dict_check_info['idx_flag'])
-        var_category = (
-            self.__checks_defaults['category'] if
-            "category" not in dict_check_info else
-            dict_check_info['category'])
-        if len(list_columns) == 0:
-            var_msg = ('The `list_columns` value somehow has length 0, needs '
-                       'to have at least one element, which can be `np.nan`')
+            raise ValueError(var_msg)
+        self.__debug = debug
+        module_logger.info(f"Completed `set_debug`, debug is {self.__debug}")
+
+    def apply_checks(
+            self, tables, path=None, script_name=None,
+            object_name="dict_checks", dictionary=None, plan=None,
+            executor=None, max_workers=None, **kwargs):
+        """
+        Apply the checks to each of the tables.
+
+        The checks are independent of each other so with `executor` as
+        'thread' or 'process' each pair of table and check is run in a pool of
+        `max_workers`. A thread pool suits checks that are mostly numpy work,
+        which releases the GIL, while a process pool needs the `cloudpickle`
+        package so the lambdas of the checks can be sent to the workers,
+        declarative checks are sent as they are. Either way the issues are
+        logged in the same order as when run one after another.
+
+        The checks can be given as a `CheckPlan` from `compile_checks` with
+        the `plan` argument, otherwise one is compiled from `dictionary` or
+        the script.
+
+        The `tables` can be a DataFrame, a dictionary of DataFrames or an
+        iterator of DataFrame chunks, see `__apply_checks_chunks`.
+        """
+        module_logger.info("Starting `apply_checks`")
+        if plan is not None:
+            if type(plan).__name__ != "CheckPlan":
+                var_msg = "The `plan` argument is not a `CheckPlan` object"
+                module_logger.error(var_msg)
+                raise ValueError(var_msg)
+        else:
+            plan = self.compile_checks(
+                path, script_name, object_name, dictionary)
+        if executor not in [None, 'thread', 'process']:
+            var_msg = ("The `executor` argument only takes values None, "
+                       "`thread`, `process`")
             module_logger.error(var_msg)
             raise ValueError(var_msg)
-        for col in list_columns:
-            self.__evaluate_check(
-                check_key, df, col, func_calc_condition,
-                func_check_condition, func_count_condition, func_index_position,
-                func_relevant_columns, func_long_description, var_idx_flag,
-                var_category, table_key, **kwargs)
-
-        module_logger.info(f"Completed check `{check_key}`")
-
-    def __evaluate_check(
-            self, check_key, df, col, func_calc_condition, func_check_condition,
-            func_count_condition, func_index_position, func_relevant_columns,
-            func_long_description, var_idx_flag, var_category, table_key,
-            **kwargs):
-        module_logger.info(
-            f"Starting evaluating check `{check_key}` for column {col}")
-        s_calc_condition = func_calc_condition(df, col, **kwargs)
-        var_check_condition = func_check_condition(
-            df, col, s_calc_condition, **kwargs)
-        var_count_condition = func_count_condition(
-            df, col, s_calc_condition, **kwargs)
-        s_index_conditions = func_index_position(
-            df, col, s_calc_condition, **kwargs)
-        if var_idx_flag is False:
-            s_index_conditions = s_index_conditions.map(
-                {True: False, False: True})
-        var_relevant_columns = func_relevant_columns(
-            df, col, s_calc_condition, **kwargs)
-        var_long_description = func_long_description(
-            df, col, s_calc_condition, **kwargs)
-        if type(var_long_description).__name__ != "str":
-            var_msg = (
-                f"The variable `var_long_description` is not a string! It is a"
-                f" {type(var_long_description).__name__}")
-            module_logger.warning(var_msg)
         if (
-            (type(var_relevant_columns).__name__ != "str") &
-            (pd.isnull(var_relevant_columns) is False)
+            (executor == 'process') & (cloudpickle is None) &
+            (len([key for key in plan.keys() if
+                  plan.get_spec(key) is None]) > 0)
         ):
+            var_msg = ("The `cloudpickle` package is required for "
+                       "`executor='process'` unless all the checks are "
+                       "declarative")
+            module_logger.error(var_msg)
+            raise ImportError(var_msg)
+        if (executor is not None) and (self.__profile == 'memory'):
+            var_msg = ("The memory can not be profiled with an `executor`, "
+                       "use `set_profile(True, memory=False)` or no "
+                       "`executor`")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+
+        pool = None
+        # Traced once for all the checks, each check resets the peak
+        var_tracing = (
+            (self.__profile == 'memory') and not tracemalloc.is_tracing())
+        if var_tracing:
+            tracemalloc.start()
+        try:
+            if executor is not None:
+                pool = (
+                    ThreadPoolExecutor if executor == 'thread' else
+                    ProcessPoolExecutor)(max_workers=max_workers)
+            if type(tables).__name__ in ["dict", "DataFrame"]:
+                dict_tables = (
+                    tables if type(tables).__name__ == "dict" else
+                    {np.nan: tables})
+                list_tasks = [
+                    (dict_tables[table_key], plan.get_check(check_key),
+                     check_key, table_key, self.__key_separator, self.__debug,
+                     self.__profile)
+                    for table_key in dict_tables.keys()
+                    for check_key in plan.keys()
+                ]
+                for list_issues, list_profile in self.__run_tasks(
+                        list_tasks, plan, pool, executor, **kwargs):
+                    self.__log_issues(list_issues)
+                    self.__log_profile(list_profile)
+            elif hasattr(tables, '__iter__'):
+                self.__apply_checks_chunks(
+                    tables, plan, pool, executor, **kwargs)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if var_tracing:
+                tracemalloc.stop()
+            self.__issue_log.flush()
+
+        module_logger.info("Completed `apply_checks`")
+
+    def __apply_checks_chunks(self, chunks, plan, pool, executor, **kwargs):
+        """
+        Where the tables are an iterator of DataFrame chunks, for example from
+        `pd.read_csv(chunksize=...)` or `Connections.read_from_db` with a
+        `chunksize`, each check is run on each chunk and the issues are
+        combined, so only a chunk at a time needs to be in memory.
+
+        Each chunk is given an index continuing on from the last, so the
+        `issue_idx` values are row positions as they would be for the chunks
+        concatenated with `ignore_index=True`. The counts are summed and the
+        `relevant_columns` and `long_description` are from the first chunk with
+        an issue.
+
+        A check only sees the rows of one chunk, so the checks need the
+        condition of each row to be found from that row alone and the default
+        `check_condition`. Checks with `row_wise` False, such as the `unique`
+        type, or with a `check_condition` of their own are not allowed. For
+        the checks that are, using the default functions, the issues are the
+        same as for a single pass.
+        """
+        module_logger.info("Starting `__apply_checks_chunks`")
+        list_not_chunked = [
+            check_key for check_key in plan.keys() if
+            (plan.get_check(check_key)['row_wise'] is False) or
+            not _func_is_default(
+                'check_condition', plan.get_check(check_key)['check_condition'])
+        ]
+        if len(list_not_chunked) > 0:
             var_msg = (
-                f"The variable `var_relevant_columns` is not a string or null! "
-                f"It is a {type(var_relevant_columns).__name__}")
-            module_logger.warning(var_msg)
-        if "int" not in type(var_count_condition).__name__:
-            var_msg = (
-                f"The variable `var_count_condition` is not an integer! It is a"
-                f" {type(var_count_condition).__name__}")
-            module_logger.warning(var_msg)
-        if type(s_calc_condition).__name__ != "Series":
-            var_msg = (
-                f"The variable `s_calc_condition` is not a Series! It is a "
-                f"{type(s_calc_condition).__name__}")
-            module_logger.warning(var_msg)
-        if type(s_index_conditions).__name__ != "Series":
-            var_msg = (
-                f"The variable `s_index_conditions` is not a Series! It is a "
-                f"{type(s_index_conditions).__name__}")
-            module_logger.warning(var_msg)
-        if (
-            (type(var_category).__name__ != 'str') &
-            (pd.isnull(var_category) is False)
-        ):
-            var_msg = (f'The variable `category` is not a string or null! It '
-                       f'is a {type(var_category).__name__}')
-            module_logger.warning(var_msg)
-        if var_check_condition:
-            if pd.isnull(table_key):
-                var_file = np.nan
-                var_subfile = np.nan
-            else:
-                var_file = table_key.split(self.__key_separator)[0]
-                var_subfile = (table_key.split(self.__key_separator)[1] if
-                               self.__key_separator in table_key else np.nan)
-            self.error_handling(
-                var_file, var_subfile, check_key, var_long_description,
-                var_relevant_columns, var_count_condition,
-                ", ".join(
-                    [
-                        str(item) for item in
-                        s_index_conditions.loc[
-                            s_index_conditions].index.tolist()
-                    ]
-                ),
-                var_category
-            )
+                f"The checks {', '.join(list_not_chunked)} compare the rows "
+                f"of the table, as `row_wise` is False or they have a "
+                f"`check_condition`, so can not be run on chunks")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        dict_issues = dict()
+        dict_profile = dict()
+        var_offset = 0
+        var_chunks = 0
+        for df_chunk in chunks:
+            if type(df_chunk).__name__ != "DataFrame":
+                var_msg = (f"The chunks need to be DataFrames, chunk "
+                           f"{var_chunks} is a {type(df_chunk).__name__}")
+                module_logger.error(var_msg)
+                raise ValueError(var_msg)
+            # A shallow copy so the index of the chunk passed in is kept
+            df_chunk = df_chunk.copy(deep=False)
+            df_chunk.index = pd.RangeIndex(
+                var_offset, var_offset + df_chunk.shape[0])
+            list_tasks = [
+                (df_chunk, plan.get_check(check_key), check_key, np.nan,
+                 self.__key_separator, self.__debug, self.__profile)
+                for check_key in plan.keys()
+            ]
+            for check_key, (list_issues, list_profile) in zip(
+                    plan.keys(),
+                    self.__run_tasks(
+                        list_tasks, plan, pool, executor, **kwargs)):
+                for i, list_row in enumerate(list_profile):
+                    tuple_key = (check_key, i)
+                    if tuple_key not in dict_profile:
+                        dict_profile[tuple_key] = list(list_row)
+                        continue
+                    # Summed over the chunks, other than the peak memory
+                    for j in [4, 5, 6]:
+                        dict_profile[tuple_key][j] += list_row[j]
+                    dict_profile[tuple_key][8] = np.fmax(
+                        dict_profile[tuple_key][8], list_row[8])
+                for i, list_issue in list_issues:
+                    tuple_key = (check_key, i)
+                    if tuple_key not in dict_issues:
+                        dict_issues[tuple_key] = (
+                            list_issue, [list_issue[5]], [list_issue[6]])
+                    else:
+                        dict_issues[tuple_key][1].append(list_issue[5])
+                        dict_issues[tuple_key][2].append(list_issue[6])
+            var_offset += df_chunk.shape[0]
+            var_chunks += 1
         module_logger.info(
-            f"Completed evaluating check `{check_key}` for column {col}")
+            f"There were {var_chunks} chunks with {var_offset} rows")
+        for list_row in dict_profile.values():
+            var_time = list_row[5] + list_row[6]
+            list_row[7] = list_row[4] / var_time if var_time > 0 else np.nan
+            self.__log_profile([list_row])
+        for check_key in plan.keys():
+            for i in range(len(plan.get_check(check_key)['columns'])):
+                if (check_key, i) not in dict_issues:
+                    continue
+                list_issue, list_counts, list_idx = dict_issues[(check_key, i)]
+                list_issue = list(list_issue)
+                list_issue[5] = sum(list_counts)
+                list_issue[6] = np.concatenate(
+                    [np.asarray(item) for item in list_idx])
+                self.error_handling(*list_issue)
+        module_logger.info("Completed `__apply_checks_chunks`")
+
+    @staticmethod
+    def __run_tasks(list_tasks, plan, pool, executor, **kwargs):
+        """
+        Run the tasks, one for each pair of table and check, giving the issues
+        and the profile rows of each in the order of the tasks.
+        """
+        if pool is None:
+            for task in list_tasks:
+                yield _run_check(*task, **kwargs)
+            return
+        if executor == 'thread':
+            list_futures = [
+                pool.submit(_run_check, *task, **kwargs) for
+                task in list_tasks
+            ]
+        else:
+            list_futures = list()
+            for task in list_tasks:
+                tuple_spec = plan.get_spec(task[2])
+                if tuple_spec is None:
+                    list_futures.append(pool.submit(
+                        _run_check_payload,
+                        cloudpickle.dumps((task, kwargs))))
+                else:
+                    list_futures.append(pool.submit(
+                        _run_check_spec, task[0], tuple_spec[0],
+                        tuple_spec[1], *task[2:], **kwargs))
+        for future in list_futures:
+            yield future.result()
+
+    def __log_issues(self, list_issues):
+        for _, list_issue in list_issues:
+            self.error_handling(*list_issue)
 
     def get_issue_count(self, issue_number_min=None, issue_number_max=None):
         module_logger.info("Starting `get_issue_count`")
-        df = self.df_issues.copy()
-        if issue_number_min is not None:
-            df = df.loc[df["step_number"] >= issue_number_min].copy()
-        if issue_number_max is not None:
-            df = df.loc[df["step_number"] <= issue_number_max].copy()
-        var_count = df.shape[0]
+        var_count = self.__issue_log.get_issue_count(
+            issue_number_min, issue_number_max)
         module_logger.info("Completed `get_issue_count`")
         return var_count
 
     def table_look(self, table, issue_idx):
         module_logger.info("Starting `table_look`")
-        if issue_idx not in self.df_issues.index.tolist():
+        if issue_idx not in self.__issue_log:
             var_msg = (f"The requested issue index, {issue_idx}, is not "
                        f"present in the `df_issues` table")
             module_logger.error(var_msg)
@@ -339,14 +1050,9 @@ class Checks:
             var_msg = 'The `table` argument is not a DataFrame as required'
             module_logger.error(var_msg)
             raise ValueError(var_msg)
-        df_check = table.loc[
-            [
-                int(item) for item in
-                self.df_issues.loc[issue_idx, "issue_idx"].split(", ")
-            ]
-        ]
+        df_check = table.loc[self.__issue_log.get_issue_idx(issue_idx)]
         module_logger.info("Completed `table_look`")
-        return self.df_issues.loc[[issue_idx]], df_check
+        return self.__issue_log.get_issue(issue_idx), df_check
 
     @staticmethod
     def __func_summary_(key_value):
@@ -384,10 +1090,22 @@ class Checks:
         list_keys = [
             'calc_condition', 'long_description', 'check_condition', 'columns',
             'count_condition', 'index_position', 'relevant_columns', 'idx_flag',
-            'category'
+            'category', 'batch', 'row_wise'
         ]
 
         dict_checks_values = deepcopy(dict_checks)
+        for check in [key for key in dict_checks_values.keys()]:
+            dict_spec = dict_checks_values[check]
+            if "type" not in dict_spec:
+                continue
+            # Declarative checks are shown by their type and its values
+            dict_checks_values[check] = func_compile_check_spec(
+                check, dict_spec)
+            dict_checks_values[check]['calc_condition'] = ", ".join([
+                f"{key}: {dict_spec[key]}" for key in
+                ['type'] + dict_check_spec_keys[dict_spec['type']] if
+                key in dict_spec
+            ])
         for check in [key for key in dict_checks_values.keys()]:
             for key in [key for key in list_keys if
                         key not in dict_checks_values[check].keys()]:
@@ -157,6 +157,38 @@ class Connections:
                 );
                 """.format(dict_cnx['table_name'])
                 cnx.execute(var_create_table_sql)
+            if kwargs.get('sqlite_df_check_profile_create') is True:
+                var_create_table_sql = """
+                CREATE TABLE IF NOT EXISTS {} (
+                    key_1 text,
+                    key_2 text,
+                    key_3 text,
+                    file text,
+                    sub_file text,
+                    step_number integer,
+                    "check" text,
+                    column text,
+                    rows integer,
+                    calc_time real,
+                    side_time real,
+                    rows_per_sec real,
+                    peak_memory real,
+                    grouping text
+                );
+                """.format(dict_cnx['table_name'])
+                cnx.execute(var_create_table_sql)
+            if kwargs.get('sqlite_file_manifest_create') is True:
+                var_create_table_sql = """
+                CREATE TABLE IF NOT EXISTS {} (
+                    path text,
+                    size integer,
+                    mtime real,
+                    hash text,
+                    status text,
+                    updated text
+                );
+                """.format(dict_cnx['table_name'])
+                cnx.execute(var_create_table_sql)
             try:
                 pd.read_sql(
                     f"SELECT * FROM {dict_cnx['table_name']} LIMIT 0;",
@@ -180,7 +212,12 @@ class Connections:
                 cnx.close()
         module_logger.info("Completed `test_cnx`")
 
-    def read_from_db(self, cnx_key, sql_stmt):
+    def read_from_db(self, cnx_key, sql_stmt, chunksize=None):
+        """
+        Read the result of the SQL statement into a DataFrame, or with
+        `chunksize` set into an iterator of DataFrames of that many rows which
+        keeps the connection open until all the chunks are read.
+        """
         module_logger.info("Starting `read_from_db`")
         module_logger.info(f'Sql statement: {sql_stmt}')
         dict_cnx = self.__dict_cnx[cnx_key]
@@ -190,6 +227,13 @@ class Connections:
             var_msg = 'Trying to use `read_from_db` using a blank connection'
             module_logger.error(var_msg)
             raise ValueError(var_msg)
+        if chunksize is not None:
+            if ("int" not in type(chunksize).__name__) or (chunksize < 1):
+                var_msg = 'The `chunksize` argument needs to be an int above 0'
+                module_logger.error(var_msg)
+                raise ValueError(var_msg)
+            module_logger.info("Completed `read_from_db`")
+            return self.__read_from_db_chunks(dict_cnx, sql_stmt, chunksize)
         elif var_cnx_type == 'sqlite3':
             cnx = sqlite3.connect(dict_cnx['file_path'])
             try:
@@ -213,6 +257,26 @@ class Connections:
         module_logger.info("Completed `read_from_db`")
         return df
 
+    @staticmethod
+    def __read_from_db_chunks(dict_cnx, sql_stmt, chunksize):
+        var_cnx_type = dict_cnx['cnx_type']
+        if var_cnx_type == 'sqlite3':
+            cnx = sqlite3.connect(dict_cnx['file_path'])
+        else:
+            cnx = pyodbc.connect(dict_cnx['cnx_string'])
+        try:
+            for df in pd.read_sql(sql_stmt, cnx, chunksize=chunksize):
+                yield df
+        except GeneratorExit:
+            raise
+        except:
+            var_msg = (f'Reading in chunks using a `{var_cnx_type}` '
+                       f'connection has failed')
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        finally:
+            cnx.close()
+
     def write_to_db(self, cnx_key, table, batch_size=None,
                     flag_sql_logging=False):
         module_logger.info("Starting `write_to_db`")
@@ -269,7 +333,7 @@ class Connections:
             )
             module_logger.info(var_sql_template)
             s_sql_values = table.apply(
-                lambda s: s.map(
+                lambda s: s.astype(object).map(
                     lambda x: func_to_sql(x, dict_cnx['timestamp_format']))
             ).apply(
                 lambda r: f"({', '.join(r)})", axis=1)
@@ -326,8 +390,9 @@ class Connections:
                     '{}'
                 )
                 s_sql_values = table.apply(
-                    lambda s: s.map(
-                        lambda x: func_to_sql(x, dict_cnx['timestamp_format']))
+                    lambda s: s.astype(object).map(
+                        lambda x: func_to_sql(
+                            x, dict_cnx['timestamp_format']))
                 ).apply(
                     lambda r: f"({', '.join(r)})", axis=1)
                 var_iloc_min = 0
@@ -350,6 +415,15 @@ class Connections:
 
         module_logger.info("Completed `write_to_db`")
 
+    def get_table_name(self, cnx_key):
+        module_logger.info("Starting `get_table_name`")
+        if cnx_key not in self.__dict_cnx:
+            var_msg = f'The key {cnx_key} is not present'
+            module_logger.error(var_msg)
+            raise AttributeError(var_msg)
+        module_logger.info("Completed `get_table_name`")
+        return self.__dict_cnx[cnx_key].get('table_name')
+
     def get_cnx_keys(self):
         module_logger.info("Starting `get_cnx_keys`")
         module_logger.info("Completed `get_cnx_keys`")
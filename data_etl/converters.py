@@ -0,0 +1,312 @@
+# Here we are defining the built in conversions, where a conversion can be given
+# as a type rather than as functions to try in turn
+import logging
+from decimal import Decimal, InvalidOperation
+
+import pandas as pd
+import numpy as np
+
+module_logger = logging.getLogger(__name__)
+
+dict_convert_type_keys = {
+    'int': ['strip_currency'],
+    'float': ['strip_currency'],
+    'datetime': ['format', 'dayfirst'],
+    'bool': ['true_values', 'false_values']
+}
+list_convert_keys = ['columns', 'dtypes', 'type', 'coerce']
+list_currency_characters = [',', '%', '£', '$', '€', '¥']
+list_true_values = ['true', 't', 'yes', 'y', '1']
+list_false_values = ['false', 'f', 'no', 'n', '0']
+var_int64_min = np.iinfo('int64').min
+var_int64_max = np.iinfo('int64').max
+# The text values `compact_tables` reads as booleans, not 1 and 0 as those are
+# more often codes
+list_compact_true_values = ['true', 't', 'yes', 'y']
+list_compact_false_values = ['false', 'f', 'no', 'n']
+
+
+def func_check_convert_type(convert_key, dict_convert_info):
+    """
+    Check the keys of a conversion given with a `type`, the types are:
+        int - whole numbers, as int64 or as the nullable Int64 where there
+            are nulls
+        float - numbers
+        datetime - dates and times, with `format` and `dayfirst` passed to
+            `pd.to_datetime`
+        bool - with `true_values` and `false_values` as the text values, not
+            case sensitive, by default true/t/yes/y/1 and false/f/no/n/0
+
+    For int and float `strip_currency` True removes thousand separators,
+    percentage signs and currency signs first.
+    """
+    var_type = dict_convert_info['type']
+    if var_type not in dict_convert_type_keys:
+        var_msg = (f"The conversion `{convert_key}` has an unknown type "
+                   f"`{var_type}`, the types are: "
+                   f"{', '.join(dict_convert_type_keys.keys())}")
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+    if 'functions' in dict_convert_info:
+        var_msg = (f"The conversion `{convert_key}` has a `type` so should "
+                   f"not also have `functions`")
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+    list_unknown = [
+        key for key in dict_convert_info.keys() if
+        key not in list_convert_keys + dict_convert_type_keys[var_type]]
+    if len(list_unknown) > 0:
+        var_msg = (f"The conversion `{convert_key}` has keys that are not used "
+                   f"for type `{var_type}`: {', '.join(list_unknown)}")
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+
+
+def _func_strip_currency(s):
+    s_str = s.astype(str)
+    for character in list_currency_characters:
+        s_str = s_str.str.replace(character, '', regex=False)
+    return s_str.where(s.notnull())
+
+
+def func_convert_type(s, dict_convert_info):
+    """
+    Convert the Series to the `type` of the conversion in one pass, with the
+    values that can not be converted made null. Returned with a boolean Series
+    of the values that failed, being those that were not null and could not
+    be converted.
+
+    Text columns are factorized first, where less than half the values are
+    unique, so each distinct value is only converted once, as are the
+    categories of category columns.
+    """
+    var_type = dict_convert_info['type']
+    s_null = s.isnull()
+    arr_codes = None
+    s_values = s
+    if s.dtype.name == 'category':
+        arr_codes = s.cat.codes.to_numpy()
+        s_values = pd.Series(s.cat.categories)
+    elif (s.dtype.name == 'object') and (s.shape[0] > 0):
+        arr_codes, arr_uniques = pd.factorize(s)
+        if len(arr_uniques) <= s.shape[0] / 2:
+            s_values = pd.Series(arr_uniques, dtype=object)
+        else:
+            arr_codes = None
+    s_cnv = _func_convert_values(s_values, var_type, dict_convert_info)
+    if arr_codes is not None:
+        s_cnv = pd.Series(
+            s_cnv.reindex(arr_codes).values, index=s.index, name=s.name)
+    s_failed = s_cnv.isnull() & ~s_null
+    if var_type == 'int':
+        s_cnv = s_cnv.astype('int64' if s_cnv.notnull().all() else 'Int64')
+    elif var_type == 'bool':
+        s_cnv = s_cnv.astype('bool' if s_cnv.notnull().all() else 'boolean')
+    return s_cnv, s_failed
+
+
+def _func_convert_values(s, var_type, dict_convert_info):
+    s_null = s.isnull()
+    if var_type in ['int', 'float']:
+        s_use = (
+            _func_strip_currency(s) if
+            dict_convert_info.get('strip_currency', False) else s)
+        s_num = pd.to_numeric(s_use, errors='coerce')
+        if var_type == 'int':
+            s_cnv = _func_to_int(s_use, s_num)
+        else:
+            s_cnv = s_num.astype(float)
+    elif var_type == 'datetime':
+        s_cnv = pd.to_datetime(
+            s, format=dict_convert_info.get('format'),
+            dayfirst=dict_convert_info.get('dayfirst', False),
+            errors='coerce')
+    else:
+        list_true = [
+            str(value).lower() for value in
+            dict_convert_info.get('true_values', list_true_values)]
+        list_false = [
+            str(value).lower() for value in
+            dict_convert_info.get('false_values', list_false_values)]
+        s_str = s.astype(str).str.strip().str.lower()
+        s_cnv = pd.Series(np.nan, index=s.index, dtype=object)
+        s_cnv.loc[s_str.isin(list_true).values & ~s_null.values] = True
+        s_cnv.loc[s_str.isin(list_false).values & ~s_null.values] = False
+    return s_cnv
+
+
+def _func_exact_int(value):
+    try:
+        dec_value = Decimal(str(value).strip())
+    except InvalidOperation:
+        return None
+    if (not dec_value.is_finite()) or (
+            dec_value != dec_value.to_integral_value()):
+        return None
+    var_int = int(dec_value)
+    if (var_int < var_int64_min) or (var_int > var_int64_max):
+        return None
+    return var_int
+
+
+def _func_to_int(s, s_num):
+    """
+    The whole numbers of `s` as the nullable Int64, from the values of
+    `pd.to_numeric`, without going through float for the values too large
+    for a float to hold exactly, which are read from the text instead.
+    """
+    if s_num.dtype.kind in 'ib':
+        return s_num.astype('Int64')
+    s_float = s_num.astype(float)
+    s_exact = (s_float % 1 == 0) & (s_float.abs() < 2 ** 53)
+    s_int = pd.Series(pd.NA, index=s.index, dtype='Int64')
+    s_int[s_exact.values] = s_float[s_exact.values].astype('int64').values
+    s_large = (s_float.abs() >= 2 ** 53) & s_float.notnull()
+    if s_large.any():
+        s_int[s_large.values] = pd.array(
+            [_func_exact_int(value) for value in s[s_large.values]],
+            dtype='Int64')
+    return s_int
+
+
+def func_by_unique(function):
+    """
+    Wrap a conversion or cleaning function, taking `df`, `col` and
+    `**kwargs` and returning a Series, so it is only run on the distinct
+    values of the column and the results are mapped back to each row. For
+    columns of repeated values, such as dates or category codes, this is far
+    fewer values to convert. Null values are left null.
+
+    For example in `dict_convert`:
+        'functions': {1: func_by_unique(
+            lambda df, col, **kwargs: func_string_format(df, col))}
+    """
+    def function_by_unique(df, col, **kwargs):
+        arr_codes, arr_uniques = pd.factorize(df[col])
+        df_unique = pd.DataFrame({col: arr_uniques})
+        s_unique = pd.Series(
+            np.asarray(function(df_unique, col, **kwargs)))
+        return pd.Series(
+            s_unique.reindex(arr_codes).values, index=df.index, name=col)
+    return function_by_unique
+
+
+def func_dtype_names(s):
+    """
+    The dtype names the `dtypes` of a conversion are looked for in, being the
+    name of the dtype of the Series and, for the dtypes `compact_tables`
+    gives, the name it would have had, so int8 is also int64 and a category
+    column is also the dtype of its categories.
+    """
+    var_name = s.dtype.name
+    list_names = [var_name]
+    if var_name == 'category':
+        list_names.append(s.cat.categories.dtype.name)
+    elif var_name == 'string':
+        list_names.append('object')
+    elif var_name in ['int8', 'int16', 'int32']:
+        list_names.append('int64')
+    elif var_name in ['Int8', 'Int16', 'Int32']:
+        list_names.append('Int64')
+    elif var_name == 'float32':
+        list_names.append('float64')
+    return list_names
+
+
+def _func_has_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        return False
+    return True
+
+
+def func_compact_series(s, category_ratio=0.5):
+    """
+    The Series in the dtype that takes the least memory without changing the
+    values:
+        int64 and Int64 - the smallest int dtype that holds the values
+        float64 - float32 where every value is the same as a float32
+        object - bool, or boolean where there are nulls, where the text
+            values are all true/t/yes/y or false/f/no/n, not case sensitive,
+            otherwise category where no more than `category_ratio` of the
+            values are distinct, otherwise `string[pyarrow]` where the
+            `pyarrow` package is installed
+
+    Other dtypes, and object columns that are not all text, are left as they
+    are.
+    """
+    var_name = s.dtype.name
+    if var_name in ['int64', 'Int64']:
+        return pd.to_numeric(s, downcast='integer')
+    if var_name == 'float64':
+        s_32 = s.astype('float32')
+        if (
+            (s_32.astype('float64') == s) | (s_32.isnull() & s.isnull())
+        ).all():
+            return s_32
+        return s
+    if (var_name != 'object') or (s.shape[0] == 0):
+        return s
+    var_inferred = pd.api.types.infer_dtype(s, skipna=True)
+    if var_inferred == 'boolean':
+        return s.astype('bool' if s.notnull().all() else 'boolean')
+    if var_inferred != 'string':
+        return s
+    arr_codes, arr_uniques = pd.factorize(s)
+    s_lower = pd.Series(arr_uniques, dtype=object).str.strip().str.lower()
+    if s_lower.isin(
+            list_compact_true_values + list_compact_false_values).all():
+        s_bool = pd.Series(
+            s_lower.isin(list_compact_true_values).to_numpy(), dtype=object)
+        s_out = pd.Series(
+            s_bool.reindex(arr_codes).values, index=s.index, name=s.name)
+        return s_out.astype(
+            'bool' if s_out.notnull().all() else 'boolean')
+    if len(arr_uniques) <= category_ratio * s.shape[0]:
+        return pd.Series(
+            pd.Categorical.from_codes(arr_codes, arr_uniques),
+            index=s.index, name=s.name)
+    if _func_has_pyarrow():
+        return s.astype('string[pyarrow]')
+    return s
+
+
+def func_common_dtype(list_dtypes, missing=False):
+    """
+    The dtype the columns of `list_dtypes` can all be put in without changing
+    their values, for putting tables together, with `missing` True where the
+    column is not in every table so needs to hold nulls.
+
+    Category columns keep all their categories, numpy numbers go to the
+    number dtype that holds all of them, and ints that need nulls to the
+    nullable int dtype of the same size, such as Int64, so large values are
+    not changed by going through float64. Otherwise where the dtypes are not
+    the same the column is object, as it is for int64 and uint64 together.
+    """
+    if all([dtype.name == 'category' for dtype in list_dtypes]):
+        list_categories = list()
+        for dtype in list_dtypes:
+            list_categories += [
+                value for value in dtype.categories if
+                value not in list_categories]
+        return pd.CategoricalDtype(list_categories)
+    if all([dtype == list_dtypes[0] for dtype in list_dtypes]):
+        dtype = list_dtypes[0]
+    elif all([
+        isinstance(dtype, np.dtype) and (dtype.kind in 'iuf')
+        for dtype in list_dtypes
+    ]):
+        dtype = np.result_type(*list_dtypes)
+        if (dtype.kind == 'f') and all(
+                [dtype_item.kind in 'iu' for dtype_item in list_dtypes]):
+            return np.dtype('O')
+    else:
+        return np.dtype('O')
+    if missing and isinstance(dtype, np.dtype):
+        if dtype.kind in 'iu':
+            return pd.api.types.pandas_dtype(
+                dtype.name.replace('uint', 'UInt').replace('int', 'Int'))
+        if dtype.kind == 'b':
+            return np.dtype('O')
+    return dtype
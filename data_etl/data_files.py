@@ -1,30 +1,361 @@
 # Here we are defining a class that will deal with all the data storage and
 # manipulations
 import logging
+import os
+import re
+import json
+import hashlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 import pandas as pd
 import numpy as np
+try:
+    import cloudpickle
+except ImportError:
+    cloudpickle = None
 
 from data_etl.general_functions import import_attr
+from data_etl.issue_log import IssueLog, func_issue_idx
+from data_etl.file_cache import func_check_table_format, func_write_table, \
+    func_read_table, func_pyarrow_installed
+from data_etl.converters import func_check_convert_type, \
+    func_convert_type, func_dtype_names, func_compact_series, \
+    func_common_dtype
 
 module_logger = logging.getLogger(__name__)
 
 
+def _file_hash(file, block_size=2 ** 20):
+    file_hash = hashlib.sha1()
+    with open(file, 'rb') as file_open:
+        for block in iter(lambda: file_open.read(block_size), b''):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def _read_file(function, file, **kwargs):
+    """
+    Read in a single file with a per file reading in function, any error is
+    returned as a message rather than raised so the other files are still read
+    in.
+    """
+    module_logger.info(f"Starting reading in the file {file}")
+    try:
+        dfs = function(file, **kwargs)
+    except Exception as error:
+        return None, f"{type(error).__name__}: {error}"
+    if type(dfs).__name__ != "dict":
+        return None, (f"The reading in function returned a "
+                      f"{type(dfs).__name__} rather than a dictionary")
+    module_logger.info(f"Completed reading in the file {file}")
+    return dfs, None
+
+
+def _read_file_payload(payload):
+    """
+    Used by the process pool, the arguments of `_read_file` are passed
+    serialised with `cloudpickle` so functions from the reading in scripts can
+    be sent.
+    """
+    args, kwargs = cloudpickle.loads(payload)
+    return _read_file(*args, **kwargs)
+
+
+def _split_dict_key(dict_key, key_separator):
+    """
+    The file and sub file of a dictionary key, as logged with the issues.
+    """
+    if pd.isnull(dict_key):
+        return np.nan, np.nan
+    return (
+        dict_key.split(key_separator)[0],
+        (dict_key.split(key_separator)[1] if key_separator in dict_key else
+         np.nan))
+
+
+def _convert_col_type(df, col, dict_convert_info, convert_key, dict_key,
+                      key_separator, func_issue):
+    """
+    Convert the column with the built in conversion of the `type`, the
+    values that fail are found in the same pass and logged with their
+    count and index. The column is left as it was if any fail, unless
+    `coerce` is True in which case the failed values are made null.
+    """
+    s, s_failed = func_convert_type(df[col], dict_convert_info)
+    var_issue_count = int(s_failed.sum())
+    if (var_issue_count == 0) or dict_convert_info.get('coerce', False):
+        df[col] = s
+    if var_issue_count > 0:
+        var_msg = (f"The conversion for column {col} for "
+                   f"convert_key {convert_key} failed.")
+        module_logger.error(var_msg)
+        func_issue(
+            *_split_dict_key(dict_key, key_separator),
+            "",
+            f"The conversion failed to format {convert_key}",
+            col,
+            var_issue_count,
+            func_issue_idx(s_failed)
+        )
+
+
+def _convert_col(df, dict_convert, dict_key, key_separator, copy,
+                 func_issue, **kwargs):
+    """
+    Make the conversions of `convert_columns` to the one table, with each
+    converted column copied where `copy` is True. The issues found are
+    passed to `func_issue` with the arguments of
+    `DataCuration.error_handling`.
+    """
+    module_logger.info("Starting `_convert_col`")
+    for convert_key in dict_convert.keys():
+        cols = dict_convert[convert_key]["columns"]
+        if type(cols).__name__ == 'function':
+            cols = cols(df, **kwargs)
+        list_cols = list(cols)
+        list_stops = dict_convert[convert_key]["dtypes"]
+        if "type" in dict_convert[convert_key]:
+            func_check_convert_type(
+                convert_key, dict_convert[convert_key])
+            dict_functions = None
+        else:
+            dict_functions = dict_convert[convert_key]["functions"]
+        for col in list_cols:
+            if col not in df.columns.tolist():
+                var_msg = f"The column {col} is not present"
+                module_logger.error(var_msg)
+                raise ValueError(var_msg)
+            dtype_flag = 0
+            list_dtypes = func_dtype_names(df[col])
+            for dtype in list_stops:
+                if any([dtype in var_dtype for var_dtype in list_dtypes]):
+                    dtype_flag = 1
+                    break
+            if dtype_flag == 1:
+                continue
+            if dict_functions is None:
+                _convert_col_type(
+                    df, col, dict_convert[convert_key], convert_key,
+                    dict_key, key_separator, func_issue)
+                continue
+            converted_flag = 0
+            for key in dict_functions.keys():
+                func_use = dict_functions[key]
+                if type(func_use).__name__ != "function":
+                    var_msg = (f"The function for converting is not a "
+                               f"function! For keys {convert_key}, {key}")
+                    module_logger.error(var_msg)
+                    raise ValueError(var_msg)
+                try:
+                    s = func_use(df, col, **kwargs)
+                    df[col] = s.copy() if copy else s
+                    converted_flag = 1
+                    break
+                except:
+                    var_msg = (f"The conversion failed for keys "
+                               f"{convert_key}, {key}, trying next")
+                    module_logger.warning(var_msg)
+                    continue
+            if converted_flag == 0:
+                var_idx = np.nan
+                var_issue_count = np.nan
+                if "idx_function" in dict_convert[convert_key]:
+                    func_idx = dict_convert[convert_key]['idx_function']
+                    if type(func_idx).__name__ != 'function':
+                        var_msg = (
+                            f'The `idx_function` argument is not a function'
+                            f' it is a {type(func_idx).__name__}')
+                        module_logger.error(var_msg)
+                        raise ValueError(var_msg)
+                    s_idx = func_idx(df, col, **kwargs)
+                    var_idx = func_issue_idx(s_idx)
+                    var_issue_count = s_idx.sum()
+                var_msg = (f"The conversion for column {col} for "
+                           f"convert_key {convert_key} failed.")
+                module_logger.error(var_msg)
+                func_issue(
+                    *_split_dict_key(dict_key, key_separator),
+                    "",
+                    f"The conversion failed to format {convert_key}",
+                    col,
+                    var_issue_count,
+                    var_idx
+                )
+
+    module_logger.info("Completed `_convert_col`")
+    return df
+
+
+def _alter_cols(df, dict_alter, keys, dict_key, key_separator, func_issue,
+                **kwargs):
+    """
+    Make the alterations of `alter_tables` to the one table, the issues
+    found are passed to `func_issue` with the arguments of
+    `DataCuration.error_handling`.
+    """
+    module_logger.info("Starting `_alter_cols`")
+    var_file, var_subfile = _split_dict_key(dict_key, key_separator)
+    for alter_key in dict_alter.keys():
+        var_type = dict_alter[alter_key]["type"]
+        function = dict_alter[alter_key]["function"]
+        if var_type == "new_col":
+            var_col_name = dict_alter[alter_key]["col_name"]
+            if var_col_name in df.columns.tolist():
+                var_msg = (
+                    f"The column {var_col_name} is present in the "
+                    f"table so should not be overwritten")
+                module_logger.error(var_msg)
+                func_issue(var_file, var_subfile, "", var_msg,
+                           var_col_name, np.nan, np.nan)
+                continue
+            try:
+                s = function(df, keys, **kwargs)
+                df[var_col_name] = s
+            except KeyError:
+                var_msg = (
+                    f"For type new_col the function for alter_key "
+                    f"{alter_key} has not worked with a KeyError")
+                module_logger.error(var_msg)
+                func_issue(var_file, var_subfile, "", var_msg,
+                           var_col_name, np.nan, np.nan)
+                continue
+            except:
+                var_msg = (f"For type new_col the function for "
+                           f"alter_key {alter_key} has not worked")
+                module_logger.error(var_msg)
+
+                var_idx = np.nan
+                var_issue_count = np.nan
+                if "idx_function" in dict_alter[alter_key]:
+                    func_idx = dict_alter[alter_key]['idx_function']
+                    if type(func_idx).__name__ != 'function':
+                        var_msg = ''
+                        module_logger.error(var_msg)
+                    s_idx = func_idx(df, keys, **kwargs)
+                    var_idx = func_issue_idx(s_idx)
+                    var_issue_count = s_idx.sum()
+                func_issue(var_file, var_subfile, "", var_msg,
+                           var_col_name, var_issue_count, var_idx)
+                continue
+        elif var_type == "map_df":
+            try:
+                df = function(df, keys, **kwargs)
+            except:
+                var_msg = (f"For type map_df the function for "
+                           f"alter_key {alter_key} has not worked")
+                module_logger.error(var_msg)
+
+                var_idx = np.nan
+                var_issue_count = np.nan
+                if "idx_function" in dict_alter[alter_key]:
+                    func_idx = dict_alter[alter_key]['idx_function']
+                    if type(func_idx).__name__ != 'function':
+                        var_msg = ''
+                        module_logger.error(var_msg)
+                    s_idx = func_idx(df, keys, **kwargs)
+                    var_idx = func_issue_idx(s_idx)
+                    var_issue_count = s_idx.sum()
+                func_issue(var_file, var_subfile, "", var_msg,
+                           np.nan, var_issue_count, var_idx)
+                continue
+
+    module_logger.info("Completed `_alter_cols`")
+    return df
+
+
+def _run_table_step(step, df, dictionary, dict_key, key_separator, keys,
+                    copy, **kwargs):
+    """
+    Run `convert_columns` or `alter_tables` on the one table in a pool
+    worker, the issues are kept rather than logged and returned with the
+    table, to be logged in order by `DataCuration.error_handling`.
+    """
+    list_issues = list()
+
+    def func_issue(*args):
+        list_issues.append(args)
+
+    df_use = df.copy() if copy else df
+    if step == 'convert_columns':
+        df_new = _convert_col(
+            df_use, dictionary, dict_key, key_separator, copy, func_issue,
+            **kwargs)
+    else:
+        df_new = _alter_cols(
+            df_use, dictionary, keys, dict_key, key_separator, func_issue,
+            **kwargs)
+    return df_new, list_issues
+
+
+def _run_table_step_payload(payload):
+    """
+    Used by the process pool of `convert_columns` and `alter_tables`, the
+    arguments of `_run_table_step` are passed serialised with `cloudpickle`
+    so the functions of the dictionary can be sent.
+    """
+    args, kwargs = cloudpickle.loads(payload)
+    return _run_table_step(*args, **kwargs)
+
+
+def _normalise_header(value):
+    """
+    The header made lower case, with the whitespace removed from either end
+    and any run of whitespace within it made a single space.
+    """
+    if pd.isnull(value):
+        return ""
+    return " ".join(str(value).split()).lower()
+
+
+def _header_index(headers):
+    """
+    Dictionaries from the tuple of the expected headers of each header set,
+    as they are and normalised, to the header set key, the first header set
+    is kept where the expected headers are the same.
+    """
+    dict_exact = dict()
+    dict_normalised = dict()
+    for header_set in [key for key in headers.keys() if key != 'ideal_headers']:
+        list_expected = headers[header_set]['expected_headers']
+        dict_exact.setdefault(tuple(list_expected), header_set)
+        dict_normalised.setdefault(
+            tuple([_normalise_header(value) for value in list_expected]),
+            header_set)
+    return dict_exact, dict_normalised
+
+
+def _header_fingerprint(df):
+    """
+    The values of the first row of the table, which are compared to the
+    expected headers.
+    """
+    if df.shape[0] == 0:
+        return tuple()
+    return tuple(df.iloc[0].tolist())
+
+
 class DataCuration:
     __step_no = 0
-    df_issues = None
+    __issue_log = None
     headers = None
     __key_1 = None
     __key_2 = None
     __key_3 = None
     __grouping = None
-    tables = None
+    __tables = None
     formed_tables = None
     list_files = None
     __key_separator = " -:- "
     __link_headers = None
-
-    def __init__(self, grouping, key_1, key_2=None, key_3=None):
+    __file_manifest = None
+    __lazy = False
+    __list_plan = None
+    __executing = False
+    __inplace = False
+
+    def __init__(self, grouping, key_1, key_2=None, key_3=None,
+                 issue_log=None, issue_sink=None):
         """
         All data actions are taken on all tables, the aim is to process data to
         end up with a uniform data set that can be utilised and is consistent.
@@ -32,6 +363,10 @@ class DataCuration:
         The three arguments are individual identifiers for the data.
 
         The end form would be a pipeline that has regular data ingests.
+
+        An `IssueLog` object can be passed as `issue_log` to share one set of
+        issues with a `Checks` object, and an `IssueSink` as `issue_sink` to
+        write the issues out as they are logged.
         """
         module_logger.info("Initialising `DataCuration` object")
         # Three keys, all good things come in threes
@@ -40,15 +375,9 @@ class DataCuration:
         self.__key_3 = str(key_3)
         self.__grouping = grouping
         # sub_file, e.g. sheet for a spreadsheet, may not always be applicable
-        df_issues = pd.DataFrame(
-            columns=[
-                "key_1", "key_2", "key_3", "file", "sub_file", "step_number",
-                "category", "issue_short_desc", "issue_long_desc", "column",
-                "issue_count", "issue_idx", "grouping"
-            ]
-        )
-        df_issues["step_number"] = df_issues["step_number"].astype(int)
-        self.df_issues = df_issues
+        self.__set_issue_log(issue_log)
+        if issue_sink is not None:
+            self.set_issue_sink(issue_sink)
         self.tables = dict()
         self.formed_tables = dict()
         self.list_files = list()
@@ -63,20 +392,245 @@ class DataCuration:
         hopefully make the code briefer.
         """
         module_logger.info("Logging an error with `error_handling`")
-        df = self.df_issues.copy()
         list_vals = [
             self.__key_1, self.__key_2, self.__key_3, file, subfile,
             self.__step_no, category, issue_short_desc, issue_long_desc, column,
             issue_count, issue_idx, self.__grouping
         ]
+        self.__issue_log.append(list_vals)
+        module_logger.info(f"Error logged: {list_vals}")
+
+    def __set_issue_log(self, issue_log):
+        if issue_log is None:
+            issue_log = IssueLog()
+        elif type(issue_log).__name__ != "IssueLog":
+            var_msg = "The `issue_log` argument is not an `IssueLog` object"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        self.__issue_log = issue_log
+
+    @property
+    def df_issues(self):
+        """
+        The issues logged so far, formed into a table when requested. In lazy
+        mode any steps recorded are run first.
+        """
+        if self.__list_plan and not self.__executing:
+            self.collect()
+        return self.__issue_log.get_table()
+
+    @df_issues.setter
+    def df_issues(self, df_issues):
+        if self.__list_plan and not self.__executing:
+            self.collect()
+        self.__issue_log.set_table(df_issues)
+
+    def get_issue_log(self):
+        module_logger.info("Starting `get_issue_log`")
+        if self.__list_plan and not self.__executing:
+            self.collect()
+        module_logger.info("Completed `get_issue_log`")
+        return self.__issue_log
+
+    def set_issue_sink(self, issue_sink):
+        """
+        Set an `IssueSink` so the issues are written to the table of a
+        `Connections` key in batches while the steps run.
+        """
+        module_logger.info("Starting `set_issue_sink`")
+        self.__issue_log.set_sink(issue_sink)
+        module_logger.info("Completed `set_issue_sink`")
+
+    def flush_issues(self):
+        """
+        Write any issues still held in memory to the `IssueSink`, this is done
+        at the end of each step that logs issues. In lazy mode any steps
+        recorded are run first.
+        """
+        module_logger.info("Starting `flush_issues`")
+        if self.__list_plan and not self.__executing:
+            self.collect()
+        self.__issue_log.flush()
+        module_logger.info("Completed `flush_issues`")
+
+    @property
+    def tables(self):
+        """
+        The tables, in lazy mode any steps recorded are run first.
+        """
+        if self.__list_plan and not self.__executing:
+            self.collect()
+        return self.__tables
+
+    @tables.setter
+    def tables(self, tables):
+        if self.__list_plan and not self.__executing:
+            self.collect()
+        self.__tables = tables
+
+    def set_lazy(self, lazy):
+        """
+        With `lazy` True the steps `assert_nulls`, `convert_columns`,
+        `alter_tables` and `set_headers` are recorded rather than run, along
+        with the step number they are called at, and run by `collect` or when
+        the `tables` or the issues are next used.
+
+        The steps are then run one table at a time, with each table copied
+        once rather than for every step, and adjacent `assert_nulls` steps
+        done as one. As `set_headers` works across the tables the steps
+        either side of it are run separately.
+        """
+        module_logger.info("Starting `set_lazy`")
+        if lazy not in [True, False]:
+            var_msg = "The value of `lazy` needs to be True or False"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if (lazy is False) and self.__list_plan:
+            self.collect()
+        self.__lazy = lazy
+        module_logger.info(f"Completed `set_lazy`, lazy is {self.__lazy}")
+
+    def set_inplace(self, inplace):
+        """
+        With `inplace` True the steps change the tables in place rather than
+        copying each table, and each converted column, before changing it, so
+        the peak memory is close to the size of the tables. The tables passed
+        in with `set_table` are then changed too, use `snapshot` to keep a copy
+        of the tables as they are.
+
+        This can be used along with the copy on write mode of pandas,
+        `pd.set_option('mode.copy_on_write', True)`, which makes the copies
+        that are left lazy.
+        """
+        module_logger.info("Starting `set_inplace`")
+        if inplace not in [True, False]:
+            var_msg = "The value of `inplace` needs to be True or False"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        self.__inplace = inplace
+        module_logger.info(
+            f"Completed `set_inplace`, inplace is {self.__inplace}")
+
+    def snapshot(self):
+        """
+        A deep copy of the tables.
+        """
+        module_logger.info("Starting `snapshot`")
+        if type(self.tables).__name__ == "dict":
+            tables = {key: df.copy() for key, df in self.tables.items()}
+        else:
+            tables = self.tables.copy()
+        module_logger.info("Completed `snapshot`")
+        return tables
+
+    def __copy(self, df):
+        return df if self.__inplace else df.copy()
+
+    def __record_step(self, step, **kwargs):
+        if self.__list_plan is None:
+            self.__list_plan = list()
+        self.__list_plan.append((step, self.__step_no, kwargs))
+        module_logger.info(
+            f"Recorded the step `{step}` at step number {self.__step_no}")
+
+    def get_plan(self):
+        """
+        The steps recorded in lazy mode and not yet run, as tuples of the
+        step, the step number and the arguments.
+        """
+        module_logger.info("Starting `get_plan`")
+        module_logger.info("Completed `get_plan`")
+        return list(self.__list_plan or list())
+
+    def collect(self):
+        """
+        Run the steps recorded in lazy mode.
+
+        The steps are removed from the plan once they have run, so where a
+        step fails it and the steps after it are kept to be run again.
+        """
+        module_logger.info("Starting `collect`")
+        list_plan = list(self.__list_plan or list())
+        var_step_no = self.__step_no
+        var_done = 0
+        self.__executing = True
         try:
-            df.loc[df.shape[0]] = list_vals
-            self.df_issues = df.copy()
-        except:
-            var_msg = f"Logging the issue failed for values: {list_vals}"
+            list_segment = list()
+            for i, (step, step_no, dict_kwargs) in enumerate(
+                    list_plan + [(None, None, None)]):
+                if step in ['assert_nulls', 'convert_columns', 'alter_tables']:
+                    if (
+                        (step == 'assert_nulls') and
+                        (len(list_segment) > 0) and
+                        (list_segment[-1][0] == 'assert_nulls') and
+                        (list_segment[-1][2]['list_exclude_cols'] ==
+                         dict_kwargs['list_exclude_cols'])
+                    ):
+                        # Fuse adjacent `assert_nulls` into one replace
+                        list_segment[-1][2]['list_nulls'] = (
+                            list_segment[-1][2]['list_nulls'] + [
+                                null for null in dict_kwargs['list_nulls'] if
+                                null not in list_segment[-1][2]['list_nulls']
+                            ])
+                    else:
+                        list_segment.append(
+                            (step, step_no, dict(dict_kwargs)))
+                    continue
+                if len(list_segment) > 0:
+                    self.__run_segment(list_segment)
+                    list_segment = list()
+                    var_done = i
+                if step == 'set_headers':
+                    self.__step_no = step_no
+                    self.set_headers(**dict_kwargs)
+                    var_done = i + 1
+        finally:
+            self.__list_plan = list_plan[var_done:]
+            self.__executing = False
+            self.__step_no = var_step_no
+            self.__issue_log.flush()
+        module_logger.info(
+            f"Completed `collect`, {len(list_plan)} steps were run")
+
+    def __run_segment(self, list_segment):
+        """
+        Run the steps one table at a time, copying each table once.
+        """
+        module_logger.info(
+            f"Starting `__run_segment` for steps "
+            f"{', '.join([step for step, _, _ in list_segment])}")
+        if type(self.__tables).__name__ == "DataFrame":
+            dict_tables = {None: self.__tables}
+        elif type(self.__tables).__name__ == "dict":
+            dict_tables = dict(self.__tables)
+        else:
+            var_msg = ("The tables are in neither a DataFrame or "
+                       "dictionary format, which means something is "
+                       "seriously wrong...")
             module_logger.error(var_msg)
             raise ValueError(var_msg)
-        module_logger.info(f"Error logged: {list_vals}")
+        for key in dict_tables.keys():
+            df = self.__copy(dict_tables[key])
+            for step, step_no, dict_kwargs in list_segment:
+                self.__step_no = step_no
+                if step == 'assert_nulls':
+                    df = self.__assert_nulls_table(
+                        df, dict_kwargs['list_nulls'],
+                        dict_kwargs['list_exclude_cols'], True)
+                elif step == 'convert_columns':
+                    df = self.__convert_col(
+                        df, dict_kwargs['dict_convert'],
+                        "" if key is None else key, **dict_kwargs['kwargs'])
+                else:
+                    df = self.__alter_cols(
+                        df, dict_kwargs['dict_alter'],
+                        [self.__key_1, self.__key_2, self.__key_3],
+                        np.nan if key is None else key,
+                        **dict_kwargs['kwargs'])
+            dict_tables[key] = df
+        self.__tables = (
+            dict_tables[None] if None in dict_tables else dict_tables)
+        module_logger.info("Completed `__run_segment`")
 
     def set_step_no(self, step_no):
         """
@@ -159,13 +713,17 @@ class DataCuration:
 
     def find_files(self, path=None, script_name=None,
                    func_name="list_the_files", function=None, files_path='.',
-                   append=False, **kwargs):
+                   append=False, incremental=False, **kwargs):
         """
         Using an externally defined function, as specified in the module
         argument script, acquire a list of files to be read in.
 
         In the case that we want to accumulate a list of files from different
         main paths there is an append option.
+
+        With `incremental` True only the files that are new or changed since
+        they were last marked as processed in the manifest, see
+        `set_file_manifest`, are kept.
         """
         module_logger.info("Starting `find_files`")
         # TODO move this to an internal function as it's used so often!
@@ -182,6 +740,12 @@ class DataCuration:
             module_logger.error(var_msg)
             raise ValueError(var_msg)
         list_files = function(files_path, **kwargs)
+        if incremental is True:
+            list_files = self.__filter_processed_files(list_files)
+        elif incremental is not False:
+            var_msg = "The value of `incremental` needs to be True or False"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
         # TODO move these to be calls on the self.set_file_list function instead
         #  of setting the value here
         if append:
@@ -191,13 +755,128 @@ class DataCuration:
         module_logger.info(
             f"Completed `find_files`, the list of files is: {self.list_files}")
 
+    def set_file_manifest(self, cnxs, cnx_key):
+        """
+        Set the `Connections` key of the table that records the files found,
+        with their size, modified time, content hash and status, so
+        `find_files(incremental=True)` can leave out the files already
+        processed. For a sqlite3 connection the table can be created with the
+        argument `sqlite_file_manifest_create=True` of `Connections.add_cnx`.
+        """
+        module_logger.info("Starting `set_file_manifest`")
+        if type(cnxs).__name__ != "Connections":
+            var_msg = "The `cnxs` argument is not a `Connections` object"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if cnx_key not in cnxs.get_cnx_keys():
+            var_msg = f"The cnx key {cnx_key} is not present in `cnxs`"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        self.__file_manifest = (cnxs, cnx_key)
+        module_logger.info("Completed `set_file_manifest`")
+
+    def __get_file_manifest(self):
+        if self.__file_manifest is None:
+            var_msg = ("There is no file manifest set, it needs to be set "
+                       "with `set_file_manifest`")
+            module_logger.error(var_msg)
+            raise AttributeError(var_msg)
+        cnxs, cnx_key = self.__file_manifest
+        return cnxs.read_from_db(
+            cnx_key,
+            f"SELECT path, size, mtime, hash, status, updated FROM "
+            f"{cnxs.get_table_name(cnx_key)}"
+        )
+
+    def __filter_processed_files(self, list_files):
+        """
+        Keep the files not in the manifest as processed, where the size and
+        modified time have changed the content hash is compared so files that
+        have only been touched are still left out.
+        """
+        module_logger.info("Starting `__filter_processed_files`")
+        df_manifest = self.__get_file_manifest()
+        df_manifest = df_manifest.loc[
+            df_manifest['status'] == 'processed'
+        ].sort_values('updated', kind='mergesort').drop_duplicates(
+            'path', keep='last').set_index('path')
+        list_new_files = list()
+        for file in list_files:
+            var_path = os.path.abspath(file)
+            if var_path not in df_manifest.index:
+                list_new_files.append(file)
+                continue
+            var_stat = os.stat(file)
+            if (
+                (var_stat.st_size == df_manifest.loc[var_path, 'size']) &
+                (var_stat.st_mtime == df_manifest.loc[var_path, 'mtime'])
+            ):
+                continue
+            if _file_hash(file) != df_manifest.loc[var_path, 'hash']:
+                list_new_files.append(file)
+        module_logger.info(
+            f"Completed `__filter_processed_files`, {len(list_new_files)} of "
+            f"{len(list_files)} files are new or changed")
+        return list_new_files
+
+    def set_file_status(self, status, list_files=None):
+        """
+        Record the files, by default the current list of files, in the file
+        manifest with the status, 'processed' being the status used by
+        `find_files(incremental=True)`.
+        """
+        module_logger.info("Starting `set_file_status`")
+        if self.__file_manifest is None:
+            var_msg = ("There is no file manifest set, it needs to be set "
+                       "with `set_file_manifest`")
+            module_logger.error(var_msg)
+            raise AttributeError(var_msg)
+        if type(status).__name__ != "str":
+            var_msg = "The `status` argument needs to be a string"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if list_files is None:
+            list_files = self.list_files
+        var_updated = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+        list_rows = list()
+        for file in list_files:
+            var_stat = os.stat(file)
+            list_rows.append([
+                os.path.abspath(file), var_stat.st_size, var_stat.st_mtime,
+                _file_hash(file), status, var_updated
+            ])
+        if len(list_rows) > 0:
+            cnxs, cnx_key = self.__file_manifest
+            cnxs.write_to_db(
+                cnx_key,
+                pd.DataFrame(
+                    list_rows,
+                    columns=['path', 'size', 'mtime', 'hash', 'status',
+                             'updated']
+                )
+            )
+        module_logger.info("Completed `set_file_status`")
+
     def reading_in(self, path=None, script_name=None, func_name="read_files",
-                   function=None, overwrite=True, **kwargs):
+                   function=None, overwrite=True, per_file=False,
+                   executor=None, max_workers=None, cache=None, **kwargs):
         """
         Using an externally defined reading in function, and the internally
         defined list of files, read in each of the tables required.
 
         `path` being the relative script file path
+
+        With `per_file` True the function is given a single file at a time and
+        returns a dictionary of the tables in it, keyed as `file -:- sheet`.
+        The files can then be read in a pool of `max_workers` with `executor`
+        as 'thread' or 'process', a process pool needs the `cloudpickle`
+        package. The tables are added in the order of the list of files
+        whichever finishes first, and a file that fails to be read in is
+        logged with `error_handling` rather than stopping the others.
+
+        A `FileCache` can be given as `cache`, with `per_file` True, so the
+        files that have not changed since they were last read in with the
+        same function are loaded from the cache rather than parsed again.
         """
         module_logger.info("Starting `reading_in`")
         if type(self.tables).__name__ != "dict":
@@ -219,19 +898,50 @@ class DataCuration:
                        "needs to be too.")
             module_logger.error(var_msg)
             raise ValueError(var_msg)
-
-        try:
-            dfs = function(self.list_files, **kwargs)
-        except AttributeError:
-            if len([x for x in kwargs.keys()]) > 0:
-                var_msg = (f"Function reading_in, kwargs may have been passed "
-                           f"when the function {func_name} in the script "
-                           f"{script_name} does not take kwargs")
-            else:
-                var_msg = (f"Function reading in: The {func_name} function "
-                           f"does not exist in the {script_name} script.")
+        if per_file not in [True, False]:
+            var_msg = "The value of `per_file` needs to be True or False"
             module_logger.error(var_msg)
-            raise AttributeError(var_msg)
+            raise ValueError(var_msg)
+        if executor not in [None, 'thread', 'process']:
+            var_msg = ("The `executor` argument only takes values None, "
+                       "`thread`, `process`")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if (executor is not None) & (per_file is False):
+            var_msg = "The `executor` argument requires `per_file=True`"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if (cache is not None) & (per_file is False):
+            var_msg = "The `cache` argument requires `per_file=True`"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if (cache is not None) and (type(cache).__name__ != "FileCache"):
+            var_msg = "The `cache` argument is not a `FileCache` object"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if (executor == 'process') & (cloudpickle is None):
+            var_msg = ("The `cloudpickle` package is required for "
+                       "`executor='process'`")
+            module_logger.error(var_msg)
+            raise ImportError(var_msg)
+
+        if per_file:
+            dfs = self.__read_files(
+                function, executor, max_workers, cache, **kwargs)
+        else:
+            try:
+                dfs = function(self.list_files, **kwargs)
+            except AttributeError:
+                if len([x for x in kwargs.keys()]) > 0:
+                    var_msg = (f"Function reading_in, kwargs may have been "
+                               f"passed when the function {func_name} in the "
+                               f"script {script_name} does not take kwargs")
+                else:
+                    var_msg = (f"Function reading in: The {func_name} "
+                               f"function does not exist in the {script_name} "
+                               f"script.")
+                module_logger.error(var_msg)
+                raise AttributeError(var_msg)
         if overwrite is False:
             df_org = self.tables.copy()
             df_org.update(dfs)
@@ -252,6 +962,75 @@ class DataCuration:
 
         module_logger.info("Completed `reading_in`")
 
+    def __read_files(self, function, executor, max_workers, cache, **kwargs):
+        """
+        Read in each of the files with the per file function, merging the
+        tables in the order of the list of files.
+        """
+        module_logger.info("Starting `__read_files`")
+        list_results = [None] * len(self.list_files)
+        if cache is not None:
+            for i, dfs in enumerate(
+                    cache.get_files(self.list_files, function, **kwargs)):
+                if dfs is not None:
+                    list_results[i] = (dfs, None)
+        list_read = [
+            i for i, result in enumerate(list_results) if result is None]
+        pool = None
+        try:
+            if executor is None:
+                for i in list_read:
+                    list_results[i] = _read_file(
+                        function, self.list_files[i], **kwargs)
+            else:
+                pool = (
+                    ThreadPoolExecutor if executor == 'thread' else
+                    ProcessPoolExecutor)(max_workers=max_workers)
+                if executor == 'thread':
+                    list_futures = [
+                        pool.submit(
+                            _read_file, function, self.list_files[i],
+                            **kwargs)
+                        for i in list_read]
+                else:
+                    list_futures = [
+                        pool.submit(
+                            _read_file_payload,
+                            cloudpickle.dumps(
+                                ((function, self.list_files[i]), kwargs)))
+                        for i in list_read]
+                for i, future in zip(list_read, list_futures):
+                    list_results[i] = future.result()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        if cache is not None:
+            list_put = [i for i in list_read if list_results[i][1] is None]
+            cache.put_files(
+                [self.list_files[i] for i in list_put], function,
+                [list_results[i][0] for i in list_put], **kwargs)
+        dfs = dict()
+        for file, (dict_file, var_error) in zip(
+                self.list_files, list_results):
+            if var_error is not None:
+                var_msg = f"Reading in the file failed with: {var_error}"
+                module_logger.error(f"{file}: {var_msg}")
+                self.error_handling(
+                    file, np.nan, "", var_msg, np.nan, np.nan, np.nan)
+                continue
+            for key in dict_file.keys():
+                if key in dfs:
+                    var_msg = (f"The table key {key} has already been read in "
+                               f"from another file so is not used")
+                    module_logger.error(f"{file}: {var_msg}")
+                    self.error_handling(
+                        file, np.nan, "", var_msg, np.nan, np.nan, np.nan)
+                    continue
+                dfs[key] = dict_file[key]
+        self.__issue_log.flush()
+        module_logger.info("Completed `__read_files`")
+        return dfs
+
     def set_table(self, tables, dict_key=None, overwrite=True):
         """
         If self.tables is a dictionary set df to key else overwrite existing
@@ -296,6 +1075,12 @@ class DataCuration:
     def concatenate_tables(self):
         """
         Where the tables are in a dictionary format put them into a DataFrame
+
+        The tables are put one under the other, keeping their index, with the
+        key of each table in the category column `level_0`, which replaces
+        any `level_0` column already in the tables. The dtype of each column
+        is settled across the tables before they are put together, see
+        `func_common_dtype`, so each column is only formed once.
         """
         module_logger.info("Starting `concatenate_tables`")
         if type(self.tables).__name__ != "dict":
@@ -303,24 +1088,66 @@ class DataCuration:
                        "should be in dictionary format")
             module_logger.error(var_msg)
             raise ValueError(var_msg)
-        if len([key for key in self.tables.keys()]) > 1:
-            df = pd.concat(self.tables, axis=1)
-        elif len([key for key in self.tables.keys()]) == 1:
-            dict_df = self.tables.copy()
-            dict_key = [key for key in dict_df.keys()][0]
-            df = dict_df[dict_key].copy()
-            df['level_0'] = dict_key
-        else:
+        if len([key for key in self.tables.keys()]) == 0:
             var_msg = "The dictionary `self.tables` is empty"
             module_logger.error(var_msg)
             raise AttributeError(var_msg)
+        list_keys = [key for key in self.tables.keys()]
+        list_dfs = [self.tables[key] for key in list_keys]
+        if len(list_keys) == 1:
+            df = list_dfs[0].copy()
+        else:
+            df = self.__concatenate_rows(list_dfs)
+        list_categories = [key for key in list_keys if not pd.isnull(key)]
+        dict_codes = {key: i for i, key in enumerate(list_categories)}
+        arr_codes = np.repeat(
+            [dict_codes[key] if not pd.isnull(key) else -1
+             for key in list_keys],
+            [df_key.shape[0] for df_key in list_dfs])
+        df['level_0'] = pd.Categorical.from_codes(arr_codes, list_categories)
         self.set_table(df, overwrite=True)
         module_logger.info("Completed `concatenate_tables`")
 
-    def dictionary_tables(self, key=None):
+    @staticmethod
+    def __concatenate_rows(list_dfs):
+        for df in list_dfs:
+            if not df.columns.is_unique:
+                var_msg = ("For the function `concatenate_tables` the "
+                           "columns of each table need to be unique")
+                module_logger.error(var_msg)
+                raise ValueError(var_msg)
+        list_cols = list()
+        for df in list_dfs:
+            list_cols += [
+                col for col in df.columns if
+                (col not in list_cols) and (col != 'level_0')]
+        idx = list_dfs[0].index.append([df.index for df in list_dfs[1:]])
+        dict_cols = dict()
+        for col in list_cols:
+            list_dtypes = [df[col].dtype for df in list_dfs if col in df]
+            dtype = func_common_dtype(
+                list_dtypes, len(list_dtypes) < len(list_dfs))
+            dict_cols[col] = pd.concat([
+                (df[col] if col in df else
+                 pd.Series(np.nan, index=df.index, dtype=object)
+                 ).astype(dtype, copy=False)
+                for df in list_dfs
+            ]).array
+        return pd.DataFrame(dict_cols, index=idx, columns=list_cols)
+
+    def dictionary_tables(self, key=None, keep_concatenated=False):
         """
         Where the tables are in a DataFrame format put them in a dictionary,
         using the values in the key column as the new dictionary keys
+
+        The table is split in one pass, the rows are put in order of the key
+        column once, if the rows of each key are not already together, and
+        each table is a view of a slice of those rows rather than a copy.
+
+        With `keep_concatenated` True the tables are left as the one
+        DataFrame, in order of the key column, and the dictionary of views of
+        each key is returned instead, so going between `concatenate_tables`
+        and `dictionary_tables` does not copy the data.
         """
         module_logger.info("Starting `dictionary_tables`")
         if type(self.tables).__name__ != "DataFrame":
@@ -328,8 +1155,12 @@ class DataCuration:
                        "should be in DataFrame format.")
             module_logger.error(var_msg)
             raise ValueError(var_msg)
+        if keep_concatenated not in [True, False]:
+            var_msg = ("The value of `keep_concatenated` needs to be True or "
+                       "False")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
         df = self.tables
-        dict_dfs = dict()
 
         if key is not None:
             var_cycle = key
@@ -339,12 +1170,44 @@ class DataCuration:
             var_msg = f"There is no {var_cycle} column present in the table"
             module_logger.error(var_msg)
             raise ValueError(var_msg)
-        for val in df[var_cycle].unique().tolist():
-            dict_dfs[val] = df.loc[df[var_cycle] == val].copy()
+        df_split, dict_dfs = self.__split_table(df, var_cycle)
+        if keep_concatenated:
+            self.set_table(df_split, overwrite=True)
+            module_logger.info("Completed `dictionary_tables`")
+            return dict_dfs
         self.set_table(dict_dfs)
 
         module_logger.info("Completed `dictionary_tables`")
 
+    @staticmethod
+    def __split_table(df, var_cycle):
+        """
+        The table in order of the values of the column `var_cycle`, and a
+        dictionary of the views of the rows of each value, in the order the
+        values first appear.
+        """
+        arr_codes, arr_uniques = pd.factorize(df[var_cycle])
+        list_uniques = list(arr_uniques)
+        if (arr_codes == -1).any():
+            arr_codes = np.where(arr_codes == -1, len(list_uniques), arr_codes)
+            list_uniques.append(np.nan)
+        if df.shape[0] == 0:
+            return df, dict()
+        arr_changes = np.flatnonzero(np.diff(arr_codes) != 0) + 1
+        if len(arr_changes) + 1 != len(list_uniques):
+            arr_order = np.argsort(arr_codes, kind='stable')
+            df = df.take(arr_order)
+            arr_codes = arr_codes[arr_order]
+            arr_changes = np.flatnonzero(np.diff(arr_codes) != 0) + 1
+        arr_starts = np.concatenate([[0], arr_changes])
+        arr_ends = np.concatenate([arr_changes, [df.shape[0]]])
+        dict_dfs = {
+            list_uniques[arr_codes[var_start]]:
+                df.iloc[var_start:var_end].copy(deep=False)
+            for var_start, var_end in zip(arr_starts, arr_ends)
+        }
+        return df, dict_dfs
+
     def set_comparison_headers(
             self, path=None, script_name=None, func_name="read_headers",
             function=None, dictionary=None, **kwargs):
@@ -423,28 +1286,39 @@ class DataCuration:
 
     @staticmethod
     def _link_headers(tables, headers, **kwargs):
+        """
+        Link each table to the header set whose expected headers are the
+        first row of the table, found from a dictionary of the expected
+        headers of each header set, or if none are the same once each header
+        is normalised, see `_normalise_header`, the header set that matches
+        that way.
+        """
         dict_link = dict()
-        list_headers_keys = [
-            key for key in headers.keys() if key != 'ideal_headers']
+        dict_exact, dict_normalised = _header_index(headers)
         if type(tables).__name__ == 'dict':
-            for df_key in [key for key in tables.keys()]:
-                for header_set in list_headers_keys:
-                    list_expected = headers[header_set]['expected_headers']
-                    if list_expected == tables[
-                        df_key].iloc[:len(list_expected)].values.tolist()[0]:
-                        dict_link[df_key] = header_set
-                        break
+            dict_tables = tables
         else:
-            for header_set in list_headers_keys:
-                list_expected = headers[header_set]['expected_headers']
-                if list_expected == tables.iloc[
-                    :len(list_expected)].values.tolist()[0]:
-                    dict_link['combined'] = header_set
-                    break
+            dict_tables = {'combined': tables}
+        for df_key in [key for key in dict_tables.keys()]:
+            tuple_first_row = _header_fingerprint(dict_tables[df_key])
+            if tuple_first_row in dict_exact:
+                dict_link[df_key] = dict_exact[tuple_first_row]
+                continue
+            tuple_normalised = tuple(
+                [_normalise_header(value) for value in tuple_first_row])
+            if tuple_normalised in dict_normalised:
+                dict_link[df_key] = dict_normalised[tuple_normalised]
         return dict_link
 
     def link_headers(self, path=None, script_name=None,
                      func_name="link_headers", function=None, **kwargs):
+        """
+        Link each table to a header set of `set_comparison_headers`. The
+        tables linked to header sets whose expected headers are not exactly
+        the first row of the table, and the tables that are not linked along
+        with the header set closest to them, are each logged as an issue
+        before raising an error for the tables that are not linked.
+        """
         # TODO Need to see if we can isolate just a set of new tables? Maybe
         #  have a list of dictionary keys that have had their headers
         #  done already?
@@ -475,7 +1349,16 @@ class DataCuration:
             module_logger.error(var_msg)
             raise AttributeError(var_msg)
 
-        list_unallocated_keys = set(self.tables.keys()) - set(dict_link.keys())
+        if type(self.tables).__name__ == 'dict':
+            dict_tables = self.tables
+        else:
+            dict_tables = {'combined': self.tables}
+        try:
+            self.__report_link_headers(dict_tables, dict_link)
+        finally:
+            self.__issue_log.flush()
+
+        list_unallocated_keys = set(dict_tables.keys()) - set(dict_link.keys())
         if len(list_unallocated_keys) != 0:
             var_msg = (f"Not all the headers are linked, the unlinked tables "
                        f"are: {list_unallocated_keys}")
@@ -486,9 +1369,58 @@ class DataCuration:
 
         module_logger.info("Completed `link_headers`")
 
+    def __report_link_headers(self, dict_tables, dict_link):
+        list_headers_keys = [
+            key for key in self.headers.keys() if key != 'ideal_headers']
+        dict_normalised = {
+            header_set: [
+                _normalise_header(value) for value in
+                self.headers[header_set]['expected_headers']]
+            for header_set in list_headers_keys
+        }
+        for df_key in dict_tables.keys():
+            tuple_first_row = _header_fingerprint(dict_tables[df_key])
+            var_file = str(df_key).split(self.__key_separator)[0]
+            var_subfile = (
+                str(df_key).split(self.__key_separator)[1] if
+                self.__key_separator in str(df_key) else np.nan)
+            if df_key in dict_link:
+                if dict_link[df_key] not in self.headers:
+                    continue
+                if tuple(self.headers[dict_link[df_key]][
+                        'expected_headers']) != tuple_first_row:
+                    self.error_handling(
+                        var_file, var_subfile, "",
+                        f"The headers are linked to the header set "
+                        f"{dict_link[df_key]} but are not exactly the same as "
+                        f"its expected headers",
+                        np.nan, np.nan, np.nan)
+                continue
+            list_first_row = [
+                _normalise_header(value) for value in tuple_first_row]
+            var_best_set = None
+            var_best_count = -1
+            for header_set in list_headers_keys:
+                var_count = sum([
+                    value == expected for value, expected in
+                    zip(list_first_row, dict_normalised[header_set])])
+                if var_count > var_best_count:
+                    var_best_set = header_set
+                    var_best_count = var_count
+            if var_best_set is None:
+                var_msg = "The headers are not linked, there are no header sets"
+            else:
+                var_msg = (
+                    f"The headers are not linked, the closest header set is "
+                    f"{var_best_set} with {var_best_count} of "
+                    f"{len(dict_normalised[var_best_set])} headers the same")
+            self.error_handling(
+                var_file, var_subfile, "", var_msg, np.nan, np.nan, np.nan)
+
     @staticmethod
     def __assert_linked_headers(
-        list_ideal_headers, dict_header, df, remove_header_rows, reset_index):
+        list_ideal_headers, dict_header, df, remove_header_rows, reset_index,
+        inplace=False):
         list_expected_headers = dict_header['expected_headers']
         list_new_names = dict_header['new_headers']
         list_remove = [
@@ -519,7 +1451,9 @@ class DataCuration:
         for col in list_cols:
             df[col] = np.nan
 
-        df = df[list_ideal_headers].copy()
+        df = df[list_ideal_headers]
+        if not inplace:
+            df = df.copy()
 
         return df
 
@@ -535,7 +1469,8 @@ class DataCuration:
                     self.headers[self.__link_headers[key]],
                     dict_dfs[key],
                     remove_header_rows,
-                    reset_index
+                    reset_index,
+                    self.__inplace
                 )
             self.set_table(dict(dict_dfs))
         else:
@@ -545,9 +1480,10 @@ class DataCuration:
                 self.headers[self.__link_headers[key]],
                 self.tables,
                 remove_header_rows,
-                reset_index
+                reset_index,
+                self.__inplace
             )
-            self.set_table(df.copy())
+            self.set_table(self.__copy(df))
 
         module_logger.info("Completed `assert_linked_headers`")
 
@@ -555,6 +1491,14 @@ class DataCuration:
             self, path=None, script_name=None, func_name=None, list_cols=None,
             function=None, ideal_headers=None, required_headers=None):
         module_logger.info("Starting `set_headers`")
+        if self.__lazy and not self.__executing:
+            self.__record_step(
+                'set_headers', path=path, script_name=script_name,
+                func_name=func_name, list_cols=list_cols, function=function,
+                ideal_headers=ideal_headers,
+                required_headers=required_headers)
+            module_logger.info("Completed `set_headers`, step recorded")
+            return
         if list_cols is not None:
             if type(list_cols).__name__ != "list":
                 var_msg = ("The argument `list_cols` of function `set_headers` "
@@ -615,7 +1559,8 @@ class DataCuration:
                         col not in dict_dfs[key].columns.tolist()
                     ]:
                         dict_dfs[key][col] = np.nan
-                    dict_dfs[key] = dict_dfs[key][ideal_headers].copy()
+                    dict_dfs[key] = self.__copy(
+                        dict_dfs[key][ideal_headers])
                 elif required_headers is not None:
                     for col in [
                         col for col in required_headers if
@@ -629,7 +1574,7 @@ class DataCuration:
                            "number of columns present in the table")
                 module_logger.error(var_msg)
                 raise ValueError(var_msg)
-            df = self.tables.copy()
+            df = self.__copy(self.tables)
             if list_cols is not None:
                 df.columns = list_cols
             elif function is not None:
@@ -640,7 +1585,7 @@ class DataCuration:
                     col not in df.columns.tolist()
                 ]:
                     df[col] = np.nan
-                df = df[ideal_headers].copy()
+                df = self.__copy(df[ideal_headers])
             elif required_headers is not None:
                 for col in [
                     col for col in required_headers if
@@ -656,248 +1601,225 @@ class DataCuration:
 
         module_logger.info("Completed `set_headers`")
 
-    def alter_tables(self, path=None, script_name=None,
-                     object_name="dict_alter", dictionary=None, **kwargs):
-        """
-        Use this functionality to make alterations to the table(s)
-        """
-        module_logger.info("Starting `alter_tables`")
-        # TODO move this check to own function (applies to convert_columns too)
+    @staticmethod
+    def __get_dictionary(path, script_name, object_name, dictionary):
         if (script_name is not None) & (object_name is not None):
-            dict_alter = import_attr(path, script_name, object_name)
+            return import_attr(path, script_name, object_name)
         elif dictionary is not None:
             if type(dictionary).__name__ != "dict":
                 var_msg = "The `dictionary` argument is not a dictionary"
                 module_logger.error(var_msg)
                 raise ValueError(var_msg)
-            dict_alter = dictionary
-        else:
-            var_msg = ("Either `dictionary` or both of `script_name` and "
-                       "`path` need to be none null")
+            return dictionary
+        var_msg = ("Either `dictionary` or both of `script_name` and "
+                   "`path` need to be none null")
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+
+    @staticmethod
+    def __check_executor(executor):
+        if executor not in [None, 'thread', 'process']:
+            var_msg = ("The `executor` argument only takes values None, "
+                       "`thread`, `process`")
             module_logger.error(var_msg)
             raise ValueError(var_msg)
+        if (executor == 'process') and (cloudpickle is None):
+            var_msg = ("The `cloudpickle` package is required for "
+                       "`executor='process'`")
+            module_logger.error(var_msg)
+            raise ImportError(var_msg)
 
-        if type(self.tables).__name__ == "DataFrame":
-            df = self.tables.copy()
-            df_new = self.__alter_cols(
-                df, dict_alter, [self.__key_1, self.__key_2, self.__key_3],
-                np.nan, **kwargs)
-            self.set_table(df_new)
-        elif type(self.tables).__name__ == "dict":
-            dfs = self.tables
-            for key in self.tables.keys():
-                df = dfs[key].copy()
-                df_new = self.__alter_cols(
-                    df, dict_alter, [self.__key_1, self.__key_2, self.__key_3],
-                    key, **kwargs)
-                self.set_table(df_new, key)
-        else:
-            var_msg = ("The tables are in neither a DataFrame or dictionary "
-                       "format, which means something is seriously wrong...")
+    @staticmethod
+    def __check_lazy_executor(executor):
+        if executor is not None:
+            var_msg = ("The `executor` argument can not be used in lazy mode, "
+                       "the steps recorded are run one table at a time")
             module_logger.error(var_msg)
             raise ValueError(var_msg)
 
-        module_logger.info("Completed `alter_tables`")
+    def __run_tables_pool(self, step, dictionary, executor, max_workers,
+                          **kwargs):
+        """
+        Run `convert_columns` or `alter_tables` on each of the tables in a
+        pool of `max_workers`, the tables are independent of each other. A
+        thread pool suits functions that are mostly pandas and numpy work,
+        which releases the GIL, while a process pool needs the `cloudpickle`
+        package to send the functions of the dictionary. The tables and
+        issues are then set and logged in the order of the table keys, the
+        same as when run one after another.
+        """
+        module_logger.info(f"Starting `__run_tables_pool` for `{step}`")
+        dfs = self.tables
+        list_keys = [key for key in dfs.keys()]
+        list_keys_1_3 = [self.__key_1, self.__key_2, self.__key_3]
+        pool = (
+            ThreadPoolExecutor if executor == 'thread' else
+            ProcessPoolExecutor)(max_workers=max_workers)
+        try:
+            if executor == 'thread':
+                list_futures = [
+                    pool.submit(
+                        _run_table_step, step, dfs[key], dictionary, key,
+                        self.__key_separator, list_keys_1_3,
+                        not self.__inplace, **kwargs)
+                    for key in list_keys]
+            else:
+                # The tables are copied when sent so are changed in place
+                list_futures = [
+                    pool.submit(
+                        _run_table_step_payload,
+                        cloudpickle.dumps((
+                            (step, dfs[key], dictionary, key,
+                             self.__key_separator, list_keys_1_3, False),
+                            kwargs)))
+                    for key in list_keys]
+            list_results = [future.result() for future in list_futures]
+        finally:
+            pool.shutdown()
+        for key, (df_new, list_issues) in zip(list_keys, list_results):
+            for args in list_issues:
+                self.error_handling(*args)
+            dfs[key] = df_new
+        self.set_table(dfs, overwrite=True)
+        module_logger.info(f"Completed `__run_tables_pool` for `{step}`")
 
-    def __alter_cols(self, df, dict_alter, keys, dict_key, **kwargs):
-        module_logger.info("Starting `__alter_cols`")
-        if pd.isnull(dict_key):
-            var_file = np.nan
-            var_subfile = np.nan
-        else:
-            var_file = dict_key.split(self.__key_separator)[0]
-            var_subfile = (dict_key.split(self.__key_separator)[1] if
-                           self.__key_separator in dict_key else np.nan)
-        for alter_key in dict_alter.keys():
-            var_type = dict_alter[alter_key]["type"]
-            function = dict_alter[alter_key]["function"]
-            if var_type == "new_col":
-                var_col_name = dict_alter[alter_key]["col_name"]
-                if var_col_name in df.columns.tolist():
-                    var_msg = (
-                        f"The column {var_col_name} is present in the "
-                        f"table so should not be overwritten")
-                    module_logger.error(var_msg)
-                    self.error_handling(var_file, var_subfile, "", var_msg,
-                                        var_col_name, np.nan, np.nan)
-                    continue
-                try:
-                    s = function(df, keys, **kwargs)
-                    df[var_col_name] = s
-                except KeyError:
-                    var_msg = (
-                        f"For type new_col the function for alter_key "
-                        f"{alter_key} has not worked with a KeyError")
-                    module_logger.error(var_msg)
-                    self.error_handling(var_file, var_subfile, "", var_msg,
-                                        var_col_name, np.nan, np.nan)
-                    continue
-                except:
-                    var_msg = (f"For type new_col the function for "
-                               f"alter_key {alter_key} has not worked")
-                    module_logger.error(var_msg)
+    def alter_tables(self, path=None, script_name=None,
+                     object_name="dict_alter", dictionary=None,
+                     executor=None, max_workers=None, **kwargs):
+        """
+        Use this functionality to make alterations to the table(s)
 
-                    var_idx = np.nan
-                    var_issue_count = np.nan
-                    if "idx_function" in dict_alter[alter_key]:
-                        func_idx = dict_alter[alter_key]['idx_function']
-                        if type(func_idx).__name__ != 'function':
-                            var_msg = ''
-                            module_logger.error(var_msg)
-                        s_idx = func_idx(df, keys, **kwargs)
-                        var_idx = ', '.join(
-                            [
-                                str(item) for item in
-                                s_idx.loc[s_idx].index.tolist()
-                            ]
-                        )
-                        var_issue_count = s_idx.sum()
-                    self.error_handling(var_file, var_subfile, "", var_msg,
-                                        var_col_name, var_issue_count, var_idx)
-                    continue
-            elif var_type == "map_df":
-                try:
-                    df = function(df, keys, **kwargs)
-                except:
-                    var_msg = (f"For type map_df the function for "
-                               f"alter_key {alter_key} has not worked")
-                    module_logger.error(var_msg)
+        Where the tables are a dictionary they can be altered in a pool of
+        `max_workers` with `executor` as 'thread' or 'process', see
+        `__run_tables_pool`, this is not available in lazy mode.
+        """
+        module_logger.info("Starting `alter_tables`")
+        dict_alter = self.__get_dictionary(
+            path, script_name, object_name, dictionary)
+        self.__check_executor(executor)
+        if self.__lazy and not self.__executing:
+            self.__check_lazy_executor(executor)
+            self.__record_step(
+                'alter_tables', dict_alter=dict_alter, kwargs=kwargs)
+            module_logger.info("Completed `alter_tables`, step recorded")
+            return
 
-                    var_idx = np.nan
-                    var_issue_count = np.nan
-                    if "idx_function" in dict_alter[alter_key]:
-                        func_idx = dict_alter[alter_key]['idx_function']
-                        if type(func_idx).__name__ != 'function':
-                            var_msg = ''
-                            module_logger.error(var_msg)
-                        s_idx = func_idx(df, keys, **kwargs)
-                        var_idx = ', '.join(
-                            [
-                                str(item) for item in
-                                s_idx.loc[s_idx].index.tolist()
-                            ]
-                        )
-                        var_issue_count = s_idx.sum()
-                    self.error_handling(var_file, var_subfile, "", var_msg,
-                                        np.nan, var_issue_count, var_idx)
-                    continue
+        try:
+            if (
+                (executor is not None) and
+                (type(self.tables).__name__ == "dict")
+            ):
+                self.__run_tables_pool(
+                    'alter_tables', dict_alter, executor, max_workers,
+                    **kwargs)
+            elif type(self.tables).__name__ == "DataFrame":
+                df = self.__copy(self.tables)
+                df_new = self.__alter_cols(
+                    df, dict_alter, [self.__key_1, self.__key_2, self.__key_3],
+                    np.nan, **kwargs)
+                self.set_table(df_new)
+            elif type(self.tables).__name__ == "dict":
+                dfs = self.tables
+                for key in self.tables.keys():
+                    df = self.__copy(dfs[key])
+                    df_new = self.__alter_cols(
+                        df, dict_alter,
+                        [self.__key_1, self.__key_2, self.__key_3], key,
+                        **kwargs)
+                    self.set_table(df_new, key)
+            else:
+                var_msg = ("The tables are in neither a DataFrame or "
+                           "dictionary format, which means something is "
+                           "seriously wrong...")
+                module_logger.error(var_msg)
+                raise ValueError(var_msg)
+        finally:
+            self.__issue_log.flush()
 
-        module_logger.info("Completed `__alter_cols`")
-        return df
+        module_logger.info("Completed `alter_tables`")
+
+    def __alter_cols(self, df, dict_alter, keys, dict_key, **kwargs):
+        return _alter_cols(
+            df, dict_alter, keys, dict_key, self.__key_separator,
+            self.error_handling, **kwargs)
 
     def convert_columns(self, path=None, script_name=None,
-                        object_name="dict_convert", dictionary=None, **kwargs):
+                        object_name="dict_convert", dictionary=None,
+                        executor=None, max_workers=None, **kwargs):
+        """
+        Convert the columns of each table with the conversions of the
+        dictionary, each of which has the `columns`, the `dtypes` that mean a
+        column needs no conversion, and either `functions` to try in turn or
+        a built in `type` of 'int', 'float', 'datetime' or 'bool', see
+        `func_check_convert_type`. A built in conversion finds the values
+        that fail as it converts, so needs no `idx_function`.
+
+        Where the tables are a dictionary they can be converted in a pool of
+        `max_workers` with `executor` as 'thread' or 'process', see
+        `__run_tables_pool`, this is not available in lazy mode.
+        """
         module_logger.info("Starting `convert_columns`")
-        if (script_name is not None) & (object_name is not None):
-            dict_convert = import_attr(path, script_name, object_name)
-        elif dictionary is not None:
-            if type(dictionary).__name__ != "dict":
-                var_msg = "The `dictionary` argument is not a dictionary"
+        dict_convert = self.__get_dictionary(
+            path, script_name, object_name, dictionary)
+        self.__check_executor(executor)
+        if self.__lazy and not self.__executing:
+            self.__check_lazy_executor(executor)
+            self.__record_step(
+                'convert_columns', dict_convert=dict_convert, kwargs=kwargs)
+            module_logger.info("Completed `convert_columns`, step recorded")
+            return
+
+        try:
+            if (
+                (executor is not None) and
+                (type(self.tables).__name__ == "dict")
+            ):
+                self.__run_tables_pool(
+                    'convert_columns', dict_convert, executor, max_workers,
+                    **kwargs)
+            elif type(self.tables).__name__ == "DataFrame":
+                df = self.__copy(self.tables)
+                df_new = self.__convert_col(df, dict_convert, "", **kwargs)
+                self.set_table(df_new, overwrite=True)
+            elif type(self.tables).__name__ == "dict":
+                dfs = self.tables
+                for key in self.tables.keys():
+                    df = self.__copy(dfs[key])
+                    df_new = self.__convert_col(
+                        df, dict_convert, key, **kwargs)
+                    dfs[key] = df_new
+                self.set_table(dfs, overwrite=True)
+            else:
+                var_msg = ("The tables are in neither a DataFrame or "
+                           "dictionary format, which means something is "
+                           "seriously wrong...")
                 module_logger.error(var_msg)
                 raise ValueError(var_msg)
-            dict_convert = dictionary
-        else:
-            var_msg = ("Either `dictionary` or both of `script_name` and "
-                       "`path` need to be none null")
-            module_logger.error(var_msg)
-            raise ValueError(var_msg)
-
-        if type(self.tables).__name__ == "DataFrame":
-            df = self.tables.copy()
-            df_new = self.__convert_col(df, dict_convert, "", **kwargs)
-            self.set_table(df_new, overwrite=True)
-        elif type(self.tables).__name__ == "dict":
-            dfs = self.tables
-            for key in self.tables.keys():
-                df = dfs[key].copy()
-                df_new = self.__convert_col(df, dict_convert, key, **kwargs)
-                dfs[key] = df_new.copy()
-            self.set_table(dfs, overwrite=True)
-        else:
-            var_msg = ("The tables are in neither a DataFrame or dictionary "
-                       "format, which means something is seriously wrong...")
-            module_logger.error(var_msg)
-            raise ValueError(var_msg)
+        finally:
+            self.__issue_log.flush()
 
         module_logger.info("Completed `convert_columns`")
 
     def __convert_col(self, df, dict_convert, dict_key, **kwargs):
-        module_logger.info("Starting `__convert_col`")
-        for convert_key in dict_convert.keys():
-            cols = dict_convert[convert_key]["columns"]
-            if type(cols).__name__ == 'function':
-                cols = cols(df, **kwargs)
-            list_cols = list(cols)
-            list_stops = dict_convert[convert_key]["dtypes"]
-            dict_functions = dict_convert[convert_key]["functions"]
-            for col in list_cols:
-                if col not in df.columns.tolist():
-                    var_msg = f"The column {col} is not present"
-                    module_logger.error(var_msg)
-                    raise ValueError(var_msg)
-                dtype_flag = 0
-                var_dtype = df[col].dtype.name
-                for dtype in list_stops:
-                    if dtype in var_dtype:
-                        dtype_flag = 1
-                        break
-                if dtype_flag == 1:
-                    continue
-                converted_flag = 0
-                for key in dict_functions.keys():
-                    func_use = dict_functions[key]
-                    if type(func_use).__name__ != "function":
-                        var_msg = (f"The function for converting is not a "
-                                   f"function! For keys {convert_key}, {key}")
-                        module_logger.error(var_msg)
-                        raise ValueError(var_msg)
-                    try:
-                        s = func_use(df, col, **kwargs)
-                        df[col] = s.copy()
-                        converted_flag = 1
-                        break
-                    except:
-                        var_msg = (f"The conversion failed for keys "
-                                   f"{convert_key}, {key}, trying next")
-                        module_logger.warning(var_msg)
-                        continue
-                if converted_flag == 0:
-                    var_idx = np.nan
-                    var_issue_count = np.nan
-                    if "idx_function" in dict_convert[convert_key]:
-                        func_idx = dict_convert[convert_key]['idx_function']
-                        if type(func_idx).__name__ != 'function':
-                            var_msg = (
-                                f'The `idx_function` argument is not a function'
-                                f' it is a {type(func_idx).__name__}')
-                            module_logger.error(var_msg)
-                            raise ValueError(var_msg)
-                        s_idx = func_idx(df, col, **kwargs)
-                        var_idx = ', '.join(
-                            [
-                                str(item) for item in
-                                s_idx.loc[s_idx].index.tolist()
-                            ]
-                        )
-                        var_issue_count = s_idx.sum()
-                    var_msg = (f"The conversion for column {col} for "
-                               f"convert_key {convert_key} failed.")
-                    module_logger.error(var_msg)
-                    self.error_handling(
-                        dict_key.split(self.__key_separator)[0],
-                        (dict_key.split(self.__key_separator)[1] if
-                         self.__key_separator in dict_key else np.nan),
-                        "",
-                        f"The conversion failed to format {convert_key}",
-                        col,
-                        var_issue_count,
-                        var_idx
-                    )
-
-        module_logger.info("Completed `__convert_col`")
-        return df
+        return _convert_col(
+            df, dict_convert, dict_key, self.__key_separator,
+            not self.__inplace, self.error_handling, **kwargs)
 
     def assert_nulls(self, list_nulls=None, list_exclude_cols=None):
+        """
+        Replace the values of `list_nulls`, by default "nan" and "", with
+        nulls in all but the columns of `list_exclude_cols`.
+
+        The object and string columns are done together in one pass for each
+        table, the other columns are only looked at for values of
+        `list_nulls` that are not text, such as -999, as they can not hold
+        the text values.
+
+        Where the reading in function allows, passing the values as
+        `na_values` when reading in, for example `reading_in(...,
+        na_values=["nan", ""])` with the `read_file` function of the example
+        scripts, avoids this step.
+        """
         module_logger.info("Starting `assert_nulls`")
         if list_nulls is None:
             list_nulls_use = ["nan", ""]
@@ -910,40 +1832,155 @@ class DataCuration:
         module_logger.info(f"The nulls being used are: {list_nulls_use}")
         module_logger.info(
             f"The columns being excluded are: {list_exclude_cols_use}")
-        df = self.tables.copy()
-        if type(df).__name__ == "dict":
+        if self.__lazy and not self.__executing:
+            self.__record_step(
+                'assert_nulls', list_nulls=list(list_nulls_use),
+                list_exclude_cols=list(list_exclude_cols_use))
+            module_logger.info("Completed `assert_nulls`, step recorded")
+            return
+        if type(self.tables).__name__ == "dict":
+            df = self.tables.copy()
             list_keys = [x for x in df.keys()]
             for key in list_keys:
-                for null in list_nulls_use:
-                    if len(list_exclude_cols_use) == 0:
-                        df[key] = df[key].replace(null, np.nan)
-                    else:
-                        for col in [
-                            col for col in df[key].columns.tolist() if
-                            col not in list_exclude_cols_use
-                        ]:
-                            df[key][col] = df[key][col].replace(null, np.nan)
+                df[key] = self.__assert_nulls_table(
+                    df[key], list_nulls_use, list_exclude_cols_use,
+                    self.__inplace)
         else:
-            for null in list_nulls_use:
-                if len(list_exclude_cols_use) == 0:
-                    df = df.replace(null, np.nan)
-                else:
-                    for col in [
-                        col for col in df.columns.tolist() if
-                        col not in list_exclude_cols_use
-                    ]:
-                        df[col] = df[col].replace(null, np.nan)
+            df = self.__assert_nulls_table(
+                self.tables, list_nulls_use, list_exclude_cols_use,
+                self.__inplace)
         self.set_table(df, overwrite=True)
         module_logger.info("Completed `assert_nulls`")
 
+    @staticmethod
+    def __assert_nulls_table(df, list_nulls, list_exclude_cols, inplace):
+        """
+        The null values of the object and string columns are found in one
+        pass over the values of those columns together, the other columns
+        are looked at for the values of `list_nulls` that are not text, such
+        as -999, and any category columns for all of them. The table is then
+        formed again once with the columns that had null values replaced,
+        rather than replacing each column in turn.
+
+        With `inplace` True the null values are instead set in the table one
+        column at a time, so no more than a column of the values is copied.
+        """
+        list_cols = [
+            i for i, (col, dtype) in enumerate(zip(df.columns, df.dtypes)) if
+            (dtype.name in ['object', 'string']) and
+            (col not in list_exclude_cols)
+        ]
+        list_typed = [
+            i for i, (col, dtype) in enumerate(zip(df.columns, df.dtypes)) if
+            (dtype.name not in ['object', 'string']) and
+            (col not in list_exclude_cols)
+        ]
+        list_typed_nulls = [
+            value for value in list_nulls if type(value).__name__ != 'str']
+        if df.shape[0] == 0:
+            return df
+        if not df.columns.is_unique:
+            df_use = df if inplace else df.copy()
+            for i in sorted(list_cols + list_typed):
+                df_use.iloc[:, i] = df_use.iloc[:, i].replace(
+                    list_nulls, np.nan)
+            return df_use
+        dict_changed = dict()
+        for i in list_typed:
+            s = df.iloc[:, i]
+            list_use = (
+                list_nulls if s.dtype.name == 'category' else list_typed_nulls)
+            if len(list_use) == 0:
+                continue
+            s_mask = s.isin(list_use)
+            if s_mask.any():
+                dict_changed[df.columns[i]] = s.where(~s_mask)
+        if inplace:
+            for i in list_cols:
+                arr_mask = df.iloc[:, i].isin(list_nulls).to_numpy()
+                if arr_mask.any():
+                    df.iloc[np.flatnonzero(arr_mask), i] = np.nan
+            for col in dict_changed.keys():
+                df[col] = dict_changed[col]
+            return df
+        if len(list_cols) > 0:
+            arr_values = df.iloc[:, list_cols].to_numpy(dtype=object)
+            arr_mask = pd.Series(arr_values.ravel(order='F')).isin(
+                list_nulls).to_numpy().reshape(arr_values.shape, order='F')
+            arr_values[arr_mask] = np.nan
+            for j in np.flatnonzero(arr_mask.any(axis=0)).tolist():
+                var_col = df.columns[list_cols[j]]
+                dict_changed[var_col] = pd.Series(
+                    arr_values[:, j], index=df.index,
+                    dtype=df[var_col].dtype)
+        if len(dict_changed) == 0:
+            return df
+        dict_columns = {
+            col: dict_changed.get(col, df[col]) for col in df.columns}
+        return pd.DataFrame(dict_columns, index=df.index, columns=df.columns)
+
+    def compact_tables(self, list_exclude_cols=None, category_ratio=0.5):
+        """
+        Change the columns of each table to the dtypes that take the least
+        memory without changing the values, see `func_compact_series`, other
+        than the columns of `list_exclude_cols`. Best done after
+        `assert_nulls` and `convert_columns`, which still stop on the
+        `dtypes` of a conversion as the column would have been before.
+
+        Returns a DataFrame of the bytes of each table before and after, from
+        `memory_usage(deep=True)`, which are also logged.
+        """
+        module_logger.info("Starting `compact_tables`")
+        if list_exclude_cols is None:
+            list_exclude_cols_use = []
+        else:
+            list_exclude_cols_use = list_exclude_cols
+        if (
+            (type(category_ratio).__name__ not in ['int', 'float']) or
+            (category_ratio < 0) or (category_ratio > 1)
+        ):
+            var_msg = "The `category_ratio` argument needs to be from 0 to 1"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if type(self.tables).__name__ == "DataFrame":
+            dict_tables = {None: self.tables}
+        elif type(self.tables).__name__ == "dict":
+            dict_tables = dict(self.tables)
+        else:
+            var_msg = ("The tables are in neither a DataFrame or "
+                       "dictionary format, which means something is "
+                       "seriously wrong...")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        list_memory = list()
+        for key in dict_tables.keys():
+            df = dict_tables[key]
+            var_bytes_before = int(df.memory_usage(deep=True).sum())
+            df_new = pd.DataFrame({
+                i: (df.iloc[:, i] if col in list_exclude_cols_use else
+                    func_compact_series(df.iloc[:, i], category_ratio))
+                for i, col in enumerate(df.columns)
+            }, index=df.index)
+            df_new.columns = df.columns
+            var_bytes_after = int(df_new.memory_usage(deep=True).sum())
+            module_logger.info(
+                f"The table {key} is {var_bytes_after} bytes, from "
+                f"{var_bytes_before} bytes")
+            list_memory.append([key, var_bytes_before, var_bytes_after])
+            dict_tables[key] = df_new
+        self.set_table(
+            dict_tables[None] if None in dict_tables else dict_tables,
+            overwrite=True)
+        module_logger.info("Completed `compact_tables`")
+        return pd.DataFrame(
+            list_memory, columns=['table', 'bytes_before', 'bytes_after'])
+
     def get_issue_count(self, issue_number_min=None, issue_number_max=None):
         module_logger.info("Starting `get_issue_count`")
-        df = self.df_issues.copy()
-        if issue_number_min is not None:
-            df = df.loc[df["step_number"] >= issue_number_min].copy()
-        if issue_number_max is not None:
-            df = df.loc[df["step_number"] <= issue_number_max].copy()
-        var_count = df.shape[0]
+        if self.__list_plan and not self.__executing:
+            self.collect()
+        var_count = self.__issue_log.get_issue_count(
+            issue_number_min, issue_number_max)
         module_logger.info("Completed `get_issue_count`")
         return var_count
 
@@ -985,6 +2022,306 @@ class DataCuration:
 
         module_logger.info("Completed `form_summary_tables`")
 
+    def stream(self, chunks, list_steps, table_key=None, cnxs=None,
+               cnx_key=None, file_path=None, batch_size=None):
+        """
+        Run the steps on each DataFrame chunk of `chunks` in turn, for example
+        from `pd.read_csv(chunksize=...)` or `Connections.read_from_db` with a
+        `chunksize`, and write each chunk out once done, so only a chunk at a
+        time is in memory.
+
+        Each of `list_steps` is a dictionary with the key `step` as one of
+        'assert_nulls', 'convert_columns', 'alter_tables' or 'apply_checks',
+        with `kwargs` as the dictionary of arguments for it and optionally
+        `step_no` as the step number to log the issues against. For
+        'apply_checks' the `Checks` object is given as `checks`, the checks
+        are compiled once for all the chunks.
+
+        Each chunk is given an index continuing on from the last so the
+        `issue_idx` values are the row positions in the whole data, the issues
+        are logged for each chunk. With `table_key` the chunks are handled as
+        the table of that key, for the `file` and `sub_file` of the issues.
+
+        The chunks are written with `Connections.write_to_db` to `cnx_key` of
+        `cnxs`, or appended to the CSV file `file_path`, or both. The
+        `tables` are not changed.
+        """
+        module_logger.info("Starting `stream`")
+        list_step_names = [
+            'assert_nulls', 'convert_columns', 'alter_tables', 'apply_checks']
+        list_steps_use = list()
+        for dict_step in list_steps:
+            if type(dict_step).__name__ != "dict":
+                var_msg = "The steps of `list_steps` need to be dictionaries"
+                module_logger.error(var_msg)
+                raise ValueError(var_msg)
+            if dict_step.get('step') not in list_step_names:
+                var_msg = (f"The `step` of each of `list_steps` needs to be "
+                           f"one of {', '.join(list_step_names)}")
+                module_logger.error(var_msg)
+                raise ValueError(var_msg)
+            dict_kwargs = dict(dict_step.get('kwargs', dict()))
+            checks = None
+            if dict_step['step'] == 'apply_checks':
+                checks = dict_step.get('checks')
+                if type(checks).__name__ != "Checks":
+                    var_msg = ("The `checks` of an `apply_checks` step needs "
+                               "to be a `Checks` object")
+                    module_logger.error(var_msg)
+                    raise ValueError(var_msg)
+                if dict_kwargs.get('plan') is None:
+                    dict_kwargs['plan'] = checks.compile_checks(**{
+                        key: dict_kwargs.pop(key) for key in
+                        ['path', 'script_name', 'object_name', 'dictionary']
+                        if key in dict_kwargs})
+            list_steps_use.append(
+                (dict_step['step'], dict_step.get('step_no'), checks,
+                 dict_kwargs))
+        if (cnxs is not None) and (cnx_key not in cnxs.get_cnx_keys()):
+            var_msg = f"The cnx key {cnx_key} is not present in `cnxs`"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+
+        tables_org = self.tables
+        var_offset = 0
+        var_chunks = 0
+        try:
+            for df_chunk in chunks:
+                if type(df_chunk).__name__ != "DataFrame":
+                    var_msg = (f"The chunks need to be DataFrames, chunk "
+                               f"{var_chunks} is a {type(df_chunk).__name__}")
+                    module_logger.error(var_msg)
+                    raise ValueError(var_msg)
+                # A shallow copy so the index of the chunk passed in is kept
+                df_chunk = df_chunk.copy(deep=False)
+                df_chunk.index = pd.RangeIndex(
+                    var_offset, var_offset + df_chunk.shape[0])
+                self.tables = (
+                    df_chunk if table_key is None else {table_key: df_chunk})
+                for var_step, var_step_no, checks, dict_kwargs in \
+                        list_steps_use:
+                    if var_step == 'apply_checks':
+                        if var_step_no is not None:
+                            checks.set_step_no(var_step_no)
+                        checks.apply_checks(self.tables, **dict_kwargs)
+                        continue
+                    if var_step_no is not None:
+                        self.set_step_no(var_step_no)
+                    getattr(self, var_step)(**dict_kwargs)
+                df_out = (
+                    self.tables if table_key is None else
+                    self.tables[table_key])
+                if cnxs is not None:
+                    cnxs.write_to_db(cnx_key, df_out, batch_size=batch_size)
+                if file_path is not None:
+                    df_out.to_csv(
+                        file_path, mode='w' if var_chunks == 0 else 'a',
+                        header=var_chunks == 0, index=False)
+                var_offset += df_chunk.shape[0]
+                var_chunks += 1
+        finally:
+            self.tables = tables_org
+        module_logger.info(
+            f"Completed `stream`, there were {var_chunks} chunks with "
+            f"{var_offset} rows")
+
+    def checkpoint(self, path, step_no=None, file_format='parquet'):
+        """
+        Write the tables, the formed tables, the issues, the header links and
+        the keys to the folder `step_<step_no>` of `path`, by default for the
+        current step number, so a rerun can `resume` from that step rather
+        than from the start.
+
+        The tables are written as `file_format`, see `FileCache`, or as
+        pickles where the `pyarrow` package needed for 'parquet' and
+        'feather' is not installed, and listed in the file `manifest.json`
+        along with the headers, header links, keys, list of files and the
+        counters of the issue log. The manifest is written last so only a
+        complete checkpoint has one.
+
+        Any of these that JSON would not give back as they are, such as table
+        keys that are tuples or datetimes, are written to the pickle
+        `manifest_values.pickle` instead, so `resume` gives the same keys.
+        """
+        module_logger.info("Starting `checkpoint`")
+        if (file_format in ['parquet', 'feather']) and (
+                not func_pyarrow_installed()):
+            module_logger.warning(
+                f"The `pyarrow` package is not installed so the checkpoint "
+                f"is written as pickles rather than {file_format}")
+            file_format = 'pickle'
+        func_check_table_format(file_format)
+        var_step_no = self.__step_no if step_no is None else step_no
+        if "int" not in type(var_step_no).__name__:
+            var_msg = "The `step_no` argument needs to be an int"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        var_path = os.path.join(path, f"step_{var_step_no}")
+        if os.path.exists(var_path):
+            # The manifest goes first so a part written checkpoint is not used
+            for var_file_name in sorted(
+                    os.listdir(var_path),
+                    key=lambda name: name != 'manifest.json'):
+                os.remove(os.path.join(var_path, var_file_name))
+        else:
+            os.makedirs(var_path)
+
+        tables = self.tables
+        var_tables_type = type(tables).__name__
+        dict_tables = {None: tables} if var_tables_type == "DataFrame" else (
+            tables)
+        list_tables = list()
+        for i, key in enumerate(dict_tables.keys()):
+            var_file_name, list_columns = func_write_table(
+                dict_tables[key], var_path, f"table_{i}", file_format)
+            list_tables.append([key, var_file_name, list_columns])
+        list_formed_tables = list()
+        for i, key in enumerate(self.formed_tables.keys()):
+            if type(self.formed_tables[key]).__name__ == "DataFrame":
+                var_file_name, list_columns = func_write_table(
+                    self.formed_tables[key], var_path, f"formed_{i}",
+                    file_format)
+            else:
+                var_file_name, list_columns = f"formed_{i}.pickle", None
+                pd.to_pickle(
+                    self.formed_tables[key],
+                    os.path.join(var_path, var_file_name))
+            list_formed_tables.append([key, var_file_name, list_columns])
+        df_issues = self.__issue_log.get_table().reset_index(drop=True)
+        var_issues_file_name, list_issues_columns = func_write_table(
+            df_issues, var_path, "issues", file_format)
+        var_offset, var_flushed, dict_step_counts = (
+            self.__issue_log.get_counters())
+
+        if isinstance(self.__grouping, datetime):
+            var_grouping = self.__grouping.isoformat()
+            var_grouping_type = "datetime"
+        else:
+            var_grouping = self.__grouping
+            var_grouping_type = type(self.__grouping).__name__
+        dict_manifest = {
+            'step_no': var_step_no,
+            'tables_type': var_tables_type,
+            'tables': list_tables,
+            'formed_tables': list_formed_tables,
+            'issues': [var_issues_file_name, list_issues_columns],
+            'issue_counters': {
+                'offset': var_offset,
+                'flushed': var_flushed,
+                'step_counts': [
+                    [key, value] for key, value in dict_step_counts.items()]
+            },
+            'headers': self.headers,
+            'link_headers': [
+                [key, value] for key, value in self.__link_headers.items()],
+            'keys': [self.__key_1, self.__key_2, self.__key_3],
+            'grouping': var_grouping,
+            'grouping_type': var_grouping_type,
+            'key_separator': self.__key_separator,
+            'list_files': self.list_files,
+            'created': datetime.now().isoformat()
+        }
+        dict_pickled = dict()
+        for key in list(dict_manifest.keys()):
+            try:
+                var_exact = json.loads(
+                    json.dumps(dict_manifest[key])) == dict_manifest[key]
+            except (TypeError, ValueError):
+                var_exact = False
+            if not var_exact:
+                dict_pickled[key] = dict_manifest[key]
+                dict_manifest[key] = None
+        if len(dict_pickled) > 0:
+            pd.to_pickle(
+                dict_pickled, os.path.join(var_path, 'manifest_values.pickle'))
+        dict_manifest['pickled'] = list(dict_pickled.keys())
+        var_manifest_path = os.path.join(var_path, 'manifest.json')
+        with open(f"{var_manifest_path}.tmp", 'w') as manifest:
+            json.dump(dict_manifest, manifest)
+        os.replace(f"{var_manifest_path}.tmp", var_manifest_path)
+        module_logger.info(
+            f"Completed `checkpoint`, written to the folder {var_path}")
+
+    def resume(self, path, step_no=None):
+        """
+        Set the tables, the formed tables, the issues, the header links and
+        the keys from the checkpoint of step `step_no` in `path`, by default
+        the latest complete checkpoint, see `checkpoint`. The step number is
+        set to that of the checkpoint, so the pipeline carries on from the
+        step after it.
+
+        The issues replace those of the `IssueLog`, which is shared with any
+        `Checks` objects it was given to, carrying on the issue ids and
+        without writing the issues already written to an `IssueSink` again.
+        """
+        module_logger.info("Starting `resume`")
+        if step_no is None:
+            list_steps = [
+                int(var_name[5:]) for var_name in (
+                    os.listdir(path) if os.path.exists(path) else list())
+                if re.fullmatch(r"step_-?[0-9]+", var_name) and
+                os.path.exists(os.path.join(path, var_name, 'manifest.json'))
+            ]
+            if len(list_steps) == 0:
+                var_msg = f"There are no complete checkpoints in {path}"
+                module_logger.error(var_msg)
+                raise ValueError(var_msg)
+            step_no = max(list_steps)
+        var_path = os.path.join(path, f"step_{step_no}")
+        var_manifest_path = os.path.join(var_path, 'manifest.json')
+        if not os.path.exists(var_manifest_path):
+            var_msg = (f"There is no complete checkpoint for step {step_no} "
+                       f"in {path}")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        with open(var_manifest_path) as manifest:
+            dict_manifest = json.load(manifest)
+        if len(dict_manifest.get('pickled', list())) > 0:
+            dict_manifest.update(pd.read_pickle(
+                os.path.join(var_path, 'manifest_values.pickle')))
+
+        dict_tables = {
+            key: func_read_table(
+                os.path.join(var_path, var_file_name), list_columns)
+            for key, var_file_name, list_columns in dict_manifest['tables']
+        }
+        # Any steps recorded in lazy mode are for the tables being replaced
+        self.__list_plan = list()
+        self.set_table(
+            dict_tables[None] if dict_manifest['tables_type'] == "DataFrame"
+            else dict_tables,
+            overwrite=True)
+        self.formed_tables = {
+            key: func_read_table(
+                os.path.join(var_path, var_file_name), list_columns)
+            for key, var_file_name, list_columns in
+            dict_manifest['formed_tables']
+        }
+        var_issues_file_name, list_issues_columns = dict_manifest['issues']
+        dict_counters = dict_manifest['issue_counters']
+        self.__issue_log.set_table(
+            func_read_table(
+                os.path.join(var_path, var_issues_file_name),
+                list_issues_columns),
+            offset=dict_counters['offset'],
+            flushed=dict_counters['flushed'],
+            dict_step_counts={
+                key: value for key, value in dict_counters['step_counts']})
+        self.headers = dict_manifest['headers']
+        self.__link_headers = {
+            key: value for key, value in dict_manifest['link_headers']}
+        self.__key_1, self.__key_2, self.__key_3 = dict_manifest['keys']
+        self.__grouping = (
+            datetime.fromisoformat(dict_manifest['grouping']) if
+            dict_manifest['grouping_type'] == "datetime" else
+            dict_manifest['grouping'])
+        self.__key_separator = dict_manifest['key_separator']
+        self.list_files = dict_manifest['list_files']
+        self.__step_no = dict_manifest['step_no']
+        module_logger.info(
+            f"Completed `resume`, from step {self.__step_no} written at "
+            f"{dict_manifest['created']}")
+
     def get_step_no(self):
         module_logger.info("Starting `get_step_no`")
         module_logger.info("Completed `get_step_no`")
@@ -0,0 +1,312 @@
+# Here we are defining a class that will keep the tables read in from each file
+# on disk, so files that have not changed do not need to be parsed again
+import logging
+import os
+import json
+import time
+import hashlib
+import pickle
+from inspect import getsource
+
+import pandas as pd
+
+module_logger = logging.getLogger(__name__)
+
+list_cache_formats = ['parquet', 'feather', 'pickle']
+
+
+def func_reader_identity(function):
+    """
+    The name of the reading in function along with a hash of its source, so
+    changing the function is the same as changing the file.
+    """
+    try:
+        var_source = getsource(function)
+    except (OSError, TypeError):
+        var_source = repr(function.__code__.co_code)
+    return "{}.{}:{}".format(
+        function.__module__, function.__qualname__,
+        hashlib.sha1(var_source.encode()).hexdigest())
+
+
+def func_kwargs_identity(dict_kwargs):
+    """
+    A hash of the arguments passed to the reading in function, so reading in
+    the file with different arguments is a different cache entry.
+    """
+    return hashlib.sha1(
+        repr(sorted(
+            [(str(key), repr(value)) for key, value in dict_kwargs.items()]
+        )).encode()
+    ).hexdigest()
+
+
+def func_pyarrow_installed():
+    try:
+        import pyarrow
+    except ImportError:
+        return False
+    return True
+
+
+def func_check_table_format(file_format):
+    """
+    Check the format tables are to be kept as, 'parquet' and 'feather' need
+    the `pyarrow` package.
+    """
+    if file_format not in list_cache_formats:
+        var_msg = (f"The `file_format` argument only takes values "
+                   f"{', '.join(list_cache_formats)}")
+        module_logger.error(var_msg)
+        raise ValueError(var_msg)
+    if (file_format in ['parquet', 'feather']) and (
+            not func_pyarrow_installed()):
+        var_msg = (f"The `pyarrow` package is required for "
+                   f"`file_format='{file_format}'`")
+        module_logger.error(var_msg)
+        raise ImportError(var_msg)
+
+
+def func_write_table(df, path, var_name, file_format):
+    """
+    Write the table to the folder `path` as `file_format`, or as a pickle
+    where it can not be written as Parquet or Feather, giving the file name
+    and the column names to put back when read, which are None for a pickle.
+    """
+    list_columns = df.columns.tolist()
+    if file_format != 'pickle':
+        # Parquet and Feather need string column names and a default
+        # index, the names are kept in the manifest to be put back
+        try:
+            json.dumps(list_columns)
+            if not df.index.equals(pd.RangeIndex(df.shape[0])):
+                raise ValueError("The index is not the default")
+            df_out = df.copy(deep=False)
+            df_out.columns = [str(col) for col in list_columns]
+            var_file_name = f"{var_name}.{file_format}"
+            if file_format == 'parquet':
+                df_out.to_parquet(os.path.join(path, var_file_name))
+            else:
+                df_out.to_feather(os.path.join(path, var_file_name))
+            return var_file_name, list_columns
+        except Exception as error:
+            module_logger.info(
+                f"The table can not be kept as {file_format} so is kept as a "
+                f"pickle: {error}")
+    var_file_name = f"{var_name}.pickle"
+    df.to_pickle(os.path.join(path, var_file_name))
+    return var_file_name, None
+
+
+def func_read_table(var_file_path, list_columns):
+    """
+    Read a table written by `func_write_table`.
+    """
+    if var_file_path.endswith('.pickle'):
+        return pd.read_pickle(var_file_path)
+    if var_file_path.endswith('.parquet'):
+        df = pd.read_parquet(var_file_path)
+    else:
+        df = pd.read_feather(var_file_path)
+    df.columns = list_columns
+    return df
+
+
+class FileCache:
+    __path = None
+    __max_size = None
+    __file_format = None
+    __dict_manifest = None
+    __var_manifest_path = None
+
+    def __init__(self, path, max_size=None, file_format='parquet'):
+        """
+        A cache of the tables read in from each file, for `reading_in` with
+        `per_file=True`, held in the folder `path`.
+
+        An entry is for a file path, its modified time and size, and the
+        reading in function and its arguments, so any change to the file, the
+        function or the arguments means the file is read in again. The tables
+        are kept as `file_format`, being 'parquet' or 'feather', which need
+        the `pyarrow` package, or 'pickle'. Where `pyarrow` is not installed
+        the tables are kept as pickles.
+        A table that can not be written as Parquet or Feather, for example due
+        to columns that are not all strings, is kept as a pickle instead.
+
+        With `max_size` in bytes the least recently used entries are removed
+        once the cache is larger than that.
+        """
+        module_logger.info("Initialising `FileCache` object")
+        if (file_format in ['parquet', 'feather']) and (
+                not func_pyarrow_installed()):
+            module_logger.warning(
+                f"The `pyarrow` package is not installed so the cache is "
+                f"kept as pickles rather than {file_format}")
+            file_format = 'pickle'
+        func_check_table_format(file_format)
+        if (max_size is not None) and (
+                ("int" not in type(max_size).__name__) or (max_size < 1)):
+            var_msg = "The `max_size` argument needs to be an int above 0"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self.__path = path
+        self.__max_size = max_size
+        self.__file_format = file_format
+        self.__var_manifest_path = os.path.join(path, 'cache_manifest.json')
+        self.__dict_manifest = dict()
+        if os.path.exists(self.__var_manifest_path):
+            with open(self.__var_manifest_path) as manifest:
+                self.__dict_manifest = json.load(manifest)
+        module_logger.info("Initialising `FileCache` object complete")
+
+    def __len__(self):
+        return len(self.__dict_manifest)
+
+    @staticmethod
+    def __cache_key(file, function, dict_kwargs):
+        var_stat = os.stat(file)
+        return hashlib.sha1(
+            "|".join([
+                os.path.abspath(file), str(var_stat.st_mtime_ns),
+                str(var_stat.st_size), func_reader_identity(function),
+                func_kwargs_identity(dict_kwargs)
+            ]).encode()
+        ).hexdigest()
+
+    def get(self, file, function, **kwargs):
+        """
+        The tables read in from the file by the function, with the `kwargs`
+        passed to it, if they are in the cache and the file has not changed,
+        otherwise None.
+        """
+        dfs, var_changed = self.__get(file, function, kwargs)
+        if var_changed:
+            self.__write_manifest()
+        return dfs
+
+    def get_files(self, list_files, function, **kwargs):
+        """
+        As `get` for each of the files, giving a list in the order of the
+        files, with the manifest written once rather than for each file.
+        """
+        list_dfs = list()
+        var_changed = False
+        for file in list_files:
+            dfs, var_file_changed = self.__get(file, function, kwargs)
+            list_dfs.append(dfs)
+            var_changed = var_changed or var_file_changed
+        if var_changed:
+            self.__write_manifest()
+        return list_dfs
+
+    def __get(self, file, function, dict_kwargs):
+        if not os.path.exists(file):
+            return None, False
+        var_key = self.__cache_key(file, function, dict_kwargs)
+        if var_key not in self.__dict_manifest:
+            module_logger.info(f"No cache entry for the file {file}")
+            return None, False
+        dict_entry = self.__dict_manifest[var_key]
+        dfs = dict()
+        try:
+            for table_key, var_file_name, list_columns in dict_entry['tables']:
+                dfs[table_key] = func_read_table(
+                    os.path.join(self.__path, var_file_name), list_columns)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            module_logger.warning(
+                f"The cache entry for the file {file} could not be read so "
+                f"is removed")
+            self.__remove(var_key)
+            return None, True
+        dict_entry['last_used'] = time.time()
+        module_logger.info(f"Read the file {file} from the cache")
+        return dfs, True
+
+    def put(self, file, function, dfs, **kwargs):
+        """
+        Keep the tables read in from the file by the function, with the
+        `kwargs` passed to it.
+        """
+        self.__put(file, function, dfs, kwargs)
+        self.__evict()
+        self.__write_manifest()
+
+    def put_files(self, list_files, function, list_dfs, **kwargs):
+        """
+        As `put` for each of the files and the tables read in from it, with
+        the manifest written once rather than for each file.
+        """
+        if len(list_files) == 0:
+            return
+        for file, dfs in zip(list_files, list_dfs):
+            self.__put(file, function, dfs, kwargs)
+        self.__evict()
+        self.__write_manifest()
+
+    def __put(self, file, function, dfs, dict_kwargs):
+        var_key = self.__cache_key(file, function, dict_kwargs)
+        if var_key in self.__dict_manifest:
+            self.__remove(var_key)
+        list_tables = list()
+        var_size = 0
+        for i, table_key in enumerate(dfs.keys()):
+            var_file_name, list_columns = func_write_table(
+                dfs[table_key], self.__path, f"{var_key}_{i}",
+                self.__file_format)
+            var_size += os.path.getsize(
+                os.path.join(self.__path, var_file_name))
+            list_tables.append([table_key, var_file_name, list_columns])
+        self.__dict_manifest[var_key] = {
+            'file': os.path.abspath(file),
+            'tables': list_tables,
+            'size': var_size,
+            'last_used': time.time()
+        }
+        module_logger.info(f"Added the file {file} to the cache")
+
+    def invalidate(self, file=None):
+        """
+        Remove the entries for the file, for any reading in function, or with
+        `file` None every entry.
+        """
+        module_logger.info("Starting `invalidate`")
+        for var_key in list(self.__dict_manifest.keys()):
+            if (file is None) or (
+                    self.__dict_manifest[var_key]['file'] ==
+                    os.path.abspath(file)):
+                self.__remove(var_key)
+        self.__write_manifest()
+        module_logger.info("Completed `invalidate`")
+
+    def get_size(self):
+        return sum(
+            [dict_entry['size'] for dict_entry in
+             self.__dict_manifest.values()])
+
+    def __remove(self, var_key):
+        for _, var_file_name, _ in self.__dict_manifest[var_key]['tables']:
+            var_file_path = os.path.join(self.__path, var_file_name)
+            if os.path.exists(var_file_path):
+                os.remove(var_file_path)
+        del self.__dict_manifest[var_key]
+
+    def __evict(self):
+        if self.__max_size is None:
+            return
+        list_keys = sorted(
+            self.__dict_manifest.keys(),
+            key=lambda var_key: self.__dict_manifest[var_key]['last_used'])
+        while (self.get_size() > self.__max_size) and (len(list_keys) > 0):
+            var_key = list_keys.pop(0)
+            module_logger.info(
+                f"Removing the cache entry for the file "
+                f"{self.__dict_manifest[var_key]['file']}")
+            self.__remove(var_key)
+
+    def __write_manifest(self):
+        var_temp_path = f"{self.__var_manifest_path}.tmp"
+        with open(var_temp_path, 'w') as manifest:
+            json.dump(self.__dict_manifest, manifest)
+        os.replace(var_temp_path, self.__var_manifest_path)
@@ -0,0 +1,342 @@
+# Here we are defining a class that will hold the issues logged by the
+# `DataCuration` and `Checks` classes
+import logging
+import time
+
+import pandas as pd
+import numpy as np
+
+module_logger = logging.getLogger(__name__)
+
+list_issue_columns = [
+    "key_1", "key_2", "key_3", "file", "sub_file", "step_number", "category",
+    "issue_short_desc", "issue_long_desc", "column", "issue_count", "issue_idx",
+    "grouping"
+]
+
+
+def func_issue_idx(s_condition):
+    """
+    The index values of a boolean Series where the value is True, as an array
+    rather than as a string.
+    """
+    return np.asarray(
+        s_condition.index[np.asarray(s_condition, dtype=bool)])
+
+
+def func_issue_idx_to_str(issue_idx):
+    if type(issue_idx).__name__ == "ndarray":
+        return ", ".join([str(item) for item in issue_idx.tolist()])
+    return issue_idx
+
+
+class IssueSink:
+    __cnxs = None
+    __cnx_key = None
+    __batch_size = None
+    __flush_interval = None
+    __last_flush = None
+    retain = None
+
+    def __init__(self, cnxs, cnx_key, batch_size=1000, flush_interval=None,
+                 retain=False):
+        """
+        Write issues to the table of a `Connections` key while they are being
+        logged, rather than all at the end of the pipeline.
+
+        Issues are written once `batch_size` of them are waiting, or once
+        `flush_interval` seconds have passed since the last write. Unless
+        `retain` is True the written issues are then dropped from memory, so
+        `df_issues` only holds the issues not yet written.
+        """
+        module_logger.info("Initialising `IssueSink` object")
+        if type(cnxs).__name__ != "Connections":
+            var_msg = "The `cnxs` argument is not a `Connections` object"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if cnx_key not in cnxs.get_cnx_keys():
+            var_msg = f"The cnx key {cnx_key} is not present in `cnxs`"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if ("int" not in type(batch_size).__name__) or (batch_size < 1):
+            var_msg = "The `batch_size` argument needs to be an int above 0"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if (flush_interval is not None) and (flush_interval <= 0):
+            var_msg = "The `flush_interval` argument needs to be above 0"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        if retain not in [True, False]:
+            var_msg = "The value of `retain` needs to be True or False"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        self.__cnxs = cnxs
+        self.__cnx_key = cnx_key
+        self.__batch_size = batch_size
+        self.__flush_interval = flush_interval
+        self.__last_flush = time.time()
+        self.retain = retain
+        module_logger.info("Initialising `IssueSink` object complete")
+
+    def is_due(self, pending_count):
+        if pending_count >= self.__batch_size:
+            return True
+        if (self.__flush_interval is not None) and (pending_count > 0):
+            return (time.time() - self.__last_flush) >= self.__flush_interval
+        return False
+
+    def write(self, df_issues):
+        module_logger.info(
+            f"Starting `write` of {df_issues.shape[0]} issues to cnx key "
+            f"`{self.__cnx_key}`")
+        self.__cnxs.write_to_db(self.__cnx_key, df_issues)
+        self.__last_flush = time.time()
+        module_logger.info("Completed `write`")
+
+
+class IssueLog:
+    __dict_columns = None
+    __dict_idx = None
+    __dict_step_counts = None
+    __df_issues = None
+    __var_offset = 0
+    __var_flushed = 0
+    __issue_sink = None
+
+    def __init__(self, issue_sink=None):
+        """
+        Issues are appended column by column into lists and the `df_issues`
+        table is only formed when it is asked for, so logging an issue does not
+        require copying all the issues logged before it.
+
+        Where the `issue_idx` value is passed as an array, or an index, it is
+        kept as an array against the issue id, being the row of `df_issues`,
+        and only turned into the comma separated string when the table is
+        formed.
+
+        If an `IssueSink` is given the issues are written out in batches as
+        they are logged, see `IssueSink`.
+        """
+        module_logger.info("Initialising `IssueLog` object")
+        self.__reset()
+        self.set_sink(issue_sink)
+        module_logger.info("Initialising `IssueLog` object complete")
+
+    def __reset(self):
+        self.__dict_columns = {col: list() for col in list_issue_columns}
+        self.__dict_idx = dict()
+        self.__dict_step_counts = dict()
+        self.__df_issues = None
+        self.__var_offset = 0
+        self.__var_flushed = 0
+
+    def __len__(self):
+        return len(self.__dict_columns["step_number"])
+
+    def __contains__(self, issue_id):
+        if "int" not in type(issue_id).__name__:
+            return False
+        return (
+            (issue_id >= self.__var_offset) &
+            (issue_id < self.__var_offset + len(self))
+        )
+
+    def set_sink(self, issue_sink):
+        if (issue_sink is not None) and (
+                type(issue_sink).__name__ != "IssueSink"):
+            var_msg = "The `issue_sink` argument is not an `IssueSink` object"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        self.__issue_sink = issue_sink
+
+    def append(self, list_vals):
+        """
+        Add a single issue, the values need to be in the same order as the
+        columns of the `df_issues` table.
+        """
+        if len(list_vals) != len(list_issue_columns):
+            var_msg = (f"Logging the issue failed, there should be "
+                       f"{len(list_issue_columns)} values, values: {list_vals}")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        try:
+            var_step_no = int(list_vals[5])
+        except (TypeError, ValueError):
+            var_msg = (f"Logging the issue failed, the step number can not be "
+                       f"converted to int, values: {list_vals}")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        var_issue_id = self.__var_offset + len(self)
+        for col, value in zip(list_issue_columns, list_vals):
+            self.__dict_columns[col].append(value)
+        self.__dict_columns["step_number"][-1] = var_step_no
+        var_issue_idx = list_vals[11]
+        if type(var_issue_idx).__name__ in ["ndarray", "list"] or isinstance(
+                var_issue_idx, pd.Index):
+            self.__dict_idx[var_issue_id] = np.asarray(var_issue_idx)
+            self.__dict_columns["issue_idx"][-1] = None
+        self.__dict_step_counts[var_step_no] = (
+            self.__dict_step_counts.get(var_step_no, 0) + 1)
+        self.__df_issues = None
+        if (self.__issue_sink is not None) and self.__issue_sink.is_due(
+                var_issue_id + 1 - self.__var_flushed):
+            self.flush()
+        return var_issue_id
+
+    def flush(self):
+        """
+        Write any issues not yet written to the `IssueSink`, if there is one.
+        """
+        if self.__issue_sink is None:
+            return
+        var_end = self.__var_offset + len(self)
+        if self.__var_flushed >= var_end:
+            return
+        module_logger.info("Starting `flush`")
+        self.__issue_sink.write(
+            self.__form_table(True, self.__var_flushed - self.__var_offset))
+        self.__var_flushed = var_end
+        if not self.__issue_sink.retain:
+            self.__dict_columns = {col: list() for col in list_issue_columns}
+            self.__dict_idx = dict()
+            self.__df_issues = None
+            self.__var_offset = var_end
+        module_logger.info("Completed `flush`")
+
+    def get_issue_idx(self, issue_id):
+        """
+        The index values recorded against an issue as an array.
+        """
+        if issue_id not in self:
+            var_msg = (f"The requested issue index, {issue_id}, is not "
+                       f"present in the `df_issues` table")
+            module_logger.error(var_msg)
+            raise AttributeError(var_msg)
+        if issue_id in self.__dict_idx:
+            return self.__dict_idx[issue_id]
+        var_issue_idx = self.__dict_columns["issue_idx"][
+            issue_id - self.__var_offset]
+        if (type(var_issue_idx).__name__ != "str") or (
+                len(var_issue_idx) == 0):
+            return np.array([], dtype=int)
+        return np.array([int(item) for item in var_issue_idx.split(", ")])
+
+    def get_issue(self, issue_id):
+        """
+        A single row `df_issues` table for the issue id.
+        """
+        if issue_id not in self:
+            var_msg = (f"The requested issue index, {issue_id}, is not "
+                       f"present in the `df_issues` table")
+            module_logger.error(var_msg)
+            raise AttributeError(var_msg)
+        dict_issue = {
+            col: [self.__dict_columns[col][issue_id - self.__var_offset]] for
+            col in list_issue_columns}
+        if issue_id in self.__dict_idx:
+            dict_issue["issue_idx"] = [
+                func_issue_idx_to_str(self.__dict_idx[issue_id])]
+        return pd.DataFrame(
+            dict_issue, columns=list_issue_columns, index=[issue_id])
+
+    def get_table(self, idx_as_str=True):
+        """
+        Form the `df_issues` table from the logged issues, the table is kept
+        until the next issue is logged.
+
+        If `idx_as_str` is False the `issue_idx` column holds the arrays as
+        recorded rather than the comma separated strings.
+        """
+        if not idx_as_str:
+            return self.__form_table(idx_as_str)
+        if self.__df_issues is None:
+            self.__df_issues = self.__form_table(idx_as_str)
+        return self.__df_issues.copy()
+
+    def __form_table(self, idx_as_str, start=0):
+        if len(self) - start <= 0:
+            df_issues = pd.DataFrame(columns=list_issue_columns)
+        else:
+            dict_columns = {
+                col: self.__dict_columns[col][start:] for
+                col in list_issue_columns}
+            for var_issue_id, var_issue_idx in self.__dict_idx.items():
+                var_position = var_issue_id - self.__var_offset - start
+                if var_position < 0:
+                    continue
+                dict_columns["issue_idx"][var_position] = (
+                    func_issue_idx_to_str(var_issue_idx) if idx_as_str else
+                    var_issue_idx)
+            df_issues = pd.DataFrame(
+                dict_columns, columns=list_issue_columns,
+                index=pd.RangeIndex(
+                    self.__var_offset + start, self.__var_offset + len(self)))
+        df_issues["step_number"] = df_issues["step_number"].astype(int)
+        return df_issues
+
+    def get_counters(self):
+        """
+        The issue id of the first issue held, the issue id up to which the
+        issues have been written to the `IssueSink`, and the count of the
+        issues of each step number, including those written and no longer
+        held, for `set_table` to carry on from.
+        """
+        return (
+            self.__var_offset, self.__var_flushed,
+            dict(self.__dict_step_counts))
+
+    def set_table(self, df_issues, offset=0, flushed=None,
+                  dict_step_counts=None):
+        """
+        Replace the logged issues with the rows of an existing `df_issues`
+        table. The rows are taken as already written to the `IssueSink`, if
+        there is one, so are not written again.
+
+        The counters of `get_counters` can be given to carry on from them,
+        with `offset` as the issue id of the first row, `flushed` as the
+        issue id up to which the issues have been written, and
+        `dict_step_counts` as the counts of the issues of each step number.
+        """
+        module_logger.info("Starting `set_table`")
+        if type(df_issues).__name__ != "DataFrame":
+            var_msg = "The `df_issues` argument is not a DataFrame as required"
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        list_missing = [
+            col for col in list_issue_columns if
+            col not in df_issues.columns.tolist()]
+        if len(list_missing) > 0:
+            var_msg = (f"The `df_issues` argument is missing the columns: "
+                       f"{', '.join(list_missing)}")
+            module_logger.error(var_msg)
+            raise ValueError(var_msg)
+        self.__reset()
+        self.__var_offset = offset
+        issue_sink = self.__issue_sink
+        self.__issue_sink = None
+        try:
+            for list_vals in df_issues[list_issue_columns].values.tolist():
+                self.append(list_vals)
+        finally:
+            self.__issue_sink = issue_sink
+        self.__var_flushed = (
+            self.__var_offset + len(self) if flushed is None else flushed)
+        if dict_step_counts is not None:
+            self.__dict_step_counts = dict(dict_step_counts)
+        module_logger.info("Completed `set_table`")
+
+    def get_issue_count(self, issue_number_min=None, issue_number_max=None):
+        """
+        The count of all the issues logged, including any already written out
+        by an `IssueSink`.
+        """
+        var_count = 0
+        for var_step_no, var_step_count in self.__dict_step_counts.items():
+            if (issue_number_min is not None) and (
+                    var_step_no < issue_number_min):
+                continue
+            if (issue_number_max is not None) and (
+                    var_step_no > issue_number_max):
+                continue
+            var_count += var_step_count
+        return var_count
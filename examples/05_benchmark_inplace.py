@@ -0,0 +1,78 @@
+# This script compares the peak memory of the `DataCuration` steps run with
+# and without `set_inplace(True)`, each run is in its own process so the peak
+# resident set size of one does not carry over to the other
+#
+# Run as: python 05_benchmark_inplace.py [rows]
+#
+# With pandas 1.5.3 and four tables of the rows, the peak is set by
+# `assert_nulls` unless it sets the null values in place:
+#     1,000,000 rows: inplace=False 281 MB, inplace=True 224 MB
+#     3,000,000 rows: inplace=False 699 MB, inplace=True 461 MB
+import sys
+import resource
+import subprocess
+
+import pandas as pd
+import numpy as np
+
+dict_convert = {
+    'float': {
+        'columns': ['value_1', 'value_2'],
+        'dtypes': ['float'],
+        'functions': {
+            1: lambda df, col, **kwargs: df[col].astype(float)
+        }
+    }
+}
+
+dict_alter = {
+    'total': {
+        'type': 'new_col',
+        'col_name': 'total',
+        'function': lambda df, keys, **kwargs: df['value_1'] + df['value_2']
+    }
+}
+
+
+def func_run(var_rows, inplace):
+    from data_etl import DataCuration
+
+    # The values are taken from small pools of strings so forming the tables
+    # does not set the peak itself
+    rng = np.random.default_rng(0)
+    arr_values = np.array(
+        [str(value) for value in rng.random(1000).round(4)], dtype=object)
+    arr_values_2 = np.array(['1.5', '2', 'nan', ''], dtype=object)
+    arr_codes = np.array(['A', 'B', 'C'], dtype=object)
+    dict_tables = {
+        f'file_{i} -:- sheet': pd.DataFrame({
+            'value_1': arr_values[rng.integers(0, 1000, var_rows)],
+            'value_2': arr_values_2[rng.integers(0, 4, var_rows)],
+            'code': arr_codes[rng.integers(0, 3, var_rows)]
+        })
+        for i in range(4)
+    }
+    var_rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    data = DataCuration('benchmark', 'inplace')
+    data.set_inplace(inplace)
+    data.set_table(dict_tables)
+    del dict_tables
+    data.assert_nulls()
+    data.convert_columns(dictionary=dict_convert)
+    data.alter_tables(dictionary=dict_alter)
+    data.set_headers(function=lambda col: col.upper())
+    var_rss_end = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # `ru_maxrss` is in kilobytes on Linux
+    print(f"inplace={inplace}: peak RSS {var_rss_end / 1024:.0f} MB, "
+          f"{(var_rss_end - var_rss_start) / 1024:.0f} MB above the tables")
+
+
+if __name__ == "__main__":
+    if (len(sys.argv) > 2) and (sys.argv[2] in ['True', 'False']):
+        func_run(int(sys.argv[1]), sys.argv[2] == 'True')
+    else:
+        var_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+        for inplace in [False, True]:
+            subprocess.run(
+                [sys.executable, __file__, str(var_rows), str(inplace)],
+                check=True)
@@ -2,7 +2,6 @@
 # that are required for specific data sets
 import logging
 from datetime import datetime
-import pickle
 # This is only used to create a table, usually this would already be done
 import sqlite3
 
@@ -92,10 +91,9 @@ if __name__ == "__main__":
     data.set_step_no(6)
     data.form_summary_tables(path='.', script_name='reporting_1')
 
-    # Temporary snapshot for testing
-    pickle.dump(
-        {'data': data, 'checks': check, 'report': reporting, 'cnx': cnxs},
-        open("../data/dict_dc.pkl", "wb"))
+    # Checkpoint for testing, a rerun can carry on from here with
+    # `data.resume('../data/checkpoints')`
+    data.checkpoint('../data/checkpoints')
 
     # Log issues found
     cnxs.write_to_db('df_issues', data.df_issues)
@@ -14,16 +14,26 @@ def list_the_files(path):
     return list_files
 
 
-def read_files(list_files):
+def read_files(list_files, na_values=None):
     dict_files = dict()
     for file in list_files:
-        xl = pd.ExcelFile(file)
-        for sheet in xl.sheet_names:
-            df = xl.parse(
-                sheet_name=sheet, dtype=str, keep_default_na=False, header=None)
-            key = '{} -:- {}'.format(
-                file.split('\\')[-1].lower().replace('.xlsx', ''), sheet)
-            dict_files[key] = df.copy()
+        dict_files.update(read_file(file, na_values))
+    return dict_files
+
+
+def read_file(file, na_values=None):
+    # For `reading_in` with `per_file=True`, so the files can be read in
+    # parallel. The `na_values`, such as ["nan", ""], are made nulls as the
+    # sheets are parsed, in place of `assert_nulls`
+    dict_files = dict()
+    xl = pd.ExcelFile(file)
+    for sheet in xl.sheet_names:
+        df = xl.parse(
+            sheet_name=sheet, dtype=str, keep_default_na=False, header=None,
+            na_values=na_values)
+        key = '{} -:- {}'.format(
+            file.split('\\')[-1].lower().replace('.xlsx', ''), sheet)
+        dict_files[key] = df.copy()
     return dict_files
 
 
@@ -1,10 +1,15 @@
 from datetime import datetime
+from functools import partial
+import os
 import pickle
+import sqlite3
 
+import pytest
 import pandas as pd
 import numpy as np
 
-from data_curation import DataCuration, Checks
+from data_curation import DataCuration, Checks, Connections, IssueLog, \
+    IssueSink, FileCache, func_by_unique
 
 
 var_cnv_1_start_time = datetime.now()
@@ -241,3 +246,1014 @@ def test_alter_1():
     data_alter_1.alter_tables(dictionary=dict_alter_1, df_mapping=df_mapping)
     assert data_alter_1.df_issues.fillna('').equals(
         df_alter_1_expected_df_issues.fillna(''))
+
+
+var_issue_log_1_start_time = datetime.now()
+issue_log_1 = IssueLog()
+data_issue_log_1 = DataCuration(
+    var_issue_log_1_start_time, 'test', issue_log=issue_log_1)
+check_issue_log_1 = Checks(
+    var_issue_log_1_start_time, 'test', issue_log=issue_log_1)
+
+
+def test_issue_log_1():
+    data_issue_log_1.set_step_no(1)
+    for i in range(3):
+        data_issue_log_1.error_handling(
+            'file', np.nan, '', f'issue {i}', 'col', 1, '0')
+    check_issue_log_1.set_step_no(2)
+    check_issue_log_1.error_handling(
+        'file', np.nan, 'check', '', 'col', 2, '0, 1')
+    assert data_issue_log_1.df_issues.shape == (4, 13)
+    assert check_issue_log_1.df_issues['step_number'].tolist() == [1, 1, 1, 2]
+    assert data_issue_log_1.get_issue_count(1, 1) == 3
+    assert check_issue_log_1.get_issue_count(2) == 1
+    assert check_issue_log_1.get_issue_count() == 4
+
+
+check_table_look_1 = Checks(datetime.now(), 'test')
+df_table_look_1 = pd.DataFrame([1, -3, 2, -1], columns=['number'])
+
+
+def test_table_look_1():
+    check_table_look_1.apply_checks(
+        df_table_look_1,
+        dictionary={
+            'Number should be greater than 0': {
+                'calc_condition': lambda df, col, **kwargs: df['number'] <= 0
+            }
+        }
+    )
+    assert check_table_look_1.df_issues['issue_idx'].tolist() == ['1, 3']
+    df_issue, df_look = check_table_look_1.table_look(df_table_look_1, 0)
+    assert df_issue['issue_count'].tolist() == [2]
+    assert df_look['number'].tolist() == [-3, -1]
+
+
+def test_issue_sink_1(tmp_path):
+    var_db_path = str(tmp_path / 'issues.db')
+    cnxs = Connections()
+    cnxs.add_cnx(
+        cnx_key='df_issues', cnx_type='sqlite3', table_name='df_issues',
+        file_path=var_db_path, sqlite_df_issues_create=True)
+    check_sink = Checks(
+        datetime.now(), 'test',
+        issue_sink=IssueSink(cnxs, 'df_issues', batch_size=2))
+    check_sink.apply_checks(
+        pd.DataFrame([(1, -3, 2), (-1, 0, 5)], columns=['a', 'b', 'c']),
+        dictionary={
+            'Number should be greater than 0': {
+                'columns': ['a', 'b', 'c'],
+                'calc_condition': lambda df, col, **kwargs: df[col] <= 0
+            }
+        }
+    )
+    assert check_sink.get_issue_count() == 2
+    assert check_sink.df_issues.shape[0] == 0
+    df_written = cnxs.read_from_db('df_issues', 'SELECT * FROM df_issues')
+    assert df_written['column'].tolist() == ['a', 'b']
+
+
+def test_issue_sink_2(tmp_path):
+    var_db_path = str(tmp_path / 'issues.db')
+    cnxs = Connections()
+    cnxs.add_cnx(
+        cnx_key='df_issues', cnx_type='sqlite3', table_name='df_issues',
+        file_path=var_db_path, sqlite_df_issues_create=True)
+    data_sink = DataCuration(
+        datetime.now(), 'test',
+        issue_sink=IssueSink(cnxs, 'df_issues', batch_size=1, retain=True))
+    for i in range(2):
+        data_sink.error_handling(
+            'file', np.nan, '', f'issue {i}', np.nan, 1, np.nan)
+    data_sink.df_issues = data_sink.df_issues
+    data_sink.error_handling('file', np.nan, '', 'issue 2', np.nan, 1, np.nan)
+    df_written = cnxs.read_from_db('df_issues', 'SELECT * FROM df_issues')
+    assert df_written['issue_long_desc'].tolist() == [
+        'issue 0', 'issue 1', 'issue 2']
+
+
+df_batch_1 = pd.DataFrame(
+    [(1, np.nan, 3), (np.nan, 2, 3), (4, np.nan, np.nan)],
+    columns=['a', 'b', 'c'])
+
+
+def test_batch_1():
+    dict_check = {
+        'columns': ['a', 'b', 'c'],
+        'calc_condition': lambda df, col, **kwargs: df[col].isnull()
+    }
+    check_single = Checks(datetime.now(), 'test')
+    check_single.apply_checks(
+        df_batch_1, dictionary={'Not null': dict(dict_check)})
+    check_batch = Checks(datetime.now(), 'test')
+    check_batch.apply_checks(
+        df_batch_1, dictionary={'Not null': dict(dict_check, batch=True)})
+    assert check_batch.df_issues['issue_idx'].tolist() == ['1', '0, 2', '2']
+    assert check_batch.df_issues.drop('grouping', axis=1).equals(
+        check_single.df_issues.drop('grouping', axis=1))
+
+
+def test_batch_2(caplog):
+    list_described = list()
+
+    def func_long_description(df, col, condition, **kwargs):
+        list_described.append(col)
+        return 1
+
+    dict_check = {
+        'columns': ['a', 'b', 'c'],
+        'calc_condition': lambda df, col, **kwargs: df[col] > 3,
+        'long_description': func_long_description
+    }
+    list_results = list()
+    for batch in [False, True]:
+        for debug in [False, True]:
+            list_described.clear()
+            caplog.clear()
+            check_debug = Checks(datetime.now(), 'test')
+            check_debug.set_debug(debug)
+            check_debug.apply_checks(
+                df_batch_1,
+                dictionary={'Over 3': dict(dict_check, batch=batch)})
+            assert list_described == (['a', 'b', 'c'] if debug else ['a'])
+            assert (
+                ("`var_long_description` is not a string" in caplog.text) is
+                debug)
+            list_results.append(check_debug.df_issues.drop('grouping', axis=1))
+    for df_issues in list_results[1:]:
+        assert df_issues.equals(list_results[0])
+
+
+def test_executor_1():
+    dict_tables = {
+        f'file_{i} -:- sheet': pd.DataFrame(
+            [(i, -i), (-1, 2), (3, i - 2)], columns=['a', 'b'])
+        for i in range(4)
+    }
+    dict_check = {
+        'Number should be greater than 0': {
+            'columns': ['a', 'b'],
+            'calc_condition': lambda df, col, **kwargs: df[col] <= 0
+        }
+    }
+    check_serial = Checks(datetime.now(), 'test')
+    check_serial.apply_checks(dict_tables, dictionary=dict_check)
+    check_thread = Checks(datetime.now(), 'test')
+    check_thread.apply_checks(
+        dict_tables, dictionary=dict_check, executor='thread', max_workers=3)
+    assert check_thread.df_issues.drop('grouping', axis=1).equals(
+        check_serial.df_issues.drop('grouping', axis=1))
+
+
+def test_executor_2():
+    cloudpickle = pytest.importorskip('cloudpickle')
+    dict_tables = {
+        f'file_{i} -:- sheet': df_batch_1.iloc[i:] for i in range(3)}
+    dict_check = {
+        'Not null': {
+            'columns': ['a', 'b', 'c'],
+            'calc_condition': lambda df, col, **kwargs: df[col].isnull()
+        },
+        'Not null batch': {
+            'columns': ['a', 'b', 'c'],
+            'calc_condition': lambda df, col, **kwargs: df[col].isnull(),
+            'batch': True
+        }
+    }
+    check_serial = Checks(datetime.now(), 'test')
+    check_serial.apply_checks(dict_tables, dictionary=dict_check)
+    check_process = Checks(datetime.now(), 'test')
+    check_process.apply_checks(
+        dict_tables, dictionary=dict_check, executor='process',
+        max_workers=2)
+    assert check_process.df_issues.shape[0] == 16
+    assert check_process.df_issues.drop('grouping', axis=1).equals(
+        check_serial.df_issues.drop('grouping', axis=1))
+
+    # The default functions are still known as the defaults in the workers
+    plan = check_serial.compile_checks(dictionary=dict_check)
+    dict_sent = cloudpickle.loads(
+        cloudpickle.dumps(plan.get_check('Not null batch')))
+    for key in ['check_condition', 'count_condition', 'index_position']:
+        assert dict_sent[key] is not plan.get_check('Not null batch')[key]
+        assert dict_sent[key]._check_default == key
+
+
+def test_check_plan_1():
+    check_plan = Checks(datetime.now(), 'test')
+    check_plan.set_defaults(idx_flag=False)
+    plan = check_plan.compile_checks(
+        dictionary={
+            'Number should be greater than 0': {
+                'columns': 'number',
+                'calc_condition': lambda df, col, **kwargs: df[col] <= 0
+            }
+        }
+    )
+    assert plan.get_check('Number should be greater than 0')['columns'] == [
+        'number']
+    for step_no in [1, 2]:
+        check_plan.set_step_no(step_no)
+        check_plan.apply_checks(df_table_look_1, plan=plan)
+    assert check_plan.df_issues['step_number'].tolist() == [1, 2]
+    assert check_plan.df_issues['issue_idx'].tolist() == ['0, 2', '0, 2']
+    with pytest.raises(ValueError):
+        check_plan.compile_checks(
+            dictionary={'Bad': {'calc_condition': lambda df: df}})
+    with pytest.raises(ValueError):
+        check_plan.compile_checks(
+            dictionary={'Bad': {'calc_condition': lambda df, col: df}})
+
+    def func_below(df, col, limit=0, **kwargs):
+        return df[col] <= limit
+
+    plan_forms = check_plan.compile_checks(dictionary={
+        'Short kwargs': {
+            'columns': 'number',
+            'calc_condition': lambda df, col, **kw: df[col] <= 0},
+        'Partial': {
+            'columns': 'number',
+            'calc_condition': partial(func_below, limit=1)},
+        'Defaulted': {'columns': 'number', 'calc_condition': func_below}
+    })
+    assert len(plan_forms.keys()) == 3
+    with pytest.raises(ValueError):
+        check_plan.compile_checks(dictionary={
+            'Renamed': {'calc_condition': lambda d, c, **kwargs: d[c] <= 0}})
+    with pytest.raises(ValueError):
+        check_plan.set_defaults(
+            check_condition=lambda df, column, condition, **kwargs: True)
+
+
+df_spec_1 = pd.DataFrame(
+    [
+        (1, 'A', 'a', 'AB12'),
+        (-3, 'B', 'c', 'AB1'),
+        (np.nan, 'E', 'z', np.nan),
+        (45, 'A', 'z', 'XY99')
+    ],
+    columns=['number', 'category_1', 'category_2', 'code']
+)
+
+
+def test_spec_1():
+    check_spec = Checks(datetime.now(), 'test')
+    check_spec.apply_checks(
+        df_spec_1,
+        dictionary={
+            'Not null': {'type': 'not_null', 'columns': ['number', 'code']},
+            'Range': {'type': 'range', 'columns': 'number', 'min': 0,
+                      'max': 40},
+            'In list': {'type': 'isin', 'columns': ['category_1'],
+                        'values': ['A', 'B']},
+            'Pattern': {'type': 'regex', 'columns': ['code'],
+                        'pattern': r'[A-Z]{2}\d{2}'},
+            'Mapping': {'type': 'mapping',
+                        'columns': ['category_1', 'category_2'],
+                        'mapping': {'A': ['a', 'z'], 'B': ['b']}}
+        }
+    )
+    assert check_spec.df_issues[
+        ['issue_short_desc', 'column', 'issue_idx']].values.tolist() == [
+        ['Not null', 'number', '2'],
+        ['Not null', 'code', '2'],
+        ['Range', 'number', '1, 3'],
+        ['In list', 'category_1', '2'],
+        ['Pattern', 'code', '1'],
+        ['Mapping', 'category_1, category_2', '1, 2']
+    ]
+
+
+def test_summary_1():
+    check_summary = Checks(datetime.now(), 'test')
+    dict_summary = check_summary.summary(dictionary={
+        'Unique': {'type': 'unique', 'columns': ['a']},
+        'Range': {'type': 'range', 'columns': 'number', 'min': 0},
+        'Positive': {
+            'columns': ['number'],
+            'calc_condition': lambda df, col, **kwargs: df[col] <= 0}
+    })
+    df_summary = dict_summary['df'].set_index('check')
+    assert df_summary.loc['Unique', 'calc_condition'] == 'type: unique'
+    assert df_summary.loc['Range', 'calc_condition'] == 'type: range, min: 0'
+    assert df_summary.loc['Range', 'columns'] == ['number']
+    assert df_summary.loc['Range', 'batch'] is True
+    assert df_summary.loc['Positive', 'calc_condition'].startswith(
+        'df[col] <= 0')
+
+
+def test_chunks_1():
+    dict_chunk_checks = {
+        'Not null': {'type': 'not_null', 'columns': ['number', 'code']},
+        'Range': {'type': 'range', 'columns': 'number', 'min': 0, 'max': 40}
+    }
+    check_whole = Checks(datetime.now(), 'test')
+    check_whole.apply_checks(df_spec_1, dictionary=dict_chunk_checks)
+    check_chunks = Checks(datetime.now(), 'test')
+    check_chunks.apply_checks(
+        (df_spec_1.iloc[i:i + 3] for i in range(0, df_spec_1.shape[0], 3)),
+        dictionary=dict_chunk_checks
+    )
+    list_cols = ['issue_short_desc', 'column', 'issue_count', 'issue_idx']
+    assert check_chunks.df_issues[list_cols].values.tolist() == \
+        check_whole.df_issues[list_cols].values.tolist()
+    list_chunks = [
+        df_spec_1.iloc[i:i + 3].set_axis(
+            [f'r{j}' for j in range(i, min(i + 3, df_spec_1.shape[0]))])
+        for i in range(0, df_spec_1.shape[0], 3)]
+    check_index = Checks(datetime.now(), 'test')
+    check_index.apply_checks(iter(list_chunks), dictionary=dict_chunk_checks)
+    assert check_index.df_issues[list_cols].values.tolist() == \
+        check_whole.df_issues[list_cols].values.tolist()
+    assert list_chunks[0].index.tolist() == ['r0', 'r1', 'r2']
+
+    # A duplicate split across the chunks is only found in a single pass
+    df_unique = pd.DataFrame({'a': [1, 2, 3, 1, 5, 6]})
+    dict_unique = {'Unique': {'type': 'unique', 'columns': ['a']}}
+    check_unique = Checks(datetime.now(), 'test')
+    check_unique.apply_checks(df_unique, dictionary=dict_unique)
+    assert check_unique.df_issues['issue_idx'].tolist() == ['0, 3']
+    for dict_check in [
+        dict_unique,
+        {'Row wise': {
+            'columns': ['a'], 'row_wise': False,
+            'calc_condition': lambda df, col, **kwargs: df[col].duplicated()}},
+        {'Over 1': {
+            'columns': ['a'],
+            'calc_condition': lambda df, col, **kwargs: df[col] > 5,
+            'check_condition':
+                lambda df, col, condition, **kwargs: condition.sum() > 1}}
+    ]:
+        with pytest.raises(ValueError):
+            check_unique.apply_checks(
+                iter([df_unique.iloc[:3], df_unique.iloc[3:]]),
+                dictionary=dict_check)
+
+
+def test_check_profile_1(tmp_path):
+    check_profile = Checks(datetime.now(), 'test')
+    check_profile.set_profile(True, memory=True)
+    check_profile.apply_checks(
+        {'file -:- sheet': df_spec_1},
+        dictionary={
+            'Not null': {'type': 'not_null', 'columns': ['number', 'code']},
+            'Positive': {
+                'columns': ['number'],
+                'calc_condition': lambda df, col, **kwargs: df[col] < 0}
+        }
+    )
+    df_profile = check_profile.df_check_profile
+    assert df_profile[['file', 'sub_file', 'check', 'column', 'rows']
+                      ].values.tolist() == [
+        ['file', 'sheet', 'Not null', 'number', 4],
+        ['file', 'sheet', 'Not null', 'code', 4],
+        ['file', 'sheet', 'Positive', 'number', 4]
+    ]
+    assert (df_profile['calc_time'] >= 0).all()
+    assert df_profile['peak_memory'].notnull().all()
+    assert (df_profile['peak_memory'] >= 0).all()
+    with pytest.raises(ValueError):
+        check_profile.apply_checks(
+            df_spec_1, executor='thread',
+            dictionary={'Not null': {'type': 'not_null', 'columns': ['code']}})
+    cnxs = Connections()
+    cnxs.add_cnx(
+        'profile', 'sqlite3', 'df_check_profile',
+        file_path=str(tmp_path / 'profile.db'),
+        sqlite_df_check_profile_create=True)
+    cnxs.write_to_db('profile', df_profile)
+    assert cnxs.read_from_db(
+        'profile', 'SELECT * FROM df_check_profile').shape[0] == 3
+
+
+def func_read_file(file, **kwargs):
+    var_name = file.split('/')[-1].replace('.csv', '')
+    return {
+        f'{var_name} -:- {sheet}': pd.read_csv(file) for sheet in ['a', 'b']}
+
+
+def test_reading_in_1(tmp_path):
+    list_files = list()
+    for var_name in ['f_3', 'f_1', 'f_2']:
+        var_path = str(tmp_path / f'{var_name}.csv')
+        pd.DataFrame({'x': [1, 2]}).to_csv(var_path, index=False)
+        list_files.append(var_path)
+    list_files.insert(1, str(tmp_path / 'missing.csv'))
+    for executor in [None, 'thread']:
+        data_read = DataCuration(datetime.now(), 'test')
+        data_read.set_file_list(list_files)
+        data_read.reading_in(
+            function=func_read_file, per_file=True, executor=executor,
+            max_workers=2)
+        assert list(data_read.tables.keys()) == [
+            'f_3 -:- a', 'f_3 -:- b', 'f_1 -:- a', 'f_1 -:- b', 'f_2 -:- a',
+            'f_2 -:- b']
+        assert data_read.df_issues['file'].tolist() == [list_files[1]]
+
+
+list_cache_reads = list()
+
+
+def func_read_file_count(file, **kwargs):
+    list_cache_reads.append(file)
+    return {f"{file.split('/')[-1]} -:- a": pd.read_csv(file)}
+
+
+def test_file_cache_1(tmp_path, monkeypatch):
+    list_files = list()
+    for var_name in ['f_1', 'f_2', 'f_3']:
+        var_path = str(tmp_path / f'{var_name}.csv')
+        pd.DataFrame({'x': [1, 2], 'y': ['a', 'b']}).to_csv(
+            var_path, index=False)
+        list_files.append(var_path)
+    cache = FileCache(str(tmp_path / 'cache'), file_format='pickle')
+    list_writes = list()
+    func_write_manifest = FileCache._FileCache__write_manifest
+    monkeypatch.setattr(
+        FileCache, '_FileCache__write_manifest',
+        lambda self: list_writes.append(func_write_manifest(self)))
+    for _ in range(2):
+        data_cache = DataCuration(datetime.now(), 'test')
+        data_cache.set_file_list(list_files)
+        data_cache.reading_in(
+            function=func_read_file_count, per_file=True, cache=cache)
+    assert list_cache_reads == list_files
+    # Once when the files are put in the cache and once when read from it
+    assert len(list_writes) == 2
+    assert data_cache.tables['f_2.csv -:- a'].equals(
+        pd.read_csv(list_files[1]))
+    cache.invalidate(list_files[0])
+    assert len(cache) == 2
+    cache_small = FileCache(
+        str(tmp_path / 'cache'), max_size=cache.get_size(),
+        file_format='pickle')
+    cache_small.put(list_files[0], func_read_file_count, {
+        'f_1.csv -:- a': pd.read_csv(list_files[0])})
+    assert len(cache_small) == 2
+    assert cache_small.get(list_files[1], func_read_file_count) is None
+
+    # The default format works whether or not `pyarrow` is installed
+    cache_default = FileCache(str(tmp_path / 'cache_default'))
+    cache_default.put(list_files[1], func_read_file_count, {
+        'f_2.csv -:- a': pd.read_csv(list_files[1])})
+    assert cache_default.get(list_files[1], func_read_file_count)[
+        'f_2.csv -:- a'].equals(pd.read_csv(list_files[1]))
+
+
+def func_read_file_na(file, na_values=None, **kwargs):
+    return {'df -:- a': pd.read_csv(file, na_values=na_values)}
+
+
+def test_file_cache_2(tmp_path):
+    var_path = str(tmp_path / 'na.csv')
+    pd.DataFrame({'y': ['NA_', 'b']}).to_csv(var_path, index=False)
+    cache = FileCache(str(tmp_path / 'cache'), file_format='pickle')
+    for list_na, list_expected in [
+        (None, ['NA_', 'b']), (['NA_'], [True, False]),
+        (None, ['NA_', 'b'])
+    ]:
+        data_cache = DataCuration(datetime.now(), 'test')
+        data_cache.set_file_list([var_path])
+        data_cache.reading_in(
+            function=func_read_file_na, per_file=True, cache=cache,
+            na_values=list_na)
+        s_y = data_cache.tables['df -:- a']['y']
+        if list_na is None:
+            assert s_y.tolist() == list_expected
+        else:
+            assert s_y.isnull().tolist() == list_expected
+    assert len(cache) == 2
+
+
+def test_incremental_1(tmp_path):
+    var_folder = tmp_path / 'files'
+    var_folder.mkdir()
+    for var_name in ['f_1', 'f_2']:
+        (var_folder / f'{var_name}.csv').write_text('x\n1\n')
+    cnxs = Connections()
+    cnxs.add_cnx(
+        'manifest', 'sqlite3', 'file_manifest',
+        file_path=str(tmp_path / 'manifest.db'),
+        sqlite_file_manifest_create=True)
+
+    def func_list_files(path):
+        return sorted([str(path / file) for file in os.listdir(path)])
+
+    data_inc = DataCuration(datetime.now(), 'test')
+    data_inc.set_file_manifest(cnxs, 'manifest')
+    data_inc.find_files(
+        function=func_list_files, files_path=var_folder, incremental=True)
+    assert len(data_inc.list_files) == 2
+    data_inc.set_file_status('processed')
+    (var_folder / 'f_2.csv').write_text('x\n2\n')
+    (var_folder / 'f_3.csv').write_text('x\n3\n')
+    data_inc.find_files(
+        function=func_list_files, files_path=var_folder, incremental=True)
+    assert [file.split(os.sep)[-1] for file in data_inc.list_files] == [
+        'f_2.csv', 'f_3.csv']
+
+
+def test_stream_1(tmp_path):
+    df_stream = pd.DataFrame({
+        'number': ['1', 'nan', '3', '', '5', '-6', '7'],
+        'code': ['A', 'B', '', 'D', 'E', 'F', 'nan']
+    })
+    data_stream = DataCuration(datetime.now(), 'test')
+    check_stream = Checks(
+        datetime.now(), 'test', issue_log=data_stream.get_issue_log())
+    var_file_path = str(tmp_path / 'stream.csv')
+    data_stream.stream(
+        (df_stream.iloc[i:i + 3].copy() for i in range(0, 7, 3)),
+        [
+            {'step': 'assert_nulls', 'step_no': 1},
+            {'step': 'apply_checks', 'step_no': 2, 'checks': check_stream,
+             'kwargs': {'dictionary': {
+                 'Not null': {'type': 'not_null', 'columns': ['code']}}}}
+        ],
+        file_path=var_file_path
+    )
+    assert data_stream.df_issues[
+        ['step_number', 'column', 'issue_idx']].values.tolist() == [
+        [2, 'code', '2'], [2, 'code', '6']]
+    assert pd.read_csv(var_file_path)['number'].isnull().sum() == 2
+    assert data_stream.tables == dict()
+    list_chunks = [
+        df_stream.iloc[i:i + 3].set_axis(
+            [f'r{j}' for j in range(i, min(i + 3, 7))])
+        for i in range(0, 7, 3)]
+    data_stream.stream(
+        iter(list_chunks), [{'step': 'assert_nulls', 'step_no': 1}],
+        file_path=var_file_path)
+    assert list_chunks[1].index.tolist() == ['r3', 'r4', 'r5']
+
+
+def test_lazy_1():
+    dict_lazy_convert = {
+        'int': {
+            'columns': ['int'],
+            'dtypes': ['int'],
+            'functions': {1: lambda df, col, **kwargs: df[col].astype(int)},
+            'idx_function': lambda df, col, **kwargs: ~df[col].fillna(
+                '').str.match(r'^-?\d+$')
+        }
+    }
+    list_data = list()
+    for lazy in [False, True]:
+        data_lazy = DataCuration('lazy', 'test')
+        data_lazy.set_table({'df_lazy': df_convert_issues.copy()})
+        data_lazy.set_lazy(lazy)
+        data_lazy.set_step_no(1)
+        data_lazy.assert_nulls(['b'])
+        data_lazy.assert_nulls(['A'])
+        data_lazy.set_step_no(2)
+        data_lazy.convert_columns(dictionary=dict_lazy_convert)
+        data_lazy.set_step_no(3)
+        data_lazy.set_headers(function=lambda col: col.upper())
+        assert len(data_lazy.get_plan()) == (4 if lazy else 0)
+        list_data.append(data_lazy)
+    data_eager, data_lazy = list_data
+    assert data_lazy.get_issue_count() == data_eager.get_issue_count() == 1
+    assert len(data_lazy.get_plan()) == 0
+    assert data_lazy.tables['df_lazy'].equals(data_eager.tables['df_lazy'])
+    assert data_lazy.df_issues.equals(data_eager.df_issues)
+    assert data_lazy.df_issues['step_number'].tolist() == [2]
+    assert data_lazy.get_step_no() == 3
+
+
+def test_lazy_2():
+    data_lazy = DataCuration('lazy', 'test')
+    data_lazy.set_table({'df_lazy': df_convert_issues.copy()})
+    data_lazy.set_lazy(True)
+    data_lazy.assert_nulls(['b'])
+    data_lazy.set_headers(function=lambda col: col.upper())
+    data_lazy.convert_columns(dictionary={
+        'int': {'columns': ['int'], 'dtypes': ['int'], 'type': 'int'}})
+    data_lazy.set_headers(function=lambda col: col + '_')
+    with pytest.raises(ValueError):
+        data_lazy.collect()
+    assert [step for step, _, _ in data_lazy.get_plan()] == [
+        'convert_columns', 'set_headers']
+    with pytest.raises(ValueError):
+        data_lazy.collect()
+    assert len(data_lazy.get_plan()) == 2
+
+    data_issues = DataCuration('lazy', 'test')
+    data_issues.set_table({'df_lazy': df_convert_issues.copy()})
+    data_issues.set_lazy(True)
+    data_issues.convert_columns(dictionary={
+        'int': {'columns': ['int'], 'dtypes': ['int'], 'type': 'int'}})
+    assert data_issues.df_issues['column'].tolist() == ['int']
+    assert len(data_issues.get_plan()) == 0
+
+
+def test_inplace_1():
+    df_inplace = df_convert_issues.copy()
+    data_inplace = DataCuration(datetime.now(), 'test')
+    data_inplace.set_inplace(True)
+    data_inplace.set_table({'df_inplace': df_inplace})
+    dict_snapshot = data_inplace.snapshot()
+    data_inplace.alter_tables(dictionary={
+        'new': {'type': 'new_col', 'col_name': 'new',
+                'function': lambda df, keys, **kwargs: df['int'] + '_'}})
+    assert data_inplace.tables['df_inplace'] is df_inplace
+    assert 'new' in df_inplace.columns.tolist()
+    assert 'new' not in dict_snapshot['df_inplace'].columns.tolist()
+
+    data_inplace.assert_nulls(['1', 'nan'])
+    df_expected = dict_snapshot['df_inplace']
+    df_expected['new'] = df_expected['int'] + '_'
+    df_expected = df_expected.replace(['1', 'nan'], np.nan)
+    assert data_inplace.tables['df_inplace'] is df_inplace
+    assert df_inplace.equals(df_expected)
+
+
+def test_assert_nulls_1():
+    df_nulls = pd.DataFrame({
+        'a': ['x', 'nan', '', 'y'],
+        'b': [1, 2, 3, 4],
+        'c': ['', 'z', 'NULL', 'nan']
+    })
+    data_nulls = DataCuration(datetime.now(), 'test')
+    data_nulls.set_table({'df_nulls': df_nulls})
+    data_nulls.assert_nulls(['nan', '', 'NULL'], list_exclude_cols=['c'])
+    df_out = data_nulls.tables['df_nulls']
+    assert df_out['a'].isnull().tolist() == [False, True, True, False]
+    assert df_out['c'].tolist() == ['', 'z', 'NULL', 'nan']
+    assert df_out['b'].dtype.name == 'int64'
+    assert df_out.columns.tolist() == ['a', 'b', 'c']
+    assert df_nulls['a'].tolist() == ['x', 'nan', '', 'y']
+
+    df_sentinel = pd.DataFrame({
+        'a': ['x', '-999', 'y'], 'b': [1, -999, 3], 'c': [0.5, 2.0, -999.0],
+        'd': [-999, 2, 3]})
+    data_nulls.set_table({'df_sentinel': df_sentinel})
+    data_nulls.assert_nulls(['nan', '', -999], list_exclude_cols=['d'])
+    df_out = data_nulls.tables['df_sentinel']
+    assert df_out['a'].tolist() == ['x', '-999', 'y']
+    assert df_out['b'].isnull().tolist() == [False, True, False]
+    assert df_out['c'].isnull().tolist() == [False, False, True]
+    assert df_out['d'].tolist() == [-999, 2, 3]
+
+
+def test_convert_type_1():
+    data_type = DataCuration(var_cnv_1_start_time, 'test')
+    data_type.set_table({'df_convert_issues.tsv': df_convert_issues.copy()})
+    data_type.convert_columns(dictionary={
+        'float': {'columns': ['float'], 'dtypes': ['float'], 'type': 'float'},
+        'int': {'columns': ['int'], 'dtypes': ['int'], 'type': 'int'},
+        'date': {'columns': ['date'], 'dtypes': ['date'], 'type': 'datetime',
+                 'format': '%Y-%m-%d', 'coerce': True}
+    })
+    assert data_type.df_issues.equals(
+        df_cnv_1_expected_df_issues.iloc[[0, 1, 3]].reset_index(drop=True))
+    df_out = data_type.tables['df_convert_issues.tsv']
+    assert df_out['int'].dtype.name == 'object'
+    assert df_out['date'].dtype.name == 'datetime64[ns]'
+    assert df_out['date'].isnull().sum() == 3
+
+    df_types = pd.DataFrame({
+        'money': ['£1,200', '$5', np.nan, '3%'],
+        'flag': ['Yes', 'n', 'TRUE', np.nan]
+    })
+    data_type.set_table({'df_types': df_types})
+    data_type.convert_columns(dictionary={
+        'money': {'columns': ['money'], 'dtypes': [], 'type': 'int',
+                  'strip_currency': True},
+        'flag': {'columns': ['flag'], 'dtypes': [], 'type': 'bool'}
+    })
+    df_out = data_type.tables['df_types']
+    assert df_out['money'].tolist()[:2] == [1200, 5]
+
+    data_type.set_table({'df_large': pd.DataFrame({
+        'large': ['9007199254740993', '-9223372036854775808', '2.5']})})
+    data_type.convert_columns(dictionary={
+        'large': {'columns': ['large'], 'dtypes': [], 'type': 'int',
+                  'coerce': True}})
+    assert data_type.tables['df_large']['large'].tolist()[:2] == [
+        9007199254740993, -9223372036854775808]
+    assert data_type.tables['df_large']['large'].isnull().tolist() == [
+        False, False, True]
+    assert df_out['money'].dtype.name == 'Int64'
+    assert df_out['flag'].tolist()[:3] == [True, False, True]
+
+
+def test_convert_by_unique_1():
+    list_calls = list()
+
+    def func_upper(df, col, **kwargs):
+        list_calls.append(df.shape[0])
+        return df[col].str.upper()
+
+    df_unique = pd.DataFrame({
+        'code': ['a', 'b', np.nan, 'a', 'b', 'a'],
+        'date': ['01/02/2020', '03/04/2020', 'x', '01/02/2020', np.nan,
+                 '01/02/2020']
+    })
+    data_unique = DataCuration(var_cnv_1_start_time, 'test')
+    data_unique.set_table({'df_unique': df_unique})
+    data_unique.convert_columns(dictionary={
+        'code': {'columns': ['code'], 'dtypes': [],
+                 'functions': {1: func_by_unique(func_upper)}},
+        'date': {'columns': ['date'], 'dtypes': [], 'type': 'datetime',
+                 'format': '%d/%m/%Y', 'coerce': True}
+    })
+    df_out = data_unique.tables['df_unique']
+    assert list_calls == [2]
+    assert df_out['code'].tolist()[:2] == ['A', 'B']
+    assert df_out['code'].isnull().tolist() == [
+        False, False, True, False, False, False]
+    assert df_out['date'].tolist()[3] == datetime(2020, 2, 1)
+    assert df_out['date'].isnull().tolist() == [
+        False, False, True, False, True, False]
+    assert data_unique.df_issues.shape[0] == 1
+
+
+def test_compact_1(tmp_path):
+    df_compact = pd.DataFrame({
+        'number': [1, 2, 3, 4],
+        'value': [0.5, 1.25, np.nan, 2.0],
+        'code': ['A', 'B', 'A', 'A'],
+        'flag': ['Yes', 'no', np.nan, 'Y'],
+        'text': ['w', 'x', 'y', 'z']
+    })
+    data_compact = DataCuration(var_cnv_1_start_time, 'test')
+    data_compact.set_table({'df_compact': df_compact})
+    df_memory = data_compact.compact_tables()
+    df_out = data_compact.tables['df_compact']
+    assert df_out.dtypes.astype(str).tolist() == [
+        'int8', 'float32', 'category', 'boolean', 'object']
+    assert df_memory['bytes_after'].iloc[0] < df_memory[
+        'bytes_before'].iloc[0]
+    assert df_out['flag'].tolist()[:2] == [True, False]
+
+    data_compact.convert_columns(dictionary={
+        'int': {'columns': ['number'], 'dtypes': ['int64'],
+                'functions': {1: lambda df, col, **kwargs: 1 / 0}},
+        'code': {'columns': ['code'], 'dtypes': ['object'],
+                 'functions': {1: lambda df, col, **kwargs: 1 / 0}}
+    })
+    assert data_compact.df_issues.shape[0] == 0
+
+    var_db = str(tmp_path / 'compact.db')
+    cnx = sqlite3.connect(var_db)
+    df_compact.iloc[:0].to_sql('df_compact', cnx, index=False)
+    cnx.close()
+    cnxs = Connections()
+    cnxs.add_cnx('compact', 'sqlite3', 'df_compact', file_path=var_db)
+    cnxs.write_to_db('compact', df_out)
+    df_read = cnxs.read_from_db('compact', 'SELECT * FROM df_compact')
+    assert df_read['code'].tolist() == ['A', 'B', 'A', 'A']
+    assert df_read['value'].isnull().tolist() == [False, False, True, False]
+
+
+def test_dictionary_tables_1():
+    df_split = pd.DataFrame({
+        'value': [1, 2, 3, 4, 5],
+        'level_0': ['b', 'a', 'b', np.nan, 'a']
+    })
+    data_split = DataCuration(var_cnv_1_start_time, 'test')
+    data_split.set_table(df_split)
+    data_split.dictionary_tables()
+    assert list(data_split.tables.keys())[:2] == ['b', 'a']
+    assert data_split.tables['b']['value'].tolist() == [1, 3]
+    assert data_split.tables['a'].index.tolist() == [1, 4]
+    assert data_split.tables[list(data_split.tables.keys())[2]][
+        'value'].tolist() == [4]
+
+    df_sorted = df_split.iloc[[1, 4, 0, 2]]
+    data_split.set_table(df_sorted, overwrite=True)
+    dict_views = data_split.dictionary_tables(keep_concatenated=True)
+    assert data_split.tables is df_sorted
+    assert dict_views['b']['value'].tolist() == [1, 3]
+    assert np.shares_memory(
+        dict_views['a']['value'].values, df_sorted['value'].values)
+
+
+def test_concatenate_tables_1():
+    dict_concat = {
+        'file_1 -:- a': pd.DataFrame({
+            'number': [1, 2], 'code': pd.Categorical(['x', 'y'])}),
+        'file_1 -:- b': pd.DataFrame({
+            'number': [0.5, 1.5, 2.5], 'code': pd.Categorical(['z', 'x', 'x']),
+            'extra': [True, False, True]})
+    }
+    data_concat = DataCuration(var_cnv_1_start_time, 'test')
+    data_concat.set_table(dict_concat)
+    data_concat.concatenate_tables()
+    df_out = data_concat.tables
+    assert df_out.shape == (5, 4)
+    assert df_out.index.tolist() == [0, 1, 0, 1, 2]
+    assert df_out['number'].dtype.name == 'float64'
+    assert df_out['code'].tolist() == ['x', 'y', 'z', 'x', 'x']
+    assert df_out['code'].dtype.name == 'category'
+    assert df_out['extra'].isnull().tolist() == [
+        True, True, False, False, False]
+    assert df_out['level_0'].dtype.name == 'category'
+    assert df_out['level_0'].tolist() == ['file_1 -:- a'] * 2 + [
+        'file_1 -:- b'] * 3
+
+    data_concat.dictionary_tables()
+    assert data_concat.tables['file_1 -:- b']['number'].tolist() == [
+        0.5, 1.5, 2.5]
+    data_concat.concatenate_tables()
+    assert data_concat.tables.shape == (5, 4)
+
+    # Large ints that need nulls are kept exactly
+    var_large = 2 ** 53 + 1
+    data_int = DataCuration(var_cnv_1_start_time, 'test')
+    data_int.set_table({
+        'file_1 -:- a': pd.DataFrame({'a': [1], 'big': [var_large]}),
+        'file_1 -:- b': pd.DataFrame({'a': [2]}),
+        'file_1 -:- c': pd.DataFrame({
+            'a': [3], 'big': np.array([4], dtype='int32')}),
+        'file_1 -:- d': pd.DataFrame({
+            'a': [4], 'unsigned': np.array([2 ** 63], dtype='uint64')})
+    })
+    data_int.concatenate_tables()
+    df_int = data_int.tables
+    assert df_int['big'].dtype.name == 'Int64'
+    assert df_int['big'].tolist() == [var_large, pd.NA, 4, pd.NA]
+    assert df_int['a'].dtype.name == 'int64'
+    assert df_int['unsigned'].dtype.name == 'UInt64'
+    assert df_int['unsigned'].tolist()[-1] == 2 ** 63
+
+
+def test_link_headers_1():
+    dict_headers = {
+        'ideal_headers': ['a', 'b'],
+        'set_1': {'expected_headers': ['A', 'B'], 'new_headers': ['a', 'b'],
+                  'remove': ['', '']},
+        'set_2': {'expected_headers': ['Alpha  One', 'Beta'],
+                  'new_headers': ['a', 'b'], 'remove': ['', '']}
+    }
+    dict_link_tables = {
+        'file_1 -:- sheet': pd.DataFrame([['A', 'B'], [1, 2]]),
+        'file_2 -:- sheet': pd.DataFrame(
+            [[' alpha\tone', 'BETA '], [3, 4]]),
+        'file_3 -:- sheet': pd.DataFrame([['Alpha  One', 'Gamma'], [5, 6]])
+    }
+    data_link = DataCuration(var_cnv_1_start_time, 'test')
+    data_link.set_table(dict_link_tables)
+    data_link.set_comparison_headers(dictionary=dict_headers)
+    with pytest.raises(ValueError):
+        data_link.link_headers()
+    assert data_link.df_issues[['file', 'issue_long_desc']].values.tolist() == [
+        ['file_2', 'The headers are linked to the header set set_2 but are '
+                   'not exactly the same as its expected headers'],
+        ['file_3', 'The headers are not linked, the closest header set is '
+                   'set_2 with 1 of 2 headers the same']
+    ]
+
+    del dict_link_tables['file_3 -:- sheet']
+    data_link.set_table(dict_link_tables, overwrite=True)
+    data_link.link_headers()
+    data_link.assert_linked_headers()
+    assert data_link.tables['file_2 -:- sheet'].columns.tolist() == ['a', 'b']
+
+
+def test_tables_pool_1():
+    dict_tables = {
+        f'file_{i} -:- sheet': pd.DataFrame(
+            {'a': [str(i), 'x', '3'], 'b': [1, 2, i]})
+        for i in range(4)
+    }
+    dict_convert = {
+        'int': {'columns': ['a'], 'dtypes': ['int'], 'type': 'int'}
+    }
+    dict_alter = {
+        'total': {
+            'type': 'new_col',
+            'col_name': 'total',
+            'function': lambda df, keys, **kwargs: df['b'] * 2
+        }
+    }
+    list_results = list()
+    for executor in [None, 'thread', 'process']:
+        data_pool = DataCuration(var_cnv_1_start_time, 'test')
+        data_pool.set_table(dict(dict_tables))
+        data_pool.convert_columns(
+            dictionary=dict_convert, executor=executor, max_workers=2)
+        data_pool.alter_tables(
+            dictionary=dict_alter, executor=executor, max_workers=2)
+        list_results.append(data_pool)
+    for data_pool in list_results[1:]:
+        assert data_pool.df_issues.equals(list_results[0].df_issues)
+        for key in dict_tables.keys():
+            assert data_pool.tables[key].equals(list_results[0].tables[key])
+    assert list_results[0].df_issues['file'].tolist() == [
+        f'file_{i}' for i in range(4)]
+    assert dict_tables['file_0 -:- sheet'].columns.tolist() == ['a', 'b']
+
+    data_lazy = DataCuration(var_cnv_1_start_time, 'test')
+    data_lazy.set_table(dict(dict_tables))
+    data_lazy.set_lazy(True)
+    with pytest.raises(ValueError):
+        data_lazy.convert_columns(
+            dictionary=dict_convert, executor='thread', max_workers=2)
+    with pytest.raises(ValueError):
+        data_lazy.alter_tables(
+            dictionary=dict_alter, executor='thread', max_workers=2)
+    assert data_lazy.get_plan() == []
+
+
+def test_checkpoint_1(tmp_path):
+    data_checkpoint = DataCuration(var_cnv_1_start_time, 'test', 'key_2')
+    data_checkpoint.set_table({
+        'file_1 -:- sheet': pd.DataFrame({'a': ['1', 'x'], 'b': [1.5, 2.5]}),
+        'file_2 -:- sheet': pd.DataFrame({'a': ['3', '4'], 'b': [0.5, 1.0]},
+                                         index=[5, 6])
+    })
+    data_checkpoint.set_step_no(1)
+    data_checkpoint.convert_columns(dictionary={
+        'int': {'columns': ['a'], 'dtypes': ['int'], 'type': 'int'}})
+    data_checkpoint.checkpoint(str(tmp_path), file_format='pickle')
+    data_checkpoint.set_step_no(2)
+    data_checkpoint.formed_tables = {'summary': pd.DataFrame({'n': [2]})}
+    data_checkpoint.checkpoint(str(tmp_path))
+    data_step_2 = DataCuration(datetime.now(), 'other')
+    data_step_2.resume(str(tmp_path))
+    assert data_step_2.formed_tables['summary'].equals(
+        data_checkpoint.formed_tables['summary'])
+    os.remove(str(tmp_path / 'step_2' / 'manifest.json'))
+
+    data_resume = DataCuration(datetime.now(), 'other')
+    data_resume.resume(str(tmp_path))
+    assert data_resume.get_step_no() == 1
+    assert data_resume.formed_tables == dict()
+    for key in data_checkpoint.tables.keys():
+        assert data_resume.tables[key].equals(data_checkpoint.tables[key])
+    assert data_resume.df_issues.equals(data_checkpoint.df_issues)
+    data_resume.error_handling('file', np.nan, '', 'test', np.nan, 1, np.nan)
+    assert data_resume.df_issues[
+        ['key_1', 'key_2', 'grouping']].drop_duplicates().values.tolist() == [
+        ['test', 'key_2', var_cnv_1_start_time]]
+    with pytest.raises(ValueError):
+        data_resume.resume(str(tmp_path), 2)
+
+
+def test_checkpoint_2(tmp_path):
+    var_db_path = str(tmp_path / 'issues.db')
+    cnxs = Connections()
+    cnxs.add_cnx(
+        cnx_key='df_issues', cnx_type='sqlite3', table_name='df_issues',
+        file_path=var_db_path, sqlite_df_issues_create=True)
+    data_checkpoint = DataCuration(
+        var_cnv_1_start_time, 'test',
+        issue_sink=IssueSink(cnxs, 'df_issues', batch_size=2))
+    data_checkpoint.set_step_no(1)
+    for i in range(3):
+        data_checkpoint.error_handling(
+            'file', np.nan, '', f'issue {i}', np.nan, 1, np.nan)
+    data_checkpoint.checkpoint(str(tmp_path / 'checkpoints'))
+
+    data_resume = DataCuration(
+        var_cnv_1_start_time, 'test',
+        issue_sink=IssueSink(cnxs, 'df_issues', batch_size=2))
+    data_resume.resume(str(tmp_path / 'checkpoints'))
+    assert data_resume.df_issues.index.tolist() == [2]
+    assert data_resume.get_issue_count() == 3
+    data_resume.error_handling(
+        'file', np.nan, '', 'issue 3', np.nan, 1, np.nan)
+    assert data_resume.df_issues.shape[0] == 0
+    df_written = cnxs.read_from_db('df_issues', 'SELECT * FROM df_issues')
+    assert df_written['issue_long_desc'].tolist() == [
+        f'issue {i}' for i in range(4)]
+
+
+def test_checkpoint_3(tmp_path, caplog):
+    dict_tables = {
+        ('file_1', 'sheet'): pd.DataFrame({'a': [1, 2]}),
+        datetime(2020, 1, 1): pd.DataFrame({'a': [3, 4]})
+    }
+    data_checkpoint = DataCuration(var_cnv_1_start_time, 'test')
+    data_checkpoint.set_table(dict(dict_tables))
+    data_checkpoint.formed_tables = {1: pd.DataFrame({'n': [2]})}
+    data_checkpoint.checkpoint(str(tmp_path))
+    assert [
+        record for record in caplog.records if record.levelname == 'ERROR'
+    ] == []
+
+    data_resume = DataCuration(datetime.now(), 'other')
+    data_resume.resume(str(tmp_path))
+    assert list(data_resume.tables.keys()) == list(dict_tables.keys())
+    for key in dict_tables.keys():
+        assert data_resume.tables[key].equals(dict_tables[key])
+    assert list(data_resume.formed_tables.keys()) == [1]
+
+
+def test_check_plan_2(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    var_script = tmp_path / 'checks_plan_2.py'
+    check_plan = Checks(datetime.now(), 'test')
+    for var_limit in [0, 5]:
+        var_script.write_text(
+            f"dict_checks = {{'Below': {{'columns': ['a'], "
+            f"'calc_condition': lambda df, col, **kwargs: "
+            f"df[col] <= {var_limit}}}}}\n")
+        os.utime(var_script, ns=(var_limit * 10 ** 9, var_limit * 10 ** 9))
+        for var_path in [None, str(tmp_path)]:
+            plan = check_plan.compile_checks(
+                path=var_path, script_name='checks_plan_2')
+            assert plan.get_check('Below')['calc_condition'](
+                pd.DataFrame({'a': [3]}), 'a').tolist() == [var_limit > 3]